@@ -0,0 +1,130 @@
+"""
+Load test of the auth endpoints against the local PostgREST/GoTrue stub, with an in-process fakeredis standing in
+for the shared Redis (not part of requirements.txt). Measures /auth/verify with and without the profile cache,
+counting the Supabase calls each request makes, and fires a burst at /auth/login to check the rate limiter lets
+exactly the configured number through and keeps the rest away from Supabase, including when every request behind the
+proxy forges a new X-Forwarded-For address.
+
+Run from the backend directory:
+    python -m benchmarks.bench_auth --requests 500 --concurrency 50 --latency 0.02
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import time
+from typing import Callable, Optional
+
+from benchmarks.bench_load import PORT, configure_environment, percentile
+
+async def drive(app, method: str, path: str, total: int, concurrency: int, cookies: dict, json: dict = None, headers: Optional[Callable[[], dict]] = None) -> dict:
+    import httpx
+
+    latencies = []
+    statuses = {}
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://app", cookies=cookies) as client:
+        async def one():
+            async with semaphore:
+                started = time.perf_counter()
+                response = await client.request(method, path, json=json, headers=headers() if headers else None)
+                latencies.append(time.perf_counter() - started)
+                statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(total)))
+        elapsed = time.perf_counter() - started
+
+    return {"throughput": total / elapsed, "p50": statistics.median(latencies), "p99": percentile(latencies, 0.99), "statuses": statuses}
+
+def report(label: str, result: dict, calls: int, total: int):
+    print(
+        f"{label:<24} {result['throughput']:8.1f} req/s   p50 {result['p50'] * 1000:6.1f} ms   p99 {result['p99'] * 1000:6.1f} ms   "
+        f"supabase calls/request {calls / total:5.2f}   statuses {result['statuses']}"
+    )
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.02, help="Seconds the stub waits before answering")
+    args = parser.parse_args()
+
+    configure_environment(PORT)
+
+    import fakeredis
+    from jose import jwt
+    from benchmarks.stub_supabase import USER_ID, create_stub_app, serve_in_thread
+    from db.redis_client import get_redis
+    from main import app
+    from middleware import auth, rate_limit
+    from routes.v1.auth import login_limit, verify_limit
+
+    stub = create_stub_app(args.latency)
+    server = serve_in_thread(stub, PORT)
+
+    shared = fakeredis.FakeAsyncRedis()
+
+    async def shared_redis():
+        return shared
+
+    async def fresh_redis():
+        # A fresh Redis per request: no cached profile, and no rate limit history either.
+        return fakeredis.FakeAsyncRedis()
+
+    token = jwt.encode({"sub": USER_ID, "email": "member@example.com", "aud": "authenticated", "exp": int(time.time()) + 3600}, "unused", algorithm="HS256")
+    cookies = {"access_token": token}
+    verify_limit.limit = 0
+
+    print(f"stub latency {args.latency * 1000:.0f} ms, {args.requests} requests, concurrency {args.concurrency}")
+
+    async def scenarios() -> int:
+        # One event loop for everything: the app's Supabase client is created on first use and bound to it.
+        failures = 0
+
+        for label, override in (("verify, no profile cache", fresh_redis), ("verify, profile cache", shared_redis)):
+            auth.token_cache.clear()
+            app.dependency_overrides = {get_redis: override}
+            before = stub.state.calls
+            result = await drive(app, "GET", "/auth/verify", args.requests, args.concurrency, cookies)
+            report(label, result, stub.state.calls - before, args.requests)
+            failures += result["statuses"].get(200, 0) != args.requests
+
+        # Every request comes from the same client address, so only the first `limit` logins in the window get through.
+        app.dependency_overrides = {get_redis: shared_redis}
+        before = stub.state.calls
+        credentials = {"email": "member@example.com", "password": "Password123!"}
+        result = await drive(app, "POST", "/auth/login", args.requests, args.concurrency, {}, credentials)
+        report(f"login burst, limit {login_limit.limit}", result, stub.state.calls - before, args.requests)
+        failures += result["statuses"].get(200, 0) != min(login_limit.limit, args.requests)
+
+        # Behind one proxy, with the client putting a new address in front of the one the proxy appends every time.
+        rate_limit.RATE_LIMIT_TRUST_PROXY = True
+        spoofed = fakeredis.FakeAsyncRedis()
+
+        async def spoofed_redis():
+            return spoofed
+
+        def forged():
+            return {"X-Forwarded-For": f"10.{random.randrange(256)}.{random.randrange(256)}.{random.randrange(256)}, 203.0.113.7"}
+
+        app.dependency_overrides = {get_redis: spoofed_redis}
+        before = stub.state.calls
+        result = await drive(app, "POST", "/auth/login", args.requests, args.concurrency, {}, credentials, forged)
+        report("forged X-Forwarded-For", result, stub.state.calls - before, args.requests)
+        failures += result["statuses"].get(200, 0) != min(login_limit.limit, args.requests)
+        rate_limit.RATE_LIMIT_TRUST_PROXY = False
+
+        return failures
+
+    failures = asyncio.run(scenarios())
+
+    app.dependency_overrides = {}
+    server.should_exit = True
+
+    print("ok" if not failures else f"{failures} FAILURES")
+    raise SystemExit(1 if failures else 0)
+
+if __name__ == "__main__":
+    main()
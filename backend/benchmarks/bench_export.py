@@ -0,0 +1,188 @@
+"""
+Streams /admin/export for a synthetic club against the in-memory Supabase and Redis stand-ins and compares it with
+loading each table as one `query.data` list and serializing that. Reports time, size and the peak memory allocated
+while exporting (tracemalloc, in a second pass so it doesn't skew the timings), and checks every row comes out once
+in every format. Needs fakeredis (not part of requirements.txt).
+
+Run from the backend directory:
+    python -m benchmarks.bench_export --members 10000 --events-per-member 6 --latency 0.005
+"""
+import argparse
+import asyncio
+import csv
+import gzip
+import io
+import json
+import time
+import tracemalloc
+import uuid
+from datetime import datetime, timedelta
+
+from benchmarks.bench_suite import ADMIN_ID, JWT_SECRET, configure_environment, seed_club
+
+SCENARIOS = [
+    ("ndjson", "/admin/export"),
+    ("ndjson gzip", "/admin/export?gzip=true"),
+    ("csv events", "/admin/export?format=csv&tables=events"),
+    ("ndjson + grids", "/admin/export?tables=profiles&tables=user_roles&tables=events&tables=availability&slot_minutes=15")
+]
+
+async def stream(app, path: str, headers: dict, keep: bool = True) -> dict:
+    """
+    Calls the app as an ASGI server would and reads the body chunk by chunk (httpx's ASGI transport buffers the whole
+    response, hiding when the first byte went out).
+    """
+    route, _, query = path.partition("?")
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET", "scheme": "http",
+        "path": route, "raw_path": route.encode(), "query_string": query.encode(), "root_path": "",
+        "headers": [(name.lower().encode(), value.encode()) for name, value in headers.items()],
+        "server": ("app", 80), "client": ("127.0.0.1", 50000)
+    }
+    requested = False
+    finished = asyncio.Event()
+    response = {"status": None, "headers": {}, "size": 0, "first_byte": None}
+    body = io.BytesIO()
+
+    async def receive():
+        nonlocal requested
+        if not requested:
+            requested = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await finished.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            response["status"] = message["status"]
+            response["headers"] = {name.decode().lower(): value.decode() for name, value in message["headers"]}
+        elif message["type"] == "http.response.body":
+            chunk = message.get("body", b"")
+            if chunk and response["first_byte"] is None:
+                response["first_byte"] = time.perf_counter() - started
+            response["size"] += len(chunk)
+            if keep:
+                body.write(chunk)
+            if not message.get("more_body", False):
+                finished.set()
+
+    started = time.perf_counter()
+    await app(scope, receive, send)
+    elapsed = time.perf_counter() - started
+
+    return {
+        "status": response["status"], "encoding": response["headers"].get("content-encoding"), "body": body.getvalue(),
+        "size": response["size"], "elapsed": elapsed, "first_byte": response["first_byte"] or elapsed
+    }
+
+async def load_everything(supabase) -> bytes:
+    # What a handler building the export from `query.data` would do: every table in memory before the first byte.
+    from db.export import EXPORT_TABLES
+
+    output = []
+    for table, columns in EXPORT_TABLES.items():
+        rows = (await supabase.table(table).select(", ".join(columns)).execute()).data
+        output.append(json.dumps({"table": table, "rows": rows}))
+    return "\n".join(output).encode()
+
+def peak_memory(coroutine_factory):
+    tracemalloc.start()
+    try:
+        asyncio.get_event_loop().run_until_complete(coroutine_factory())
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+def check(name: str, result: dict, tables: dict) -> bool:
+    body = gzip.decompress(result["body"]) if result["encoding"] == "gzip" else result["body"]
+    text = body.decode()
+
+    if name.startswith("csv"):
+        rows = list(csv.reader(io.StringIO(text)))[1:]
+        return sorted(row[0] for row in rows) == sorted(row["id"] for row in tables["events"])
+
+    seen = {}
+    table = None
+    for line in text.splitlines():
+        record = json.loads(line)
+        if set(record) == {"table"}:
+            table = record["table"]
+            seen[table] = []
+        elif table != "availability":
+            seen[table].append(record["id"])
+    return all(sorted(seen.get(table, [])) == sorted(row["id"] for row in rows) for table, rows in tables.items())
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--members", type=int, default=10000)
+    parser.add_argument("--events-per-member", type=int, default=6)
+    parser.add_argument("--latency", type=float, default=0.005, help="Seconds each fake Supabase call waits")
+    args = parser.parse_args()
+
+    configure_environment()
+
+    import fakeredis
+    from jose import jwt
+    from benchmarks.fake_supabase import FakeSupabase
+    from db.export import EXPORT_PAGE_SIZE
+    from db.redis_client import get_redis
+    from db.supabase_client import get_supabase
+    from main import app
+
+    today = datetime.now().date()
+    origin = today - timedelta(days=(today.weekday() + 1) % 7)
+    tables = seed_club(args.members, args.events_per_member, origin)
+    for row in tables["user_roles"]:
+        row["id"] = str(uuid.uuid4())
+    for row in tables["profiles"]:
+        row["schedule_version"] = 0
+
+    supabase = FakeSupabase(tables, args.latency)
+    redis = fakeredis.FakeAsyncRedis()
+
+    async def override_supabase():
+        return supabase
+
+    async def shared_redis():
+        return redis
+
+    app.dependency_overrides = {get_supabase: override_supabase, get_redis: shared_redis}
+
+    token = jwt.encode({"sub": ADMIN_ID, "email": "admin@example.com", "aud": "authenticated", "exp": int(time.time()) + 3600}, JWT_SECRET, algorithm="HS256")
+    headers = {"Authorization": f"Bearer {token}", "Accept-Encoding": "identity"}
+
+    print(
+        f"{args.members} members, {len(tables['events'])} events, pages of {EXPORT_PAGE_SIZE} rows, "
+        f"latency {args.latency * 1000:.1f} ms per call"
+    )
+
+    # One loop for every run: fakeredis and the app's clients are bound to the loop they were first used on.
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+
+    started = time.perf_counter()
+    size = len(loop.run_until_complete(load_everything(supabase)))
+    elapsed = time.perf_counter() - started
+    peak = peak_memory(lambda: load_everything(supabase))
+    print(f"  {'query.data lists':<16} {elapsed * 1000:8.0f} ms   first byte {elapsed * 1000:8.0f} ms   {size / 1e6:7.1f} MB   peak {peak / 1e6:7.1f} MB")
+
+    failures = 0
+    for name, path in SCENARIOS:
+        result = loop.run_until_complete(stream(app, path, headers))
+        # Measured without keeping the body, which is buffered above only for the checks.
+        peak = peak_memory(lambda: stream(app, path, headers, keep=False))
+        ok = result["status"] == 200 and check(name, result, tables)
+        failures += not ok
+        print(
+            f"  {name:<16} {result['elapsed'] * 1000:8.0f} ms   first byte {result['first_byte'] * 1000:8.0f} ms   "
+            f"{result['size'] / 1e6:7.1f} MB   peak {peak / 1e6:7.1f} MB   {'ok' if ok else 'MISMATCH'}"
+        )
+
+    app.dependency_overrides = {}
+    loop.close()
+
+    print("ok" if not failures else f"{failures} FAILURES")
+    raise SystemExit(1 if failures else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Drives the app in-process against the local PostgREST/GoTrue stub and reports throughput, with an in-process fakeredis
+(not part of requirements.txt) standing in for the shared Redis behind the version counters, profile cache and rate
+limiter.
+
+Run from the backend directory:
+    python -m benchmarks.bench_load --requests 500 --concurrency 50 --latency 0.02
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+PORT = 54329
+
+def configure_environment(port: int):
+    os.environ.setdefault("SUPABASE_URL", f"http://127.0.0.1:{port}")
+    os.environ.setdefault("SUPABASE_KEY", "eyJhbGciOiJIUzI1NiJ9.eyJyb2xlIjoiYW5vbiJ9.c3R1Yg")
+    os.environ.setdefault("REDIS_HOST", "127.0.0.1")
+    os.environ.setdefault("REDIS_PORT", "6379")
+    os.environ.setdefault("ADMIN_PASSWORD", "benchmark")
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+async def run(app, path: str, total: int, concurrency: int, headers: dict, cookies: dict):
+    import httpx
+
+    latencies = []
+    failures = 0
+    semaphore = asyncio.Semaphore(concurrency)
+    transport = httpx.ASGITransport(app=app)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://app", headers=headers, cookies=cookies) as client:
+        async def one():
+            nonlocal failures
+            async with semaphore:
+                started = time.perf_counter()
+                response = await client.get(path)
+                latencies.append(time.perf_counter() - started)
+                if response.status_code != 200:
+                    failures += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(total)))
+        elapsed = time.perf_counter() - started
+
+    print(f"{path:<16} {total / elapsed:8.1f} req/s   p50 {statistics.median(latencies) * 1000:6.1f} ms   p99 {percentile(latencies, 0.99) * 1000:6.1f} ms   failures {failures}")
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.02, help="Seconds the stub waits before answering")
+    parser.add_argument("--events", type=int, default=20)
+    args = parser.parse_args()
+
+    configure_environment(PORT)
+
+    import fakeredis
+    from jose import jwt
+    from benchmarks.stub_supabase import USER_ID, create_stub_app, serve_in_thread
+    from db.redis_client import get_redis
+    from main import app
+    from routes.v1.auth import verify_limit
+
+    server = serve_in_thread(create_stub_app(args.latency, args.events), PORT)
+
+    shared = fakeredis.FakeAsyncRedis()
+
+    async def shared_redis():
+        return shared
+
+    app.dependency_overrides = {get_redis: shared_redis}
+    # Every request comes from one address; measure the endpoint, not the limiter turning it away.
+    verify_limit.limit = 0
+
+    token = jwt.encode({"sub": USER_ID, "email": "member@example.com", "aud": "authenticated", "exp": int(time.time()) + 3600}, "unused", algorithm="HS256")
+    headers = {"Authorization": f"Bearer {token}"}
+    cookies = {"access_token": token}
+
+    print(f"stub latency {args.latency * 1000:.0f} ms, {args.requests} requests, concurrency {args.concurrency}")
+
+    async def scenario():
+        await run(app, "/schedule/", args.requests, args.concurrency, headers, cookies)
+        await run(app, "/auth/verify", args.requests, args.concurrency, headers, cookies)
+
+    asyncio.run(scenario())
+    app.dependency_overrides = {}
+    server.should_exit = True
+
+if __name__ == "__main__":
+    main()
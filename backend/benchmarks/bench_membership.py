@@ -0,0 +1,111 @@
+"""
+Benchmarks the per-slot membership bitsets behind /admin/free and /admin/best-times against the scan a client had to
+do before: checking every event of every member for each slot. Also checks both give the same answers.
+
+Run from the backend directory:
+    python -m benchmarks.bench_membership --members 1000 5000 --required 8
+"""
+import argparse
+import random
+import time
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+
+from benchmarks.check_availability_rpc import seed
+from utils.availability import parse_time
+from utils.membership import build_membership
+
+def scan_free(events_by_member, members, slot_start, slot_end):
+    free = []
+    for member in members:
+        busy = False
+        for event in events_by_member.get(member, ()):
+            if event["event_type"] == "Permanent":
+                if (slot_start.weekday() + 1) % 7 != event["day_of_week"]:
+                    continue
+                start = datetime.combine(slot_start.date(), parse_time(event["start_time"]))
+                end = datetime.combine(slot_start.date(), parse_time(event["end_time"]))
+            else:
+                start, end = datetime.fromisoformat(event["start_date"]), datetime.fromisoformat(event["end_date"])
+            if start < slot_end and end > slot_start:
+                busy = True
+                break
+        if not busy:
+            free.append(member)
+    return free
+
+def scan_best(events_by_member, members, required, window_start, days, slot_minutes, first_hour, last_hour, limit):
+    ranked = []
+    for day in range(days):
+        for minute in range(first_hour * 60, last_hour * 60, slot_minutes):
+            slot_start = window_start + timedelta(days=day, minutes=minute)
+            free = set(scan_free(events_by_member, members, slot_start, slot_start + timedelta(minutes=slot_minutes)))
+            slot = (day * 24 * 60 + minute) // slot_minutes
+            ranked.append((-sum(member in free for member in required), -len(free), slot))
+    ranked.sort()
+    return [(slot, -required_free, -total_free) for required_free, total_free, slot in ranked[:limit]]
+
+def timed(fn, *args, repeat=3):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn(*args)
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--members", type=int, nargs="+", default=[1000, 5000])
+    parser.add_argument("--events-per-member", type=int, default=6)
+    parser.add_argument("--days", type=int, default=28)
+    parser.add_argument("--slot-minutes", type=int, default=15)
+    parser.add_argument("--required", type=int, default=8)
+    parser.add_argument("--scan-days", type=int, default=1, help="Days the (slow) scan ranks over for the best-times comparison")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    origin = date(2025, 3, 2)
+    window_start = datetime.combine(origin, datetime.min.time())
+    failures = 0
+
+    for count in args.members:
+        profiles, _, events = seed(count, args.events_per_member, origin)
+        members = [profile["id"] for profile in profiles if profile["verified"]]
+        events_by_member = defaultdict(list)
+        for event in events:
+            events_by_member[event["user_id"]].append(event)
+
+        rng = random.Random(count)
+        required = rng.sample(members, min(args.required, len(members)))
+
+        build_time, membership = timed(build_membership, events, members, window_start, args.days, args.slot_minutes, repeat=args.repeat)
+
+        slots = [rng.randrange(len(membership.bits)) for _ in range(20)]
+        free_time, bitset_free = timed(lambda: [membership.free_at(slot) for slot in slots], repeat=args.repeat)
+
+        def slot_bounds(slot):
+            start = window_start + timedelta(minutes=slot * args.slot_minutes)
+            return start, start + timedelta(minutes=args.slot_minutes)
+
+        scan_free_time, scanned_free = timed(lambda: [scan_free(events_by_member, members, *slot_bounds(slot)) for slot in slots], repeat=1)
+        free_matches = bitset_free == scanned_free
+
+        best_time, best = timed(membership.best_slots, required, 10, 7, 20, repeat=args.repeat)
+
+        scan_window = build_membership(events, members, window_start, args.scan_days, args.slot_minutes)
+        scan_best_time, scanned_best = timed(scan_best, events_by_member, members, required, window_start, args.scan_days, args.slot_minutes, 7, 20, 10, repeat=1)
+        best_matches = scan_window.best_slots(required, 10, 7, 20) == scanned_best
+
+        failures += not free_matches or not best_matches
+        print(f"{len(members)} verified members, {len(events)} events, {args.days} days of {args.slot_minutes} min slots ({len(membership.bits)} slots)")
+        print(f"  build bitsets        {build_time * 1000:9.1f} ms")
+        print(f"  who is free, 20 slots {free_time * 1000:8.2f} ms   scan {scan_free_time * 1000:9.1f} ms   match {free_matches}")
+        print(f"  best times ({len(required)} required) {best_time * 1000:6.2f} ms over {args.days} days   scan {scan_best_time * 1000:9.1f} ms over {args.scan_days} day(s)   match {best_matches}")
+        print(f"  top slot: {best[0]}")
+
+    print("ok" if not failures else f"{failures} FAILURES")
+    raise SystemExit(1 if failures else 0)
+
+if __name__ == "__main__":
+    main()
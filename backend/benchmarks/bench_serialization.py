@@ -0,0 +1,61 @@
+"""
+Compares serialization time and payload size of the admin availability formats.
+
+Run from the backend directory:
+    python -m benchmarks.bench_serialization
+"""
+import gzip
+import json
+import time
+from datetime import datetime
+from typing import List
+import msgpack
+import numpy as np
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+
+from models.schedule import Availability
+from utils.availability import iter_daily_counts, to_availability_slots, to_columnar
+
+CASES = [(28, 60, 7, 20), (28, 15, 7, 20), (120, 15, 0, 24)]
+
+def serialize_list(occupancy, origin, max_people, slot_minutes, first_hour, last_hour):
+    # Mirrors what FastAPI does for a List[Availability] response: validate every item, encode, dump.
+    slots = to_availability_slots(occupancy, origin, max_people, "Developer", slot_minutes, first_hour, last_hour)
+    validated = TypeAdapter(List[Availability]).validate_python(slots)
+    return json.dumps(jsonable_encoder(validated)).encode()
+
+def serialize_columnar(occupancy, origin, max_people, slot_minutes, first_hour, last_hour):
+    return json.dumps(to_columnar(occupancy, origin, max_people, "Developer", slot_minutes, first_hour, last_hour), separators=(",", ":")).encode()
+
+def serialize_msgpack(occupancy, origin, max_people, slot_minutes, first_hour, last_hour):
+    return msgpack.packb(to_columnar(occupancy, origin, max_people, "Developer", slot_minutes, first_hour, last_hour))
+
+def serialize_ndjson(occupancy, origin, max_people, slot_minutes, first_hour, last_hour):
+    records = iter_daily_counts(occupancy, origin, max_people, "Developer", slot_minutes, first_hour, last_hour)
+    return "".join(json.dumps(record, separators=(",", ":")) + "\n" for record in records).encode()
+
+def timed(fn, *args, repeat=5):
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn(*args)
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+def main():
+    rng = np.random.default_rng(0)
+    origin = datetime(2025, 1, 5)
+    max_people = 500
+
+    for days, slot_minutes, first_hour, last_hour in CASES:
+        occupancy = rng.integers(0, max_people, size=(days, 24 * 60 // slot_minutes), dtype=np.int32)
+        slots = days * (last_hour - first_hour) * 60 // slot_minutes
+        print(f"\n{days} days, {slot_minutes} min slots, {first_hour}-{last_hour}h ({slots} slots)")
+
+        for name, serialize in [("list", serialize_list), ("columnar", serialize_columnar), ("msgpack", serialize_msgpack), ("ndjson", serialize_ndjson)]:
+            elapsed, payload = timed(serialize, occupancy, origin, max_people, slot_minutes, first_hour, last_hour)
+            print(f"  {name:<9} {elapsed * 1000:8.2f} ms  {len(payload) / 1024:9.1f} KiB  gzip {len(gzip.compress(payload)) / 1024:8.1f} KiB")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+"""
+Load benchmark of the main read endpoints against in-memory stand-ins for Supabase and Redis, swapped in through
+FastAPI dependency overrides, for synthetic clubs of several sizes. Reports throughput and p50/p95/p99 latency per
+endpoint and saves the run as JSON under benchmarks/results/, named after the current commit, so a later run can be
+compared against it. Needs fakeredis (not part of requirements.txt).
+
+Run from the backend directory:
+    python -m benchmarks.bench_suite --sizes 100 1000 10000 --requests 200 --concurrency 20 --latency 0.005
+    python -m benchmarks.bench_suite --compare benchmarks/results/<earlier run>.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import time
+import uuid
+from datetime import date, datetime, timedelta
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+JWT_SECRET = "benchmark-secret"
+ADMIN_ID = str(uuid.UUID(int=1))
+
+SCENARIOS = [
+    ("admin", "/admin/?slot_minutes=15"),
+    ("admin_cold", "/admin/?slot_minutes=15"),
+    ("admin_roles", "/admin/roles?format=columnar"),
+    ("schedule", "/schedule/"),
+    ("verify", "/auth/verify")
+]
+
+def configure_environment():
+    # The clients in db/ are only built on first use and the overrides below replace them, so these are never used.
+    os.environ.setdefault("SUPABASE_URL", "http://127.0.0.1:54329")
+    os.environ.setdefault("SUPABASE_KEY", "eyJhbGciOiJIUzI1NiJ9.eyJyb2xlIjoiYW5vbiJ9.c3R1Yg")
+    os.environ.setdefault("REDIS_HOST", "127.0.0.1")
+    os.environ.setdefault("REDIS_PORT", "6379")
+    os.environ.setdefault("ADMIN_PASSWORD", "benchmark")
+    os.environ.setdefault("SUPABASE_JWT_SECRET", JWT_SECRET)
+    os.environ["SCHEDULER_MODE"] = "off"
+
+def seed_club(members: int, events_per_member: int, origin: date) -> dict:
+    from benchmarks.check_availability_rpc import seed
+
+    profiles, user_roles, events = seed(members, events_per_member, origin)
+    rng = random.Random(members)
+    for event in events:
+        event["id"] = str(uuid.UUID(int=rng.getrandbits(128)))
+
+    profiles.append({"id": ADMIN_ID, "name": "Admin", "email": "admin@example.com", "verified": True, "schedule_version": 0})
+    user_roles.append({"user_id": ADMIN_ID, "email": "admin@example.com", "roles": ["Admin", "Developer"]})
+    events += [{
+        "id": str(uuid.UUID(int=index + 2)), "user_id": ADMIN_ID, "calendar_id": f"admin-{index}", "event_type": "Permanent",
+        "day_of_week": index % 7, "start_time": "09:00:00", "end_time": "11:00:00", "start_date": None, "end_date": None
+    } for index in range(events_per_member)]
+
+    return {"profiles": profiles, "user_roles": user_roles, "events": events}
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+async def measure(app, path: str, total: int, concurrency: int, headers: dict, cookies: dict) -> dict:
+    import httpx
+
+    latencies = []
+    failures = 0
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://app", headers=headers, cookies=cookies, timeout=None) as client:
+        async def one():
+            nonlocal failures
+            async with semaphore:
+                started = time.perf_counter()
+                response = await client.get(path)
+                latencies.append(time.perf_counter() - started)
+                failures += response.status_code != 200
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(total)))
+        elapsed = time.perf_counter() - started
+
+    return {
+        "requests": total,
+        "throughput": total / elapsed,
+        "p50": percentile(latencies, 0.50),
+        "p95": percentile(latencies, 0.95),
+        "p99": percentile(latencies, 0.99),
+        "failures": failures
+    }
+
+def current_commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True, stderr=subprocess.DEVNULL).strip()
+    except Exception:
+        return "unknown"
+
+def print_comparison(results: dict, baseline: dict):
+    print(f"\ncompared with {baseline['commit']} ({baseline['timestamp']}):")
+    for size, scenarios in results.items():
+        for name, current in scenarios.items():
+            previous = baseline["results"].get(size, {}).get(name)
+            if not previous:
+                continue
+            changes = "   ".join(
+                f"{metric} {(current[metric] / previous[metric] - 1) * 100:+6.1f}%"
+                for metric in ("throughput", "p50", "p95", "p99") if previous[metric]
+            )
+            print(f"{size:>6} {name:<12} {changes}")
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--events-per-member", type=int, default=6)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.005, help="Seconds each fake Supabase and Redis call waits")
+    parser.add_argument("--scenarios", nargs="+", default=[name for name, _ in SCENARIOS])
+    parser.add_argument("--compare", help="Earlier results file to compare against")
+    parser.add_argument("--no-save", action="store_true")
+    args = parser.parse_args()
+
+    configure_environment()
+
+    import fakeredis
+    from jose import jwt
+    from benchmarks.fake_supabase import FakeSupabase
+    from db.redis_client import get_redis
+    from db.supabase_client import get_supabase
+    from main import app
+    from middleware import auth
+
+    class SlowFakeRedis(fakeredis.FakeAsyncRedis):
+        latency = args.latency
+
+        async def execute_command(self, *command, **options):
+            await asyncio.sleep(self.latency)
+            return await super().execute_command(*command, **options)
+
+    today = datetime.now().date()
+    origin = today - timedelta(days=(today.weekday() + 1) % 7)
+
+    token = jwt.encode({"sub": ADMIN_ID, "email": "admin@example.com", "aud": "authenticated", "exp": int(time.time()) + 3600}, JWT_SECRET, algorithm="HS256")
+    headers = {"Authorization": f"Bearer {token}"}
+    cookies = {"access_token": token}
+
+    print(f"latency {args.latency * 1000:.1f} ms per call, {args.requests} requests per endpoint, concurrency {args.concurrency}")
+
+    results = {}
+    for size in args.sizes:
+        supabase = FakeSupabase(seed_club(size, args.events_per_member, origin), args.latency)
+        redis = SlowFakeRedis()
+
+        async def override_supabase():
+            return supabase
+
+        async def shared_redis():
+            return redis
+
+        async def empty_redis():
+            # A fresh Redis per request, so every availability read misses the cache.
+            return SlowFakeRedis()
+
+        results[str(size)] = {}
+        for name, path in SCENARIOS:
+            if name not in args.scenarios:
+                continue
+
+            auth.token_cache.clear()
+            app.dependency_overrides = {get_supabase: override_supabase, get_redis: empty_redis if name == "admin_cold" else shared_redis}
+
+            result = asyncio.run(measure(app, path, args.requests, args.concurrency, headers, cookies))
+            results[str(size)][name] = result
+            print(
+                f"{size:>6} members  {name:<12} {result['throughput']:8.1f} req/s   p50 {result['p50'] * 1000:7.1f} ms   "
+                f"p95 {result['p95'] * 1000:7.1f} ms   p99 {result['p99'] * 1000:7.1f} ms   failures {result['failures']}"
+            )
+
+    app.dependency_overrides = {}
+
+    run = {
+        "commit": current_commit(),
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "config": {key: value for key, value in vars(args).items() if key not in ("compare", "no_save")},
+        "results": results
+    }
+
+    if not args.no_save:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        path = os.path.join(RESULTS_DIR, f"{run['timestamp'].replace(':', '')}-{run['commit']}.json")
+        with open(path, "w") as file:
+            json.dump(run, file, indent=2)
+        print(f"\nsaved {path}")
+
+    if args.compare:
+        with open(args.compare) as file:
+            print_comparison(results, json.load(file))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Checks the per-week availability cache against fakeredis: misses are filled and then hit, invalidate_roles drops every
+week of a role and leaves other roles alone, invalidate_weeks drops only the given weeks, both bump the role's
+availability version, and a grid computed before an invalidation that lands between a miss and its fill is never served
+afterwards. Needs fakeredis (not part of requirements.txt).
+
+Run from the backend directory:
+    python -m benchmarks.check_availability_cache
+"""
+import asyncio
+from datetime import date, timedelta
+
+import numpy as np
+
+from utils.availability import DAYS_PER_WEEK, MINUTES_PER_DAY
+
+SLOT_MINUTES = 60
+
+def week_grid(value: int) -> np.ndarray:
+    return np.full((DAYS_PER_WEEK, MINUTES_PER_DAY // SLOT_MINUTES), value, dtype=np.int32)
+
+def check(label: str, condition: bool, failures: list):
+    print(f"  {'ok' if condition else 'FAIL'}  {label}")
+    if not condition:
+        failures.append(label)
+
+async def run() -> list:
+    import fakeredis
+    from db.availability_cache import AvailabilityCache
+    from db.versions import VersionStore, availability_version_key
+
+    failures = []
+    redis = fakeredis.FakeAsyncRedis()
+    cache = AvailabilityCache(redis)
+    versions = VersionStore(redis)
+    first = date(2025, 3, 2)
+    weeks = [first + timedelta(days=DAYS_PER_WEEK * index) for index in range(3)]
+
+    generation, max_people, cached = await cache.get("Developer", weeks, SLOT_MINUTES)
+    check("empty cache misses every week", max_people is None and cached == {}, failures)
+
+    await cache.set("Developer", generation, 10, {week: week_grid(index) for index, week in enumerate(weeks)}, SLOT_MINUTES)
+    await cache.set("Media", (await cache.get("Media", weeks, SLOT_MINUTES))[0], 4, {weeks[0]: week_grid(7)}, SLOT_MINUTES)
+    _, max_people, cached = await cache.get("Developer", weeks, SLOT_MINUTES)
+    check("filled weeks hit with their grids and head count", max_people == 10 and all(np.array_equal(cached[week], week_grid(index)) for index, week in enumerate(weeks)), failures)
+
+    _, _, cached = await cache.get("Developer", weeks, 30)
+    check("another slot size misses", cached == {}, failures)
+
+    before = await versions.get([availability_version_key("Developer"), availability_version_key("Media")])
+    await cache.invalidate_weeks(["Developer"], [weeks[1]])
+    after = await versions.get([availability_version_key("Developer"), availability_version_key("Media")])
+    check("invalidate_weeks bumps only that role's version", after[0] > before[0] and after[1] == before[1], failures)
+    _, max_people, cached = await cache.get("Developer", weeks, SLOT_MINUTES)
+    check("invalidate_weeks drops only that week", sorted(cached) == [weeks[0], weeks[2]] and max_people == 10, failures)
+
+    await cache.invalidate_roles(["Developer"])
+    check("invalidate_roles bumps the role's version", (await versions.get([availability_version_key("Developer")]))[0] > after[0], failures)
+    _, max_people, cached = await cache.get("Developer", weeks, SLOT_MINUTES)
+    check("invalidate_roles drops every week of the role", max_people is None and cached == {}, failures)
+    _, max_people, cached = await cache.get("Media", weeks, SLOT_MINUTES)
+    check("other roles stay cached", max_people == 4 and list(cached) == [weeks[0]], failures)
+
+    # A reader misses, a write invalidates while it computes, then the reader stores what it computed before the write.
+    for label, invalidate in (
+        ("invalidate_roles", lambda: cache.invalidate_roles(["Events"])),
+        ("invalidate_weeks", lambda: cache.invalidate_weeks(["Events"], weeks))
+    ):
+        generation, _, _ = await cache.get("Events", weeks, SLOT_MINUTES)
+        await invalidate()
+        await cache.set("Events", generation, 3, {week: week_grid(1) for week in weeks}, SLOT_MINUTES)
+        _, max_people, cached = await cache.get("Events", weeks, SLOT_MINUTES)
+        stale = [week for week, grid in cached.items() if np.array_equal(grid, week_grid(1))]
+        check(f"{label} during a miss: the pre-write grid is not served", not stale, failures)
+        await cache.invalidate_roles(["Events"])
+
+    generation, _, _ = await cache.get("Volunteer", weeks, SLOT_MINUTES)
+    await cache.set("Volunteer", None, 5, {weeks[0]: week_grid(2)}, SLOT_MINUTES)
+    _, _, cached = await cache.get("Volunteer", weeks, SLOT_MINUTES)
+    check("a fill after a failed read stores nothing", cached == {}, failures)
+
+    return failures
+
+def main():
+    failures = asyncio.run(run())
+    print("ok" if not failures else f"{len(failures)} FAILURES")
+    raise SystemExit(1 if failures else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""
+Checks that db/get_availability_counts.sql produces the same grids as the Python engine, and times both.
+Needs a scratch local Postgres and psycopg2 (not part of requirements.txt). Tables are created in a throwaway schema.
+
+Run from the backend directory:
+    python -m benchmarks.check_availability_rpc --dsn postgresql://postgres@localhost/postgres
+"""
+import argparse
+import json
+import random
+import time
+import uuid
+from datetime import date, datetime, timedelta
+import numpy as np
+
+from utils.availability import build_occupancy, occupancy_from_counts
+
+ROLES = ["Developer", "Volunteer", "President", "Admin", "Events", "Media"]
+SCHEMA = "availability_check"
+
+SETUP = f"""
+DO $$ BEGIN
+    CREATE EXTENSION IF NOT EXISTS "uuid-ossp";
+EXCEPTION WHEN OTHERS THEN
+    CREATE OR REPLACE FUNCTION public.uuid_generate_v4() RETURNS UUID AS 'SELECT gen_random_uuid()' LANGUAGE sql;
+END $$;
+CREATE SCHEMA IF NOT EXISTS auth;
+CREATE TABLE IF NOT EXISTS auth.users (id UUID PRIMARY KEY);
+DROP SCHEMA IF EXISTS {SCHEMA} CASCADE;
+CREATE SCHEMA {SCHEMA};
+SET search_path TO {SCHEMA}, public;
+CREATE TYPE user_role AS ENUM ({", ".join(f"'{role}'" for role in ROLES)});
+"""
+
+def seed(members: int, events_per_member: int, origin: date, seed_value: int = 0):
+    rng = random.Random(seed_value)
+    profiles, user_roles, events = [], [], []
+
+    for _ in range(members):
+        user_id = str(uuid.UUID(int=rng.getrandbits(128)))
+        profiles.append({"id": user_id, "name": "Member", "email": f"{user_id}@example.com", "verified": rng.random() < 0.8, "schedule_version": 0})
+        user_roles.append({"user_id": user_id, "email": f"{user_id}@example.com", "roles": rng.sample(ROLES, rng.randint(1, 3))})
+
+        for index in range(events_per_member):
+            if rng.random() < 0.5:
+                start_minute = rng.randrange(0, 23 * 60, 5)
+                end_minute = rng.randrange(start_minute + 5, 24 * 60, 5)
+                events.append({
+                    "user_id": user_id, "calendar_id": f"{user_id}-{index}", "event_type": "Permanent",
+                    "day_of_week": rng.randint(0, 6), "start_date": None, "end_date": None,
+                    "start_time": f"{start_minute // 60:02d}:{start_minute % 60:02d}:00",
+                    "end_time": f"{end_minute // 60:02d}:{end_minute % 60:02d}:{rng.choice(['00', '30'])}"
+                })
+            else:
+                start = datetime.combine(origin, datetime.min.time()) + timedelta(days=rng.randint(-7, 40), minutes=rng.randrange(0, 1440, 5))
+                end = start + timedelta(minutes=rng.randrange(5, 72 * 60, 5))
+                events.append({
+                    "user_id": user_id, "calendar_id": f"{user_id}-{index}", "event_type": "Temporary",
+                    "day_of_week": None, "start_time": None, "end_time": None,
+                    "start_date": start.isoformat(), "end_date": end.isoformat()
+                })
+
+    return profiles, user_roles, events
+
+def python_occupancy(profiles, user_roles, events, role, window_start, days, slot_minutes):
+    roles_by_user = {row["user_id"]: row["roles"] for row in user_roles}
+    window_end = window_start + timedelta(days=days)
+
+    def has_role(user_id):
+        return role is None or role in roles_by_user.get(user_id, [])
+
+    selected = [
+        event for event in events
+        if has_role(event["user_id"]) and (
+            event["start_date"] is None
+            or (datetime.fromisoformat(event["start_date"]) < window_end and datetime.fromisoformat(event["end_date"]) > window_start)
+        )
+    ]
+    max_people = sum(1 for profile in profiles if profile["verified"] and has_role(profile["id"]))
+
+    return max_people, build_occupancy(selected, window_start, days, slot_minutes)
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--dsn", required=True)
+    parser.add_argument("--members", type=int, default=300)
+    parser.add_argument("--events-per-member", type=int, default=10)
+    args = parser.parse_args()
+
+    import psycopg2
+    from psycopg2.extras import execute_values
+
+    origin = date(2025, 3, 2)
+    profiles, user_roles, events = seed(args.members, args.events_per_member, origin)
+
+    connection = psycopg2.connect(args.dsn)
+    cursor = connection.cursor()
+    cursor.execute(SETUP)
+    cursor.execute(open("db/schema.sql").read())
+    cursor.execute(open("db/get_availability_counts.sql").read())
+
+    execute_values(cursor, "INSERT INTO auth.users (id) VALUES %s ON CONFLICT DO NOTHING", [(p["id"],) for p in profiles])
+    execute_values(cursor, "INSERT INTO profiles (id, name, email, verified) VALUES %s", [(p["id"], p["name"], p["email"], p["verified"]) for p in profiles])
+    execute_values(cursor, "INSERT INTO user_roles (user_id, email, roles) VALUES %s", [(r["user_id"], r["email"], r["roles"]) for r in user_roles], template="(%s, %s, %s::user_role[])")
+    execute_values(
+        cursor,
+        "INSERT INTO events (user_id, calendar_id, event_type, day_of_week, start_time, end_time, start_date, end_date) VALUES %s",
+        [(e["user_id"], e["calendar_id"], e["event_type"], e["day_of_week"], e["start_time"], e["end_time"], e["start_date"], e["end_date"]) for e in events]
+    )
+
+    failures = 0
+    for role in [None, "Developer", "Media"]:
+        for start, days, slot_minutes in [(origin, 28, 60), (origin + timedelta(days=3), 10, 15), (origin + timedelta(days=8), 1, 5), (origin, 120, 30)]:
+            window_start = datetime.combine(start, datetime.min.time())
+
+            started = time.perf_counter()
+            cursor.execute("SELECT get_availability_counts(%s, %s, %s, %s)", (role, window_start, days, slot_minutes))
+            result = cursor.fetchone()[0]
+            result = json.loads(result) if isinstance(result, str) else result
+            rpc_max, rpc_grid = result["max_people"], occupancy_from_counts(result["slots"], days, slot_minutes)
+            rpc_time = time.perf_counter() - started
+
+            started = time.perf_counter()
+            py_max, py_grid = python_occupancy(profiles, user_roles, events, role, window_start, days, slot_minutes)
+            py_time = time.perf_counter() - started
+
+            same = rpc_max == py_max and np.array_equal(rpc_grid, py_grid)
+            failures += not same
+            print(f"{str(role):<10} {start} {days:>3}d {slot_minutes:>2}m  rpc {rpc_time * 1000:7.1f} ms  python {py_time * 1000:7.1f} ms  {'ok' if same else 'MISMATCH'}")
+
+    cursor.execute(f"DROP SCHEMA {SCHEMA} CASCADE")
+    connection.commit()
+    connection.close()
+
+    raise SystemExit(1 if failures else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+Checks the slot calendar across the March and November clock changes: every week holds exactly its real hours,
+the availability list has one slot per slot of real time (none skipped, none duplicated, each mapped to the right
+wall-clock grid cell), and weeks without a change produce the same slots as localizing each one with pytz.
+
+Run from the backend directory:
+    python -m benchmarks.check_calendar --years 2025 2026
+"""
+import argparse
+from datetime import datetime, time, timedelta
+
+import numpy as np
+
+from utils.availability import build_occupancy, to_availability_slots
+from utils.calendar import PST, existing_slots, localize, slot_bounds, week_slots, week_start
+from utils.membership import SlotMembership
+
+SLOT_SIZES = (5, 15, 30, 60)
+
+def transitions(year: int):
+    """
+    The local dates of the year's spring-forward and fall-back changes, read from pytz's transition table.
+    """
+    changes = [moment for moment in PST._utc_transition_times if moment.year == year]
+    spring, fall = (PST.fromutc(moment).date() for moment in changes[:2])
+    return spring, fall
+
+def reference_slots(occupancy, origin, max_people, slot_minutes, first_hour, last_hour):
+    # The previous implementation: one pytz localize per slot boundary.
+    slots = []
+    first_slot, last_slot = first_hour * 60 // slot_minutes, last_hour * 60 // slot_minutes
+    for day in range(occupancy.shape[0]):
+        for slot in range(first_slot, last_slot):
+            start = origin + timedelta(days=day, minutes=slot * slot_minutes)
+            slots.append((PST.localize(start).isoformat(), PST.localize(start + timedelta(minutes=slot_minutes)).isoformat(), max_people - int(occupancy[day, slot])))
+    return slots
+
+def synthetic_events(origin: datetime, days: int, rng: np.random.Generator):
+    events = []
+    for index in range(300):
+        if index % 2:
+            start = rng.integers(0, 23 * 60, endpoint=False)
+            end = rng.integers(start + 1, 24 * 60, endpoint=True)
+            events.append({
+                "event_type": "Permanent", "day_of_week": int(rng.integers(0, 7)), "start_date": None, "end_date": None,
+                "start_time": f"{start // 60:02d}:{start % 60:02d}:00", "end_time": f"{min(end, 1439) // 60:02d}:{min(end, 1439) % 60:02d}:00"
+            })
+        else:
+            start = origin + timedelta(minutes=int(rng.integers(0, days * 1440)))
+            events.append({
+                "event_type": "Temporary", "day_of_week": None, "start_time": None, "end_time": None,
+                "start_date": start.isoformat(), "end_date": (start + timedelta(minutes=int(rng.integers(5, 600)))).isoformat()
+            })
+    return events
+
+def check(label: str, condition: bool, failures: list):
+    print(f"  {'ok' if condition else 'FAIL'}  {label}")
+    if not condition:
+        failures.append(label)
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--years", type=int, nargs="+", default=[2025, 2026])
+    args = parser.parse_args()
+
+    failures = []
+    rng = np.random.default_rng(0)
+
+    for year in args.years:
+        spring, fall = transitions(year)
+        print(f"{year}: clocks go forward {spring}, back {fall}")
+
+        for change, hours in ((spring, 167), (fall, 169)):
+            week = week_start(change)
+            for slot_minutes in SLOT_SIZES:
+                slots = week_slots(week, slot_minutes)
+                step = slot_minutes * 60
+                check(f"week of {week}, {slot_minutes} min: {hours} real hours, contiguous", len(slots.starts) * slot_minutes == hours * 60 and bool(np.all(np.diff(slots.starts) == step)), failures)
+
+            # Two weeks around the change, the whole day, so the small hours are in the output.
+            origin = datetime.combine(week - timedelta(days=3), time.min)
+            days = 10
+            for slot_minutes in SLOT_SIZES:
+                occupancy = build_occupancy(synthetic_events(origin, days, rng), origin, days, slot_minutes)
+                listed = to_availability_slots(occupancy, origin, 300, None, slot_minutes, 0, 24)
+
+                starts = [slot["startDate"] for slot in listed]
+                expected = (localize(origin + timedelta(days=days)) - localize(origin)) // timedelta(minutes=slot_minutes)
+                contiguous = all(slot["endDate"] == following["startDate"] for slot, following in zip(listed, listed[1:]))
+                check(f"{change} {slot_minutes} min: one slot per slot of real time ({expected}), none repeated, contiguous", len(listed) == expected and len({start.timestamp() for start in starts}) == expected and contiguous, failures)
+
+                # Each slot's count is read from the grid cell its own local wall-clock time falls in.
+                cells = [(start.astimezone(PST).replace(tzinfo=None) - origin) // timedelta(minutes=slot_minutes) for start in starts]
+                check(f"{change} {slot_minutes} min: counts from the matching wall-clock cell", [slot["numberOfPeople"] for slot in listed] == [300 - int(occupancy.ravel()[cell]) for cell in cells], failures)
+
+            exists = existing_slots(change, 1, 60)[0]
+            expected_missing = [2] if change == spring else []
+            check(f"{change}: hourly grid cells the clock skips are {expected_missing}", list(np.flatnonzero(~exists)) == expected_missing, failures)
+
+        # Weeks without a change match the pytz per-slot reference exactly.
+        origin = datetime(year, 6, 1)
+        occupancy = build_occupancy(synthetic_events(origin, 14, rng), origin, 14, 15)
+        listed = [(slot["startDate"].isoformat(), slot["endDate"].isoformat(), slot["numberOfPeople"]) for slot in to_availability_slots(occupancy, origin, 300, None, 15, 7, 20)]
+        check(f"June {year}: same slots as localizing each one", listed == reference_slots(occupancy, origin, 300, 15, 7, 20), failures)
+
+        # Clock-change edge cases of the single-time helpers.
+        skipped = localize(datetime.combine(spring, time(2, 30)))
+        repeated = localize(datetime.combine(fall, time(1, 30)))
+        check(f"{spring} 02:30 moves forward to 03:30 PDT", skipped.replace(tzinfo=None) == datetime.combine(spring, time(3, 30)) and skipped.utcoffset() == timedelta(hours=-7), failures)
+        check(f"{fall} 01:30 takes its first (PDT) occurrence", repeated.utcoffset() == timedelta(hours=-7), failures)
+        start, end = slot_bounds(fall, 1, 60)
+        check(f"{fall} 01:00-02:00 spans both occurrences", end - start == timedelta(hours=2), failures)
+
+        # The week after the change starts at the previous offset on its Sunday midnight.
+        tuesday = spring + timedelta(days=2)
+        sunday = localize(datetime.combine(week_start(tuesday), time.min))
+        check(f"week of {tuesday} starts {sunday.isoformat()} (PST)", sunday.utcoffset() == timedelta(hours=-8) and sunday.date() == spring, failures)
+        check(f"{spring} (a Sunday) is its own week start", week_start(spring) == spring, failures)
+
+        # Best-times never ranks a slot the clock skips, even when it is the only all-free one.
+        members = ["a", "b"]
+        bits = np.zeros((24, 1), dtype=np.uint8)
+        bits[2] = 0b11
+        bits[3] = 0b01
+        best = SlotMembership(members, bits, 1, 60).best_slots(members, 3, 0, 24, existing_slots(spring, 1, 60).ravel())
+        check(f"{spring}: best-times skips 02:00", best[0][0] == 3 and all(slot != 2 for slot, _, _ in best), failures)
+
+    print("ok" if not failures else f"{len(failures)} FAILURES")
+    raise SystemExit(1 if failures else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Checks that importing the app stays within a time budget and needs no configuration: runs
+`python -X importtime -c "import main"` in a fresh interpreter with the Supabase, Redis and admin settings removed
+from the environment, fails if the import errors or its cumulative time exceeds the budget, and lists the slowest
+top-level packages so a regression is easy to trace.
+
+Run from the backend directory:
+    python -m benchmarks.check_import_time --budget-ms 1500
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+from collections import defaultdict
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+REQUIRED_SETTINGS = ("SUPABASE_URL", "SUPABASE_KEY", "REDIS_HOST", "REDIS_PORT", "ADMIN_PASSWORD")
+# "import time: self [us] | cumulative | imported package"
+IMPORT_LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|\s*(\S+)")
+
+def measure(module: str):
+    env = {key: value for key, value in os.environ.items() if key not in REQUIRED_SETTINGS}
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True
+    )
+
+    entries = []
+    for line in completed.stderr.splitlines():
+        match = IMPORT_LINE.match(line)
+        if match:
+            entries.append((int(match.group(1)), int(match.group(2)), match.group(3)))
+    return completed, entries
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--module", default="main")
+    parser.add_argument("--budget-ms", type=float, default=1500)
+    parser.add_argument("--runs", type=int, default=3, help="The fastest run is compared with the budget")
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    best = None
+    for _ in range(args.runs):
+        completed, entries = measure(args.module)
+        if completed.returncode != 0:
+            print(f"importing {args.module} without configuration failed:")
+            print("\n".join(line for line in completed.stderr.splitlines() if not IMPORT_LINE.match(line)))
+            raise SystemExit(1)
+
+        total = next(cumulative for _, cumulative, name in reversed(entries) if name == args.module)
+        if best is None or total < best[0]:
+            best = (total, entries)
+
+    total, entries = best
+    # Group self time by top-level package, so e.g. all of supabase's submodules show up as one line.
+    by_package = defaultdict(int)
+    for own, _, name in entries:
+        by_package[name.split(".")[0]] += own
+
+    print(f"import {args.module}: {total / 1000:.1f} ms (budget {args.budget_ms:g} ms, best of {args.runs})")
+    for package, own in sorted(by_package.items(), key=lambda item: -item[1])[:args.top]:
+        print(f"  {package:<24} {own / 1000:8.1f} ms")
+
+    over = total / 1000 > args.budget_ms
+    print("ok" if not over else "OVER BUDGET")
+    raise SystemExit(1 if over else 0)
+
+if __name__ == "__main__":
+    main()
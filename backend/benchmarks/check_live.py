@@ -0,0 +1,386 @@
+"""
+Checks the live availability feed end to end against the in-memory Supabase and Redis stand-ins. Several simulated
+workers, each with its own hub and Redis connection on one fake server, serve many dashboard clients spread over
+roles, slot sizes, date ranges and day windows; a few more clients go through /admin/live itself. Schedule writes,
+patches, role changes and expired-event cleanup then run through the real handlers. Every client loads its grid from
+/admin/?format=columnar, some before the writes and the rest between them while earlier changes are still on their
+way, and patches it only with the events above the grid's X-Availability-Version. Every grid must end up equal to the
+grid recomputed from scratch.
+
+Also checks that a client that stops reading is cut off with `resync` without holding up the others, that the
+connection cap answers 503, that the stream is not gzipped when the client accepts gzip, and that disconnects free
+their slot. Needs fakeredis (not part of requirements.txt).
+
+Run from the backend directory:
+    python -m benchmarks.check_live --members 500 --clients 600 --workers 3 --writes 60
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+from datetime import date, datetime, timedelta
+from itertools import product
+
+import numpy as np
+
+from benchmarks.bench_suite import ADMIN_ID, JWT_SECRET, configure_environment, percentile, seed_club
+
+SLOT_SIZES = (15, 30, 60)
+DAY_WINDOWS = ((7, 20), (0, 24))
+
+def parse_frames(buffer: str):
+    """
+    Splits complete SSE frames off the buffer, returning ([(event, payload)], rest). Comment lines are skipped.
+    """
+    frames = []
+    while "\n\n" in buffer:
+        frame, buffer = buffer.split("\n\n", 1)
+        fields = dict(line.split(": ", 1) for line in frame.split("\n") if line and not line.startswith(":"))
+        if fields:
+            frames.append((fields["event"], json.loads(fields["data"])))
+    return frames, buffer
+
+class Dashboard:
+    """
+    A simulated client: loads its grid once the stream is ready, then keeps it current from the events alone. Events
+    that arrive before the grid are held until it loads; those at or below the grid's version are dropped.
+    """
+    def __init__(self, grid):
+        self.grid = grid
+        self.ready = asyncio.Event()
+        self.max_people = None
+        self.counts = None
+        self.version = None
+        self.pending = []
+        self.frames = 0
+        self.dropped = 0
+        self.frame_bytes = 0
+        self.resync = None
+
+    def load(self, max_people: int, counts: np.ndarray, version: int):
+        self.max_people, self.counts, self.version = max_people, counts.copy(), version
+        pending, self.pending = self.pending, []
+        for payload in pending:
+            self.apply(payload)
+
+    def apply(self, payload: dict):
+        if payload["version"] is not None and payload["version"] <= self.version:
+            self.dropped += 1
+            return
+        self.max_people += payload["maxPeopleDelta"]
+        self.counts += payload["maxPeopleDelta"]
+        for first, last, delta in payload["changes"]:
+            self.counts[first:last] += delta
+
+    def handle(self, event: str, payload: dict, size: int = 0):
+        if event == "ready":
+            self.ready.set()
+        elif event == "resync":
+            self.resync = payload["reason"]
+        elif event == "availability":
+            self.frames += 1
+            self.frame_bytes += size
+            if self.counts is None:
+                self.pending.append(payload)
+            else:
+                self.apply(payload)
+
+async def read_hub(hub, subscription, redis, dashboard: Dashboard):
+    async for frame in hub.stream(subscription, redis):
+        for event, payload in parse_frames(frame)[0]:
+            dashboard.handle(event, payload, len(frame))
+
+async def read_endpoint(app, path: str, headers: dict, dashboard: Dashboard, response: dict, disconnect: asyncio.Event):
+    """
+    Calls /admin/live as an ASGI server would, feeding body chunks to the dashboard as they arrive.
+    """
+    route, _, query = path.partition("?")
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET", "scheme": "http",
+        "path": route, "raw_path": route.encode(), "query_string": query.encode(), "root_path": "",
+        "headers": [(name.lower().encode(), value.encode()) for name, value in headers.items()],
+        "server": ("app", 80), "client": ("127.0.0.1", 50000)
+    }
+    requested = False
+    buffer = ""
+
+    async def receive():
+        nonlocal requested
+        if not requested:
+            requested = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await disconnect.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        nonlocal buffer
+        if message["type"] == "http.response.start":
+            response["status"] = message["status"]
+            response["headers"] = {name.decode().lower(): value.decode() for name, value in message["headers"]}
+        elif message["type"] == "http.response.body":
+            buffer += message.get("body", b"").decode()
+            frames, buffer = parse_frames(buffer)
+            for event, payload in frames:
+                dashboard.handle(event, payload)
+            if not message.get("more_body", False):
+                disconnect.set()
+
+    await app(scope, receive, send)
+
+async def load_grid(client, headers: dict, dashboard: Dashboard):
+    """
+    Loads the dashboard's grid the way a browser would, from /admin/?format=columnar with the stream's parameters.
+    """
+    grid = dashboard.grid
+    params = {
+        "format": "columnar", "slot_minutes": grid.slot_minutes, "start_hour": grid.first_hour, "end_hour": grid.last_hour,
+        "start_date": grid.start_date.isoformat(), "end_date": (grid.start_date + timedelta(days=grid.days - 1)).isoformat()
+    }
+    if grid.role != "All":
+        params["role"] = grid.role
+    response = await client.get("/admin/", params=params, headers=headers)
+    response.raise_for_status()
+    body = response.json()
+    dashboard.load(body["maxPeopleAvailable"], np.array(body["counts"], dtype=np.int64), int(response.headers["x-availability-version"]))
+
+def reference(tables: dict, grid) -> tuple:
+    # Recomputed from the rows with the same function the fake RPC answers with.
+    from benchmarks.fake_supabase import get_availability_counts
+    from utils.availability import occupancy_from_counts
+
+    role = None if grid.role == "All" else grid.role
+    result = get_availability_counts(tables, role, datetime.combine(grid.start_date, datetime.min.time()).isoformat(), grid.days, grid.slot_minutes)
+    occupancy = occupancy_from_counts(result["slots"], grid.days, grid.slot_minutes)
+    first_slot, last_slot = grid.first_hour * 60 // grid.slot_minutes, grid.last_hour * 60 // grid.slot_minutes
+    return result["max_people"], (result["max_people"] - occupancy[:, first_slot:last_slot]).ravel().astype(np.int64)
+
+def random_event(rng: random.Random, origin: date, index: int) -> dict:
+    if rng.random() < 0.5:
+        start = rng.randrange(0, 23 * 60, 5)
+        end = rng.randrange(start + 5, 24 * 60, 5)
+        return {
+            "id": f"live-{index}", "title": "Busy", "color": "green", "type": "Permanent", "daysOfWeek": [rng.randint(0, 6)],
+            "startTime": f"{start // 60:02d}:{start % 60:02d}:00", "endTime": f"{end // 60:02d}:{end % 60:02d}:00"
+        }
+    start = datetime.combine(origin, datetime.min.time()) + timedelta(days=rng.randint(-3, 35), minutes=rng.randrange(0, 1440, 5))
+    return {
+        "id": f"live-{index}", "title": "Busy", "color": "green", "type": "Temporary",
+        "start": start.isoformat(), "end": (start + timedelta(minutes=rng.randrange(5, 48 * 60, 5))).isoformat()
+    }
+
+def token(user_id: str, email: str) -> str:
+    from jose import jwt
+    return jwt.encode({"sub": user_id, "email": email, "aud": "authenticated", "exp": int(time.time()) + 3600}, JWT_SECRET, algorithm="HS256")
+
+def check(label: str, condition: bool, failures: list):
+    print(f"  {'ok' if condition else 'FAIL'}  {label}")
+    if not condition:
+        failures.append(label)
+
+async def run(args) -> list:
+    import fakeredis
+    import httpx
+    from benchmarks.fake_supabase import FakeSupabase
+    from db.availability_cache import ALL_ROLES
+    from db.live_updates import LiveGrid, LiveHub, hub as app_hub
+    from db.maintenance import delete_batch, forget_events
+    from db.redis_client import get_redis
+    from db.supabase_client import get_supabase
+    from main import app
+    from routes.v1.admin import VALID_ROLES
+    from utils.calendar import current_week
+
+    failures = []
+    rng = random.Random(0)
+    origin = current_week()
+    tables = seed_club(args.members, 4, origin)
+    for row in tables["user_roles"]:
+        row["id"] = str(uuid.uuid4())
+    for row in tables["profiles"]:
+        row["schedule_version"] = 0
+
+    supabase = FakeSupabase(tables)
+    server = fakeredis.FakeServer()
+    redis = fakeredis.FakeAsyncRedis(server=server)
+
+    async def override_supabase():
+        return supabase
+
+    async def shared_redis():
+        return redis
+
+    app.dependency_overrides = {get_supabase: override_supabase, get_redis: shared_redis}
+    admin_headers = {"Authorization": f"Bearer {token(ADMIN_ID, 'admin@example.com')}"}
+
+    # The app's own hub is worker 0; the others stand in for workers in other processes.
+    # Caps are raised to fit the simulated load; the cap itself is checked at the end.
+    app_hub.max_connections = args.clients + 2
+    hubs = [(app_hub, redis)] + [(LiveHub(max_connections=args.clients), fakeredis.FakeAsyncRedis(server=server)) for _ in range(args.workers - 1)]
+    grids = [
+        LiveGrid(role, slot_minutes, start, days, first_hour, last_hour)
+        for role, slot_minutes, (start, days), (first_hour, last_hour)
+        in product(VALID_ROLES + [ALL_ROLES], SLOT_SIZES, ((origin, 28), (origin + timedelta(days=7), 7)), DAY_WINDOWS)
+    ]
+
+    dashboards, readers = [], []
+    for index in range(args.clients):
+        hub, hub_redis = hubs[index % len(hubs)]
+        dashboard = Dashboard(grids[index % len(grids)])
+        subscription = hub.subscribe(hub_redis, dashboard.grid)
+        dashboards.append(dashboard)
+        readers.append(asyncio.ensure_future(read_hub(hub, subscription, hub_redis, dashboard)))
+
+    # Through the endpoint, with gzip on offer: events must still arrive as they happen.
+    stream_headers = dict(admin_headers, **{"Accept": "text/event-stream", "Accept-Encoding": "gzip"})
+    endpoint_clients = []
+    for role, slot_minutes in (("Developer", 15), (None, 60)):
+        path = f"/admin/live?slot_minutes={slot_minutes}" + (f"&role={role}" if role else "")
+        dashboard = Dashboard(LiveGrid(role or ALL_ROLES, slot_minutes, origin, 28, 7, 20))
+        response, disconnect = {}, asyncio.Event()
+        endpoint_clients.append((dashboard, response, disconnect, asyncio.ensure_future(read_endpoint(app, path, stream_headers, dashboard, response, disconnect))))
+        dashboards.append(dashboard)
+
+    # One subscriber that never reads, on a hub with a short queue.
+    slow_hub = LiveHub(queue_size=4)
+    slow_redis = fakeredis.FakeAsyncRedis(server=server)
+    slow = slow_hub.subscribe(slow_redis, LiveGrid(ALL_ROLES, 60, origin, 28, 0, 24))
+    hubs.append((slow_hub, slow_redis))
+
+    started = time.perf_counter()
+    await asyncio.wait_for(asyncio.gather(*(dashboard.ready.wait() for dashboard in dashboards), slow_hub.ready.wait()), 30)
+    print(f"{len(dashboards)} clients on {args.workers} workers ready in {(time.perf_counter() - started) * 1000:.0f} ms, {len({d.grid for d in dashboards})} distinct grids")
+
+    transport = httpx.ASGITransport(app=app)
+    admin = httpx.AsyncClient(transport=transport, base_url="http://app")
+
+    # Every third client loads between writes instead, while the last write's events are still being delivered.
+    late = [dashboard for index, dashboard in enumerate(dashboards) if index % 3 == 2]
+    for dashboard in dashboards:
+        if dashboard not in late:
+            await load_grid(admin, admin_headers, dashboard)
+    rng.shuffle(late)
+    late_per_write = -(-len(late) // args.writes)
+
+    # Counts what the app publishes, so delivery can be awaited.
+    published = 0
+    publish = redis.publish
+
+    async def counted_publish(channel, message):
+        nonlocal published
+        published += 1
+        return await publish(channel, message)
+
+    redis.publish = counted_publish
+
+    async def settle():
+        deadline = time.perf_counter() + 10
+        while time.perf_counter() < deadline:
+            caught_up = all(hub.stats.messages >= published for hub, _ in hubs)
+            # Every frame handed to a queue has been read and applied (the slow hub's are never read).
+            handled = sum(dashboard.frames for dashboard in dashboards) == sum(hub.stats.delivered for hub, _ in hubs[:-1])
+            if caught_up and handled:
+                return
+            await asyncio.sleep(0.001)
+        raise TimeoutError(f"{published} messages published, hubs saw {[hub.stats.messages for hub, _ in hubs]}")
+
+    members = [profile for profile in tables["profiles"] if profile["id"] != ADMIN_ID]
+    latencies = []
+    async with httpx.AsyncClient(transport=transport, base_url="http://app") as client:
+        for index in range(args.writes):
+            member = rng.choice(members)
+            headers = {"Authorization": f"Bearer {token(member['id'], member['email'])}"}
+            kind = index % 4
+            started = time.perf_counter()
+            if kind == 0:
+                events = [random_event(rng, origin, index * 10 + n) for n in range(rng.randint(0, 4))]
+                result = await client.post("/schedule/", json=events, headers=headers)
+            elif kind == 1:
+                current = [event for event in tables["events"] if event["user_id"] == member["id"]]
+                changes = {
+                    "added": [random_event(rng, origin, index * 10)],
+                    "removed": [event["calendar_id"] for event in current[:1]]
+                }
+                result = await client.patch("/schedule/", json=changes, headers=headers)
+            elif kind == 2:
+                roles = rng.sample(["Developer", "Volunteer", "President", "Events", "Media"], rng.randint(1, 3))
+                result = await client.post("/roles/", json={"roles": roles}, headers=headers)
+            else:
+                cutoff = datetime.combine(origin + timedelta(days=rng.randint(0, 20)), datetime.min.time()).isoformat()
+                rows = await delete_batch(supabase, cutoff, rng.randint(1, 20), False)
+                if rows:
+                    await forget_events(redis, supabase, rows)
+                result = None
+
+            if result is not None and result.status_code != 200:
+                failures.append(f"write {index} returned {result.status_code}: {result.text}")
+            for dashboard in late[index * late_per_write:(index + 1) * late_per_write]:
+                await load_grid(admin, admin_headers, dashboard)
+            await settle()
+            latencies.append(time.perf_counter() - started)
+
+    print(f"{args.writes} writes, {published} change messages, write to every client updated p50 {percentile(latencies, 0.5) * 1000:.1f} ms, max {max(latencies) * 1000:.1f} ms")
+
+    mismatched = []
+    for dashboard in dashboards:
+        max_people, counts = reference(tables, dashboard.grid)
+        if dashboard.max_people != max_people or not np.array_equal(dashboard.counts, counts):
+            mismatched.append(dashboard.grid)
+    frames = sum(dashboard.frames for dashboard in dashboards)
+    dropped = sum(dashboard.dropped for dashboard in dashboards)
+    check(f"{len(dashboards)} client grids ({len(late)} loaded between writes) match a full recompute after {frames} events, {dropped} dropped as already loaded", not mismatched, failures)
+    check("clients loaded between writes dropped the events their grid already had", dropped > 0, failures)
+    check("nobody but the slow client was told to resync", all(dashboard.resync is None for dashboard in dashboards), failures)
+    check(f"slow client cut off after {slow_hub.queue_size} queued events", slow.ended == "behind" and slow_hub.stats.overflowed == 1, failures)
+
+    for dashboard, response, _, _ in endpoint_clients:
+        check(f"/admin/live ({dashboard.grid.role}, {dashboard.grid.slot_minutes} min) streams uncompressed event-stream", response.get("status") == 200 and "content-encoding" not in response["headers"] and response["headers"]["content-type"].startswith("text/event-stream"), failures)
+
+    # What each update costs a client compared with reloading its grid.
+    for grid in grids[:2]:
+        received = [dashboard for dashboard in dashboards if dashboard.grid == grid]
+        frame_bytes = sum(dashboard.frame_bytes for dashboard in received) / max(sum(dashboard.frames for dashboard in received), 1)
+        print(f"  {grid.role} {grid.slot_minutes} min x {grid.days} days, {grid.first_hour}-{grid.last_hour}h: {frame_bytes:.0f} bytes per event vs {len(json.dumps(reference(tables, grid)[1].tolist()))} bytes of counts per reload")
+
+    # Connection cap: the app's hub is full, so one more stream is turned away.
+    app_hub.max_connections = app_hub.stats.connections
+    async with httpx.AsyncClient(transport=transport, base_url="http://app") as client:
+        rejected = await client.get("/admin/live", headers=stream_headers)
+    check(f"stream over the cap of {app_hub.max_connections} gets 503", rejected.status_code == 503 and app_hub.stats.rejected == 1, failures)
+
+    # Disconnects release their connections and the last one closes the worker's Redis subscription.
+    for _, _, disconnect, task in endpoint_clients:
+        disconnect.set()
+        await asyncio.wait_for(task, 5)
+    for reader in readers:
+        reader.cancel()
+    await asyncio.gather(*readers, return_exceptions=True)
+    await asyncio.sleep(0.05)
+    check("every disconnect freed its slot", app_hub.stats.connections == 0 and all(hub.stats.connections == 0 for hub, _ in hubs[1:-1]), failures)
+    check("the last disconnect closed the worker's subscription", app_hub.listener is None, failures)
+
+    await slow_hub.close()
+    await admin.aclose()
+    app.dependency_overrides = {}
+    return failures
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--members", type=int, default=500)
+    parser.add_argument("--clients", type=int, default=600)
+    parser.add_argument("--workers", type=int, default=3)
+    parser.add_argument("--writes", type=int, default=60)
+    args = parser.parse_args()
+
+    configure_environment()
+
+    # One loop for everything: fakeredis and the app's clients are bound to the loop they were first used on.
+    failures = asyncio.run(run(args))
+    for failure in failures:
+        print(f"  {failure}")
+    print("ok" if not failures else f"{len(failures)} FAILURES")
+    raise SystemExit(1 if failures else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+Checks that the incrementally maintained occupancy store (db/occupancy_store.py) matches a full recomputation
+under random sequences of schedule replacements, role changes and expired event cleanups, and times reads.
+Needs a scratch Redis (its occupancy:* keys are overwritten), or fakeredis when no --redis-url is given.
+
+Run from the backend directory:
+    python -m benchmarks.check_occupancy_store --redis-url redis://localhost:6379/15
+"""
+import argparse
+import asyncio
+import random
+import time
+from datetime import date, datetime, timedelta
+import numpy as np
+
+from benchmarks.check_availability_rpc import ROLES, python_occupancy, seed
+from db.availability_cache import ALL_ROLES
+from db.occupancy_store import OccupancyStore, as_stored
+
+WINDOWS = [(0, 28, 60), (3, 10, 15), (8, 1, 5), (-7, 56, 30)]
+
+def random_payload(rng: random.Random, user_id: str, origin: date, count: int):
+    # Same shape as the rows set_schedule sends to replace_user_events, with a UTC offset on some dates.
+    _, _, events = seed(1, count, origin, rng.getrandbits(32))
+    for event in events:
+        event["user_id"] = user_id
+        if event["start_date"] and rng.random() < 0.5:
+            event["start_date"] += "-08:00"
+            event["end_date"] += "-08:00"
+    return events
+
+async def compare(store, profiles, user_roles, events, origin):
+    failures, reads = 0, []
+    for role in [ALL_ROLES, "Developer", "Media"]:
+        for offset, days, slot_minutes in WINDOWS:
+            start = origin + timedelta(days=offset)
+
+            started = time.perf_counter()
+            store_max, store_grid = await store.get(role, start, days, slot_minutes)
+            reads.append(time.perf_counter() - started)
+
+            window_start = datetime.combine(start, datetime.min.time())
+            full_max, full_grid = python_occupancy(profiles, user_roles, events, None if role == ALL_ROLES else role, window_start, days, slot_minutes)
+            failures += not (store_max == full_max and np.array_equal(store_grid, full_grid))
+    return failures, reads
+
+async def run(redis, members: int, edits: int, seed_value: int):
+    rng = random.Random(seed_value)
+    origin = date(2025, 3, 2)
+    profiles, user_roles, events = seed(members, 6, origin, seed_value)
+    store = OccupancyStore(redis)
+
+    await store.rebuild(profiles, user_roles, events)
+
+    failures, reads = 0, []
+    roles_by_user = {row["user_id"]: row for row in user_roles}
+
+    for step in range(1, edits + 1):
+        profile = rng.choice(profiles)
+        user_id = profile["id"]
+        roles = set(roles_by_user[user_id]["roles"]) | {ALL_ROLES}
+        kind = rng.random()
+
+        if kind < 0.6:
+            old = [event for event in events if event["user_id"] == user_id]
+            payload = random_payload(rng, user_id, origin, rng.randint(0, 8))
+            await store.apply(roles, removed=old, added=payload, people=0 if profile["verified"] else 1)
+            events = [event for event in events if event["user_id"] != user_id] + [as_stored(event) for event in payload]
+            profile["verified"] = True
+
+        elif kind < 0.9:
+            old_roles = set(roles_by_user[user_id]["roles"])
+            new_roles = set(rng.sample(ROLES, rng.randint(1, 3)))
+            user_events = [event for event in events if event["user_id"] == user_id]
+            verified = 1 if profile["verified"] else 0
+            await store.apply(old_roles - new_roles, removed=user_events, people=-verified)
+            await store.apply(new_roles - old_roles, added=user_events, people=verified)
+            roles_by_user[user_id]["roles"] = sorted(new_roles)
+
+        else:
+            cutoff = datetime.combine(origin + timedelta(days=rng.randint(0, 21)), datetime.min.time())
+            expired = [event for event in events if event["start_date"] and datetime.fromisoformat(event["end_date"]) < cutoff]
+            for expired_user in {event["user_id"] for event in expired}:
+                user_roles_set = set(roles_by_user[expired_user]["roles"]) | {ALL_ROLES}
+                await store.apply(user_roles_set, removed=[event for event in expired if event["user_id"] == expired_user])
+            events = [event for event in events if event not in expired]
+
+        if step % 25 == 0 or step == edits:
+            step_failures, step_reads = await compare(store, profiles, user_roles, events, origin)
+            failures += step_failures
+            reads += step_reads
+            print(f"after {step:>4} edits: {'ok' if not step_failures else f'{step_failures} MISMATCHES'}")
+
+    # A rebuild from the final rows must land on exactly what the incremental updates produced.
+    incremental = {key: await redis.get(key) for key in [key async for key in redis.scan_iter(match="occupancy:*")]}
+    await store.rebuild(profiles, user_roles, events)
+    rebuilt_failures, _ = await compare(store, profiles, user_roles, events, origin)
+    failures += rebuilt_failures
+    print(f"after rebuild: {'ok' if not rebuilt_failures else f'{rebuilt_failures} MISMATCHES'} ({len(incremental)} keys before)")
+
+    print(f"store reads: median {np.median(reads) * 1000:.2f} ms, max {max(reads) * 1000:.2f} ms over {len(reads)} reads")
+    return failures
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--redis-url")
+    parser.add_argument("--members", type=int, default=200)
+    parser.add_argument("--edits", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if args.redis_url:
+        from redis.asyncio import Redis
+        redis = Redis.from_url(args.redis_url)
+    else:
+        import fakeredis
+        redis = fakeredis.FakeAsyncRedis()
+
+    failures = asyncio.run(run(redis, args.members, args.edits, args.seed))
+    raise SystemExit(1 if failures else 0)
+
+if __name__ == "__main__":
+    main()
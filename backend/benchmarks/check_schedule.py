@@ -0,0 +1,110 @@
+"""
+Checks that the ETag GET /schedule/ issues guards PATCH against lost updates: when another device's write lands while
+the GET is reading, or right after it, a PATCH sent with that ETag as If-Match gets 412 and the other write survives.
+A PATCH with the ETag of a GET that saw every write goes through. Runs the real handlers against the in-memory
+Supabase and fakeredis (not part of requirements.txt).
+
+Run from the backend directory:
+    python -m benchmarks.check_schedule
+"""
+import asyncio
+import time
+
+from benchmarks.bench_suite import JWT_SECRET, configure_environment, seed_club
+
+def check(label: str, condition: bool, failures: list):
+    print(f"  {'ok' if condition else 'FAIL'}  {label}")
+    if not condition:
+        failures.append(label)
+
+def permanent_event(calendar_id: str, hour: int) -> dict:
+    return {"id": calendar_id, "title": "Busy", "color": "green", "type": "Permanent", "daysOfWeek": [1], "startTime": f"{hour:02d}:00:00", "endTime": f"{hour + 1:02d}:00:00"}
+
+class ConcurrentWriter:
+    """
+    Wraps the fake client so another device's patch lands right after the GET's read of `table`, once armed.
+    """
+    def __init__(self, supabase, user_id: str):
+        self.supabase = supabase
+        self.user_id = user_id
+        self.armed = None
+        self.writes = 0
+        self.table = supabase.table
+        supabase.table = self.wrap
+
+    def wrap(self, name: str):
+        query = self.table(name)
+        execute = query.execute
+
+        async def execute_then_write():
+            result = await execute()
+            if self.armed == name and query.action == "select":
+                from benchmarks.fake_supabase import patch_user_events
+
+                self.armed = None
+                self.writes += 1
+                row = {"user_id": self.user_id, "calendar_id": f"other-device-{self.writes}", "event_type": "Permanent", "start_time": "08:00:00", "end_time": "09:00:00", "day_of_week": 2}
+                patch_user_events(self.supabase.tables, self.user_id, [row], [])
+            return result
+
+        query.execute = execute_then_write
+        return query
+
+async def run() -> list:
+    import fakeredis
+    import httpx
+    from jose import jwt
+    from benchmarks.fake_supabase import FakeSupabase
+    from db.redis_client import get_redis
+    from db.supabase_client import get_supabase
+    from main import app
+    from utils.calendar import current_week
+
+    failures = []
+    tables = seed_club(20, 3, current_week())
+    supabase = FakeSupabase(tables)
+    redis = fakeredis.FakeAsyncRedis()
+
+    async def override_supabase():
+        return supabase
+
+    async def override_redis():
+        return redis
+
+    app.dependency_overrides = {get_supabase: override_supabase, get_redis: override_redis}
+
+    member = next(profile for profile in tables["profiles"] if profile["verified"] and profile["email"] != "admin@example.com")
+    token = jwt.encode({"sub": member["id"], "email": member["email"], "aud": "authenticated", "exp": int(time.time()) + 3600}, JWT_SECRET, algorithm="HS256")
+    writer = ConcurrentWriter(supabase, member["id"])
+
+    def other_device_events() -> int:
+        return sum(1 for event in tables["events"] if event["user_id"] == member["id"] and event["calendar_id"].startswith("other-device-"))
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://app", headers={"Authorization": f"Bearer {token}"}) as client:
+        # "profiles" lands the write between the version read and the events read, "events" after both.
+        for table, label in (("profiles", "between the GET's reads"), ("events", "right after the GET")):
+            writer.armed = table
+            loaded = await client.get("/schedule/")
+            before = other_device_events()
+            patched = await client.patch("/schedule/", json={"added": [permanent_event(f"edit-{table}", 12)]}, headers={"If-Match": loaded.headers["etag"]})
+            check(f"a write landing {label}: PATCH with the GET's ETag gets 412", writer.armed is None and patched.status_code == 412, failures)
+            check(f"a write landing {label}: the other device's write survives", other_device_events() == before, failures)
+
+        loaded = await client.get("/schedule/")
+        patched = await client.patch("/schedule/", json={"added": [permanent_event("edit-current", 12)]}, headers={"If-Match": loaded.headers["etag"]})
+        check("PATCH with the ETag of an up-to-date GET goes through", patched.status_code == 200, failures)
+        check("no other device's write was lost", other_device_events() == writer.writes, failures)
+
+    app.dependency_overrides = {}
+    return failures
+
+def main():
+    configure_environment()
+
+    # One loop for everything: fakeredis and the app's clients are bound to the loop they were first used on.
+    failures = asyncio.run(run())
+    print("ok" if not failures else f"{len(failures)} FAILURES")
+    raise SystemExit(1 if failures else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Checks that several LeaderScheduler instances sharing one Redis fire a job once per interval, that a crashed
+leader is replaced within the lock TTL, and that the new leader catches up the run missed in between.
+Uses fakeredis (with lupa for the lock's Lua scripts) and runs entirely in process.
+
+Run from the backend directory:
+    python -m benchmarks.check_scheduler
+"""
+import argparse
+import asyncio
+import contextlib
+import time
+
+from db.scheduler import LeaderScheduler
+
+runs = []
+
+async def tick():
+    runs.append(time.monotonic())
+
+def add_tick_job(interval: float):
+    def configure(scheduler):
+        if scheduler.get_job("tick") is None:
+            scheduler.add_job("benchmarks.check_scheduler:tick", "interval", seconds=interval, id="tick")
+    return configure
+
+async def main_async(instances: int, interval: float, ttl: int):
+    import fakeredis
+    from apscheduler.jobstores.redis import RedisJobStore
+
+    # The job is stored by reference, so it runs in the imported module rather than in __main__.
+    from benchmarks.check_scheduler import runs
+
+    server = fakeredis.FakeServer()
+
+    def jobstore():
+        store = RedisJobStore(jobs_key="scheduler:jobs", run_times_key="scheduler:run_times")
+        store.redis = fakeredis.FakeRedis(server=server)
+        return store
+
+    configure = add_tick_job(interval)
+    leaders = [LeaderScheduler(fakeredis.FakeAsyncRedis(server=server), configure, jobstore, ttl=ttl, name=f"instance-{i}") for i in range(instances)]
+    tasks = [asyncio.create_task(leader.run()) for leader in leaders]
+    failures = 0
+
+    await asyncio.sleep(interval * 5 + 0.5)
+    elected = [leader for leader in leaders if leader.is_leader]
+    print(f"{instances} instances, {len(elected)} leader(s), {len(runs)} runs in {interval * 5:g}s of {interval:g}s ticks")
+    failures += len(elected) != 1 or not 4 <= len(runs) <= 6
+
+    # Crash the leader: stop its loop and scheduler without releasing the lock, as a killed process would.
+    crashed = elected[0]
+    tasks[leaders.index(crashed)].cancel()
+    with contextlib.suppress(asyncio.CancelledError):
+        await tasks[leaders.index(crashed)]
+    crashed._stop_scheduler()
+    crashed_at, before = time.monotonic(), len(runs)
+
+    await asyncio.sleep(ttl + ttl / 3 + 0.5)
+    elected = [leader for leader in leaders if leader.is_leader]
+    first_after = next((at for at in runs[before:]), None)
+    print(f"after crash: {len(elected)} leader ({elected[0].name if elected else '-'}), first run {first_after - crashed_at if first_after else float('nan'):.1f}s after the crash, {len(runs) - before} runs")
+    failures += len(elected) != 1 or elected[0] is crashed or first_after is None
+
+    # Gaps between runs must never drop below the interval, i.e. no instance ever fired alongside another.
+    gaps = [later - earlier for earlier, later in zip(runs, runs[1:])]
+    overlapping = sum(gap < interval * 0.5 for gap in gaps)
+    print(f"overlapping runs: {overlapping}")
+    failures += overlapping
+
+    for leader, task in zip(leaders, tasks):
+        if leader is not crashed:
+            await leader.stop()
+            await task
+
+    return failures
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--instances", type=int, default=4)
+    parser.add_argument("--interval", type=float, default=1.0)
+    parser.add_argument("--ttl", type=int, default=3)
+    args = parser.parse_args()
+
+    failures = asyncio.run(main_async(args.instances, args.interval, args.ttl))
+    print("ok" if not failures else f"{failures} FAILURES")
+    raise SystemExit(1 if failures else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,390 @@
+"""
+In-memory stand-in for the async Supabase client, for benchmarks that swap `get_supabase` with a dependency override.
+Tables are lists of dicts; queries support the subset of the PostgREST builder the routes use (column and embedded
+selects, comparison and `or_` filters, order/limit/range, single, insert/update/delete) and RPCs are plain Python
+functions. Every call waits `latency` seconds first, standing in for the network round trip.
+"""
+import asyncio
+import bisect
+import re
+import uuid
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from typing import Callable, Dict, List, Optional
+from jose import jwt
+
+from utils.availability import build_occupancy
+
+DATE_PATTERN = re.compile(r"\d{4}-\d{2}-\d{2}")
+
+class FakeResponse:
+    def __init__(self, data, count: Optional[int] = None):
+        self.data = data
+        self.count = count
+
+def _split_top_level(expression: str) -> List[str]:
+    parts, depth, current = [], 0, ""
+    for char in expression:
+        if char == "," and depth == 0:
+            parts.append(current.strip())
+            current = ""
+            continue
+        depth += char == "("
+        depth -= char == ")"
+        current += char
+    if current.strip():
+        parts.append(current.strip())
+    return parts
+
+def _comparable(left, right):
+    # Timestamps are compared as wall-clock datetimes, the way TIMESTAMP columns compare in Postgres.
+    if isinstance(left, str) and isinstance(right, str) and DATE_PATTERN.match(left) and DATE_PATTERN.match(right):
+        try:
+            return datetime.fromisoformat(left).replace(tzinfo=None), datetime.fromisoformat(right).replace(tzinfo=None)
+        except ValueError:
+            pass
+    if isinstance(left, bool) and isinstance(right, str):
+        return left, right.lower() == "true"
+    if isinstance(left, (int, float)) and isinstance(right, str):
+        return left, type(left)(right)
+    return left, right
+
+def _matches(row: dict, column: str, operator: str, value) -> bool:
+    if "." in column:
+        raise NotImplementedError(f"Filters on embedded resources ({column}) are not supported by the fake.")
+
+    actual = row.get(column)
+    if operator == "is":
+        return actual is None if value in (None, "null") else actual == (value in (True, "true"))
+    if operator == "in":
+        return actual in value
+    if operator == "cs":
+        wanted = value.strip("{}").replace('"', "").split(",") if isinstance(value, str) else value
+        return actual is not None and all(item in actual for item in wanted)
+    if actual is None:
+        return False
+
+    actual, value = _comparable(actual, value)
+    return {
+        "eq": actual == value, "neq": actual != value,
+        "lt": actual < value, "lte": actual <= value,
+        "gt": actual > value, "gte": actual >= value
+    }[operator]
+
+def _parse_condition(term: str) -> Callable[[dict], bool]:
+    match = re.fullmatch(r"(and|or)\((.*)\)", term)
+    if match:
+        conditions = [_parse_condition(part) for part in _split_top_level(match.group(2))]
+        combine = all if match.group(1) == "and" else any
+        return lambda row: combine(condition(row) for condition in conditions)
+
+    column, operator, value = term.split(".", 2)
+    value = value.strip("'\"")
+    return lambda row: _matches(row, column, operator, value)
+
+class FakeQuery:
+    def __init__(self, client: "FakeSupabase", table: str):
+        self.client = client
+        self.table = table
+        self.action = "select"
+        self.columns = "*"
+        self.payload = None
+        self.count_method = None
+        self.returning = "representation"
+        self.conditions: List[Callable[[dict], bool]] = []
+        self.lookups: List[tuple] = []
+        self.ordering: List[tuple] = []
+        self.offset, self.limit_to = 0, None
+        self.after = None
+        self.single_row = False
+        self.selection = None
+
+    def select(self, *columns: str, count: Optional[str] = None, head: Optional[bool] = None):
+        self.columns = ",".join(columns) or "*"
+        self.selection = None
+        self.count_method = count
+        return self
+
+    def insert(self, rows, **kwargs):
+        self.action, self.payload = "insert", rows if isinstance(rows, list) else [rows]
+        return self
+
+    def update(self, values: dict, **kwargs):
+        self.action, self.payload = "update", values
+        return self
+
+    def delete(self, count: Optional[str] = None, returning: str = "representation"):
+        self.action, self.count_method, self.returning = "delete", count, str(getattr(returning, "value", returning))
+        return self
+
+    def filter(self, column: str, operator: str, value):
+        # Plain equality filters are served from an index, so lookups by user stay cheap on large seeds.
+        if operator == "eq" and "." not in column:
+            self.lookups.append((column, value))
+        else:
+            if operator == "gt" and "." not in column:
+                self.after = (column, value)
+            self.conditions.append(lambda row: _matches(row, column, operator, value))
+        return self
+
+    def eq(self, column, value): return self.filter(column, "eq", value)
+
+    def neq(self, column, value): return self.filter(column, "neq", value)
+    def lt(self, column, value): return self.filter(column, "lt", value)
+    def lte(self, column, value): return self.filter(column, "lte", value)
+    def gt(self, column, value): return self.filter(column, "gt", value)
+    def gte(self, column, value): return self.filter(column, "gte", value)
+    def in_(self, column, values): return self.filter(column, "in", list(values))
+    def is_(self, column, value): return self.filter(column, "is", value)
+
+    def or_(self, expression: str):
+        conditions = [_parse_condition(term) for term in _split_top_level(expression)]
+        self.conditions.append(lambda row: any(condition(row) for condition in conditions))
+        return self
+
+    def order(self, column: str, desc: bool = False):
+        self.ordering.append((column, desc))
+        return self
+
+    def limit(self, count: int):
+        self.limit_to = count
+        return self
+
+    def range(self, start: int, end: int):
+        self.offset, self.limit_to = start, end - start + 1
+        return self
+
+    def single(self):
+        self.single_row = True
+        return self
+
+    def _parse_selection(self) -> List[tuple]:
+        """
+        The select list as (column, None) or (embedded table, query over it) pairs, parsed once per query.
+        """
+        items = []
+        for item in _split_top_level(self.columns):
+            match = re.fullmatch(r"(\w+)(?:!\w+)?\((.*)\)", item)
+            items.append((match.group(1), FakeQuery(self.client, match.group(1)).select(match.group(2))) if match else (item, None))
+        return items
+
+    def _project(self, row: dict) -> dict:
+        if self.selection is None:
+            self.selection = self._parse_selection()
+
+        projected = {}
+        for item, child in self.selection:
+            if child is None:
+                projected.update(row if item == "*" else {item: row.get(item)})
+                continue
+
+            embedded = item
+            rows = self.client.tables.get(embedded, [])
+            # One-to-many when the embedded table points back at this row, many-to-one when this row points at it.
+            if "id" in row and rows and "user_id" in rows[0]:
+                projected[embedded] = [child._project(other) for other in self.client.index(embedded, "user_id").get(row["id"], [])]
+            else:
+                owners = self.client.index(embedded, "id").get(row.get("user_id"), [])
+                projected[embedded] = child._project(owners[0]) if owners else None
+        return projected
+
+    def _keyset_scan(self, conditions: List[Callable[[dict], bool]]) -> Optional[List[dict]]:
+        """
+        Keyset pages (ordered by one column ascending, after a value, with a limit) read the table's sorted copy from
+        the bound on and stop at the limit, as an index range scan would, instead of filtering and sorting every row.
+        None when the query isn't one.
+        """
+        if self.limit_to is None or self.count_method or len(self.ordering) != 1 or self.ordering[0][1]:
+            return None
+
+        column = self.ordering[0][0]
+        ordered = self.client.sorted_index(self.table, column)
+        if ordered is None:
+            return None
+
+        keys, rows = ordered
+        position = bisect.bisect_right(keys, self.after[1]) if self.after and self.after[0] == column else 0
+        wanted = self.offset + self.limit_to
+        selected = []
+        while position < len(rows) and len(selected) < wanted:
+            if all(condition(rows[position]) for condition in conditions):
+                selected.append(rows[position])
+            position += 1
+        return selected
+
+    async def execute(self) -> FakeResponse:
+        await asyncio.sleep(self.client.latency)
+        rows = self.client.tables.setdefault(self.table, [])
+
+        if self.action == "insert":
+            self.client.version += 1
+            rows.extend(dict(row) for row in self.payload)
+            return FakeResponse([dict(row) for row in self.payload])
+
+        candidates = rows
+        conditions = list(self.conditions)
+        if self.lookups:
+            column, value = self.lookups[0]
+            candidates = self.client.index(self.table, column).get(value, [])
+            conditions += [lambda row, column=column, value=value: _matches(row, column, "eq", value) for column, value in self.lookups[1:]]
+        ordered = self._keyset_scan(conditions) if self.action == "select" and not self.lookups else None
+        selected = ordered if ordered is not None else [row for row in candidates if all(condition(row) for condition in conditions)]
+
+        if self.action != "select":
+            self.client.version += 1
+
+        if self.action == "update":
+            for row in selected:
+                row.update(self.payload)
+            return FakeResponse([dict(row) for row in selected])
+
+        if self.action == "delete":
+            removed = {id(row) for row in selected}
+            rows[:] = [row for row in rows if id(row) not in removed]
+            data = [] if self.returning == "minimal" else selected
+            return FakeResponse(data, len(selected) if self.count_method else None)
+
+        for column, desc in reversed(self.ordering):
+            selected.sort(key=lambda row: (row.get(column) is None, row.get(column) or ""), reverse=desc)
+
+        count = len(selected) if self.count_method else None
+        end = None if self.limit_to is None else self.offset + self.limit_to
+        data = [self._project(row) for row in selected[self.offset:end]]
+
+        if self.single_row:
+            if len(data) != 1:
+                raise Exception(f"JSON object requested, multiple (or no) rows returned ({len(data)})")
+            return FakeResponse(data[0], count)
+
+        return FakeResponse(data, count)
+
+class FakeRpc:
+    def __init__(self, client: "FakeSupabase", function: Callable, params: dict):
+        self.client = client
+        self.function = function
+        self.params = params
+
+    async def execute(self) -> FakeResponse:
+        await asyncio.sleep(self.client.latency)
+        if self.function not in PURE_RPCS:
+            self.client.version += 1
+            return FakeResponse(self.function(self.client.tables, **self.params))
+
+        # Read-only functions stand in for work done inside Postgres, so their cost is not charged to the app:
+        # results are memoized until the next write.
+        key = (self.function.__name__, tuple(sorted(self.params.items())), self.client.version)
+        if key not in self.client.memo:
+            self.client.memo[key] = self.function(self.client.tables, **self.params)
+        return FakeResponse(self.client.memo[key])
+
+class FakeAuth:
+    def __init__(self, client: "FakeSupabase"):
+        self.client = client
+
+    async def get_user(self, token: str):
+        await asyncio.sleep(self.client.latency)
+        claims = jwt.get_unverified_claims(token)
+        return SimpleNamespace(user=SimpleNamespace(id=claims["sub"], email=claims.get("email")))
+
+def new_event(event: dict, **values) -> dict:
+    # Inserted rows get their primary key the way the events.id default would give them one.
+    return dict(event, id=str(uuid.uuid4()), **values)
+
+def replace_user_events(tables: Dict[str, List[dict]], _user_id: str, _event_data: List[dict]):
+    # Same contract as db/replace_user_events.sql: returns the deleted rows.
+    events = tables.get("events", [])
+    replaced = [event for event in events if event["user_id"] == _user_id]
+    tables["events"] = [event for event in events if event["user_id"] != _user_id] + [new_event(event) for event in _event_data]
+    for profile in tables.get("profiles", []):
+        if profile["id"] == _user_id:
+            profile["schedule_version"] = profile.get("schedule_version", 0) + 1
+    return replaced
+
+def patch_user_events(tables: Dict[str, List[dict]], _user_id: str, _upserts: List[dict], _removed: List[str], _expected_version: Optional[int] = None):
+    # Same contract as db/patch_user_events.sql.
+    profile = next((profile for profile in tables.get("profiles", []) if profile["id"] == _user_id), None)
+    if profile is None:
+        raise Exception("User profile not found.")
+
+    version = profile.get("schedule_version", 0)
+    if _expected_version is not None and _expected_version != version:
+        return {"conflict": True, "version": version}
+
+    touched = set(_removed) | {event["calendar_id"] for event in _upserts}
+    events = tables.get("events", [])
+    replaced = [event for event in events if event["user_id"] == _user_id and event["calendar_id"] in touched]
+    tables["events"] = [event for event in events if not (event["user_id"] == _user_id and event["calendar_id"] in touched)] + [new_event(event, user_id=_user_id) for event in _upserts]
+
+    was_verified = profile["verified"]
+    profile.update(verified=True, schedule_version=version + 1)
+    roles = sorted({role for row in tables.get("user_roles", []) if row["user_id"] == _user_id for role in row["roles"]})
+
+    return {"conflict": False, "version": version + 1, "was_verified": was_verified, "roles": roles, "replaced": replaced}
+
+def get_availability_counts(tables: Dict[str, List[dict]], _role: Optional[str], _window_start: str, _days: int, _slot_minutes: int):
+    # Same answer as db/get_availability_counts.sql, computed with the Python engine.
+    window_start = datetime.fromisoformat(_window_start)
+    window_end = window_start + timedelta(days=_days)
+
+    roles_by_user = {}
+    for row in tables.get("user_roles", []):
+        roles_by_user.setdefault(row["user_id"], set()).update(row["roles"])
+
+    def has_role(user_id: str) -> bool:
+        return _role is None or _role in roles_by_user.get(user_id, ())
+
+    events = [
+        event for event in tables.get("events", [])
+        if has_role(event["user_id"]) and (
+            event["event_type"] == "Permanent"
+            or (datetime.fromisoformat(event["start_date"]) < window_end and datetime.fromisoformat(event["end_date"]) > window_start)
+        )
+    ]
+    max_people = sum(1 for profile in tables.get("profiles", []) if profile["verified"] and has_role(profile["id"]))
+
+    occupancy = build_occupancy(events, window_start, _days, _slot_minutes).ravel()
+    slots = [[int(index), int(occupancy[index])] for index in occupancy.nonzero()[0]]
+    return {"max_people": max_people, "slots": slots}
+
+RPCS = {"get_availability_counts": get_availability_counts, "replace_user_events": replace_user_events, "patch_user_events": patch_user_events}
+PURE_RPCS = {get_availability_counts}
+
+class FakeSupabase:
+    def __init__(self, tables: Dict[str, List[dict]], latency: float = 0.0):
+        self.tables = tables
+        self.latency = latency
+        self.auth = FakeAuth(self)
+        self.version = 0
+        self.memo = {}
+        self._indexes = {}
+
+    def index(self, table: str, column: str) -> Dict[object, List[dict]]:
+        key = (table, column)
+        cached = self._indexes.get(key)
+        if cached is None or cached[0] != self.version:
+            index = {}
+            for row in self.tables.get(table, []):
+                index.setdefault(row.get(column), []).append(row)
+            cached = self._indexes[key] = (self.version, index)
+        return cached[1]
+
+    def sorted_index(self, table: str, column: str) -> Optional[tuple]:
+        """
+        The table's rows sorted by `column` alongside their keys, or None when the column has nulls.
+        """
+        key = (table, column, "sorted")
+        cached = self._indexes.get(key)
+        if cached is None or cached[0] != self.version:
+            rows = self.tables.get(table, [])
+            ordered = None
+            if all(row.get(column) is not None for row in rows):
+                rows = sorted(rows, key=lambda row: row[column])
+                ordered = ([row[column] for row in rows], rows)
+            cached = self._indexes[key] = (self.version, ordered)
+        return cached[1]
+
+    def table(self, name: str) -> FakeQuery:
+        return FakeQuery(self, name)
+
+    def rpc(self, function: str, params: dict) -> FakeRpc:
+        return FakeRpc(self, RPCS[function], params)
@@ -0,0 +1,92 @@
+"""
+A minimal PostgREST/GoTrue stand-in for load tests. It answers the endpoints the backend calls after a fixed delay,
+so throughput numbers reflect how the app overlaps network waits rather than real database work.
+"""
+import asyncio
+import threading
+import time
+import uuid
+import uvicorn
+from jose import jwt
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+USER_ID = str(uuid.UUID(int=1))
+
+def stub_user() -> dict:
+    return {
+        "id": USER_ID,
+        "aud": "authenticated",
+        "role": "authenticated",
+        "email": "member@example.com",
+        "app_metadata": {},
+        "user_metadata": {},
+        "created_at": "2025-01-01T00:00:00Z"
+    }
+
+def stub_tables(events: int) -> dict:
+    rows = []
+    for index in range(events):
+        rows.append({
+            "id": str(uuid.UUID(int=index + 2)),
+            "user_id": USER_ID,
+            "calendar_id": f"event-{index}",
+            "start_date": None,
+            "end_date": None,
+            "start_time": f"{9 + index % 8:02d}:00:00",
+            "end_time": f"{10 + index % 8:02d}:00:00",
+            "day_of_week": index % 7,
+            "event_type": "Permanent"
+        })
+
+    profile = {"id": USER_ID, "name": "Member", "email": "member@example.com", "verified": True, "schedule_version": 0, "user_roles": [{"roles": ["Admin", "Developer"]}], "events": []}
+
+    return {"events": rows, "profiles": [profile], "user_roles": [{"user_id": USER_ID, "email": profile["email"], "roles": ["Admin", "Developer"]}]}
+
+def create_stub_app(latency: float = 0.02, events: int = 20) -> Starlette:
+    """
+    Every answered request is counted in `app.state.calls`.
+    """
+    tables = stub_tables(events)
+
+    async def get_user(request: Request):
+        request.app.state.calls += 1
+        await asyncio.sleep(latency)
+        return JSONResponse(stub_user())
+
+    async def token(request: Request):
+        request.app.state.calls += 1
+        await asyncio.sleep(latency)
+        access_token = jwt.encode({"sub": USER_ID, "aud": "authenticated", "exp": int(time.time()) + 3600}, "stub", algorithm="HS256")
+        return JSONResponse({"access_token": access_token, "refresh_token": "stub-refresh", "token_type": "bearer", "expires_in": 3600, "expires_at": int(time.time()) + 3600, "user": stub_user()})
+
+    async def table(request: Request):
+        request.app.state.calls += 1
+        await asyncio.sleep(latency)
+        rows = tables.get(request.path_params["table"], [])
+        if "vnd.pgrst.object" in request.headers.get("accept", ""):
+            return JSONResponse(rows[0] if rows else None)
+        return JSONResponse(rows)
+
+    async def rpc(request: Request):
+        request.app.state.calls += 1
+        await asyncio.sleep(latency)
+        return JSONResponse(None)
+
+    app = Starlette(routes=[
+        Route("/auth/v1/user", get_user),
+        Route("/auth/v1/token", token, methods=["POST"]),
+        Route("/rest/v1/rpc/{function}", rpc, methods=["POST"]),
+        Route("/rest/v1/{table}", table, methods=["GET", "POST", "PATCH", "DELETE"])
+    ])
+    app.state.calls = 0
+    return app
+
+def serve_in_thread(app: Starlette, port: int) -> uvicorn.Server:
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.01)
+    return server
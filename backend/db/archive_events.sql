@@ -0,0 +1,30 @@
+CREATE TABLE IF NOT EXISTS events_archive (
+    id UUID PRIMARY KEY,
+    user_id UUID NOT NULL,
+    calendar_id VARCHAR(255) NOT NULL,
+    start_date TIMESTAMP,
+    end_date TIMESTAMP,
+    start_time TIME,
+    end_time TIME,
+    day_of_week INT,
+    event_type VARCHAR(255) NOT NULL,
+    archived_at TIMESTAMP WITH TIME ZONE DEFAULT TIMEZONE('utc'::text, NOW()) NOT NULL
+);
+
+CREATE OR REPLACE FUNCTION archive_events(_ids UUID[])
+RETURNS INT AS $$
+DECLARE
+    _moved INT;
+BEGIN
+    WITH moved AS (
+        DELETE FROM events WHERE id = ANY(_ids)
+        RETURNING id, user_id, calendar_id, start_date, end_date, start_time, end_time, day_of_week, event_type
+    )
+    INSERT INTO events_archive (id, user_id, calendar_id, start_date, end_date, start_time, end_time, day_of_week, event_type)
+    SELECT * FROM moved
+    ON CONFLICT (id) DO NOTHING;
+
+    GET DIAGNOSTICS _moved = ROW_COUNT;
+    RETURN _moved;
+END;
+$$ LANGUAGE plpgsql;
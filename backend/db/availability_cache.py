@@ -0,0 +1,176 @@
+import logging
+import os
+from datetime import date, datetime
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+import numpy as np
+from redis.asyncio import Redis
+
+from db.versions import VersionStore, availability_version_key, bumped_versions
+from utils.availability import DAYS_PER_WEEK, MINUTES_PER_DAY
+from utils.calendar import weeks_between
+
+logger = logging.getLogger(__name__)
+
+CACHE_TTL = int(os.getenv("AVAILABILITY_CACHE_TTL", "300"))
+KEY_PREFIX = "availability"
+ALL_ROLES = "All"
+
+class CacheStats:
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    def as_dict(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "errors": self.errors,
+            "hitRate": self.hits / lookups if lookups else 0.0
+        }
+
+stats = CacheStats()
+
+def weeks_for_events(events: Iterable[dict]) -> set:
+    """
+    Returns the weeks touched by Temporary events. Permanent events touch every week.
+    """
+    weeks = set()
+    for event in events:
+        if event.get("event_type") != "Temporary" or not event.get("start_date") or not event.get("end_date"):
+            continue
+        start = datetime.fromisoformat(event["start_date"]).date()
+        end = datetime.fromisoformat(event["end_date"]).date()
+        weeks.update(weeks_between(start, end))
+    return weeks
+
+def _generation_key(role: str) -> str:
+    return f"{KEY_PREFIX}:{role}:generation"
+
+def _stamp_key(role: str, week: date) -> str:
+    return f"{KEY_PREFIX}:{role}:stamp:{week.isoformat()}"
+
+def _week_key(role: str, generation: int, week: date, stamp: int, slot_minutes: int) -> str:
+    return f"{KEY_PREFIX}:{role}:v{generation}:{week.isoformat()}:s{stamp}:{slot_minutes}"
+
+def _max_people_key(role: str, generation: int) -> str:
+    return f"{KEY_PREFIX}:{role}:v{generation}:max_people"
+
+class CacheGeneration(NamedTuple):
+    """
+    The counters a read saw: the role's generation and each requested week's stamp.
+    """
+    role: int
+    weeks: Dict[date, int]
+
+class AvailabilityCache:
+    """
+    Read-through cache of occupancy grids, one entry per (role, week, slot size).
+    Each role has a generation counter so every week for a role can be dropped with one INCR, and each week a stamp
+    so one week can be dropped the same way. A miss is filled under the counters it was read at, so a grid computed
+    before an invalidation lands on dead keys instead of the new ones.
+    Invalidating also bumps the role's availability version, which the admin endpoints' ETags and live update frames
+    carry, in the same MULTI as the counters: a reader that sees the new version can't be served a grid from before it.
+    """
+    def __init__(self, redis: Redis, ttl: int = CACHE_TTL):
+        self.redis = redis
+        self.ttl = ttl
+
+    async def get(self, role: str, weeks: List[date], slot_minutes: int) -> Tuple[Optional[CacheGeneration], Optional[int], Dict[date, np.ndarray]]:
+        """
+        Returns the counters read (to hand back to `set`), the cached head count for the role and whichever weeks are cached.
+        """
+        try:
+            counters = await self.redis.mget([_generation_key(role)] + [_stamp_key(role, week) for week in weeks])
+            generation = CacheGeneration(int(counters[0] or 0), {week: int(stamp or 0) for week, stamp in zip(weeks, counters[1:])})
+
+            keys = [_max_people_key(role, generation.role)]
+            keys += [_week_key(role, generation.role, week, generation.weeks[week], slot_minutes) for week in weeks]
+            values = await self.redis.mget(keys)
+        except Exception as e:
+            stats.errors += 1
+            logger.warning(f"Availability cache read failed: {e}")
+            return None, None, {}
+
+        max_people = int(values[0]) if values[0] is not None else None
+        slots_per_week = DAYS_PER_WEEK * MINUTES_PER_DAY // slot_minutes
+
+        cached = {}
+        for week, value in zip(weeks, values[1:]):
+            if value is None or max_people is None:
+                continue
+            cached[week] = np.frombuffer(value, dtype=np.int32).reshape(DAYS_PER_WEEK, slots_per_week // DAYS_PER_WEEK)
+
+        stats.hits += len(cached)
+        stats.misses += len(weeks) - len(cached)
+        return generation, max_people, cached
+
+    async def set(self, role: str, generation: Optional[CacheGeneration], max_people: int, grids: Dict[date, np.ndarray], slot_minutes: int):
+        """
+        Stores grids computed after a `get` that returned `generation`. Nothing is stored when that read failed.
+        """
+        if generation is None:
+            return
+
+        try:
+            pipe = self.redis.pipeline(transaction=False)
+            pipe.set(_max_people_key(role, generation.role), max_people, ex=self.ttl)
+            for week, grid in grids.items():
+                if week in generation.weeks:
+                    pipe.set(_week_key(role, generation.role, week, generation.weeks[week], slot_minutes), np.ascontiguousarray(grid, dtype=np.int32).tobytes(), ex=self.ttl)
+            await pipe.execute()
+        except Exception as e:
+            stats.errors += 1
+            logger.warning(f"Availability cache write failed: {e}")
+
+    async def invalidate_roles(self, roles: Iterable[str]) -> Dict[str, int]:
+        """
+        Drops every cached week for the given roles. Returns each role's new availability version, or nothing when the
+        invalidation failed.
+        """
+        roles = list(set(roles))
+        try:
+            pipe = self.redis.pipeline(transaction=True)
+            for role in roles:
+                pipe.incr(_generation_key(role))
+            VersionStore(self.redis).queue_bump(pipe, (availability_version_key(role) for role in roles))
+            return dict(zip(roles, bumped_versions(await pipe.execute(), len(roles))))
+        except Exception as e:
+            stats.errors += 1
+            logger.warning(f"Availability cache invalidation failed: {e}")
+            return {}
+
+    async def invalidate_weeks(self, roles: Iterable[str], weeks: Iterable[date]) -> Dict[str, int]:
+        """
+        Drops the given weeks, at every slot size, for the given roles. Returns the roles' new versions like
+        `invalidate_roles`.
+        """
+        roles = list(set(roles))
+        weeks = list(weeks)
+        if not roles or not weeks:
+            return {}
+
+        try:
+            pipe = self.redis.pipeline(transaction=True)
+            for role in roles:
+                for week in weeks:
+                    pipe.incr(_stamp_key(role, week))
+                    # Outlives every entry written under the previous stamp, so letting it lapse back to 0 is safe.
+                    pipe.expire(_stamp_key(role, week), 2 * self.ttl)
+            VersionStore(self.redis).queue_bump(pipe, (availability_version_key(role) for role in roles))
+            return dict(zip(roles, bumped_versions(await pipe.execute(), len(roles))))
+        except Exception as e:
+            stats.errors += 1
+            logger.warning(f"Availability cache invalidation failed: {e}")
+            return {}
+
+    async def invalidate_events(self, roles: Iterable[str], events: Iterable[dict], profile_changed: bool = False) -> Dict[str, int]:
+        """
+        Drops what a change to the given events can affect: the touched weeks, or the whole role when a Permanent event
+        or the role's head count is involved. Returns the roles' new versions like `invalidate_roles`.
+        """
+        events = list(events)
+        if profile_changed or any(event.get("event_type") == "Permanent" for event in events):
+            return await self.invalidate_roles(roles)
+        return await self.invalidate_weeks(roles, weeks_for_events(events))
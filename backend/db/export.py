@@ -0,0 +1,75 @@
+import asyncio
+import os
+from datetime import datetime
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+import numpy as np
+from supabase import AsyncClient
+from utils.concurrency import timed_call
+from utils.export import csv_lines, grid_records, ndjson_lines, slot_labels
+
+EXPORT_PAGE_SIZE = int(os.getenv("EXPORT_PAGE_SIZE", "1000"))
+EXPORT_GZIP_LEVEL = int(os.getenv("EXPORT_GZIP_LEVEL", "6"))
+
+# Exported columns of each table, in CSV column order. Every table is paged by its `id` primary key.
+EXPORT_TABLES = {
+    "profiles": ["id", "name", "email", "verified", "schedule_version"],
+    "user_roles": ["id", "user_id", "email", "roles", "created_at", "updated_at"],
+    "events": ["id", "user_id", "calendar_id", "event_type", "start_date", "end_date", "start_time", "end_time", "day_of_week"]
+}
+
+async def iter_pages(supabase: AsyncClient, table: str, columns: List[str], page_size: int = EXPORT_PAGE_SIZE) -> AsyncIterator[List[dict]]:
+    """
+    Yields a table in pages of `page_size` rows ordered by id. Each page starts after the last id of the previous one
+    (keyset pagination), so late pages cost the same as early ones and rows written meanwhile can't shift the pages.
+    The next page is requested before the current one is handed out, overlapping the round trip with the caller's work,
+    so at most two pages are held at a time.
+    """
+    def request(after: Optional[str]) -> asyncio.Future:
+        query = supabase.table(table).select(", ".join(columns)).order("id").limit(page_size)
+        if after is not None:
+            query = query.gt("id", after)
+        return asyncio.ensure_future(timed_call(f"admin.export.{table}", query.execute()))
+
+    pending = request(None)
+    try:
+        while pending is not None:
+            rows = (await pending).data or []
+            pending = request(rows[-1]["id"]) if len(rows) == page_size else None
+            if rows:
+                yield rows
+    finally:
+        if pending is not None:
+            pending.cancel()
+
+async def export_chunks(
+    supabase: AsyncClient,
+    tables: List[str],
+    format: str,
+    grids: Optional[Dict[str, Tuple[int, np.ndarray]]] = None,
+    window_start: Optional[datetime] = None,
+    slot_minutes: int = 60,
+    first_hour: int = 7,
+    last_hour: int = 20
+) -> AsyncIterator[str]:
+    """
+    The export as text chunks, roughly one per page. NDJSON opens every table with a {"table": ...} record; CSV holds a
+    single table and opens with its header row. "availability" writes the precomputed `grids`.
+    """
+    for table in tables:
+        if table == "availability":
+            if format == "csv":
+                yield csv_lines([["role", "date", "maxPeopleAvailable", *slot_labels(slot_minutes, first_hour, last_hour)]])
+            else:
+                yield ndjson_lines([{"table": table}])
+            for role, (max_people, occupancy) in grids.items():
+                for chunk in grid_records(max_people, occupancy, window_start, role, slot_minutes, first_hour, last_hour, format):
+                    yield chunk
+            continue
+
+        columns = EXPORT_TABLES[table]
+        yield csv_lines([columns]) if format == "csv" else ndjson_lines([{"table": table}])
+        async for rows in iter_pages(supabase, table, columns):
+            if format == "csv":
+                yield csv_lines([row.get(column) for column in columns] for row in rows)
+            else:
+                yield ndjson_lines(rows)
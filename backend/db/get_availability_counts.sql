@@ -0,0 +1,57 @@
+CREATE OR REPLACE FUNCTION get_availability_counts(_role TEXT, _window_start TIMESTAMP, _days INT, _slot_minutes INT)
+RETURNS JSONB AS $$
+DECLARE
+    _slot_seconds INT := _slot_minutes * 60;
+    _slots_per_day INT := 1440 / _slot_minutes;
+    _total_slots INT := _days * (1440 / _slot_minutes);
+    _window_end TIMESTAMP := _window_start + make_interval(days => _days);
+BEGIN
+    RETURN (
+        WITH role_events AS (
+            SELECT e.*
+            FROM events e
+            WHERE _role IS NULL
+               OR EXISTS (SELECT 1 FROM user_roles ur WHERE ur.user_id = e.user_id AND ur.roles @> ARRAY[_role::user_role])
+        ),
+        spans AS (
+            -- Slot indices are counted from _window_start; a slot is busy when an event overlaps any part of it.
+            SELECT
+                floor(extract(epoch FROM start_date - _window_start) / _slot_seconds)::INT AS first_slot,
+                ceil(extract(epoch FROM end_date - _window_start) / _slot_seconds)::INT AS last_slot
+            FROM role_events
+            WHERE event_type = 'Temporary'
+              AND start_date < _window_end
+              AND end_date > _window_start
+              AND end_date > start_date
+
+            UNION ALL
+
+            SELECT
+                day * _slots_per_day + floor(extract(epoch FROM start_time) / _slot_seconds)::INT,
+                day * _slots_per_day + ceil(extract(epoch FROM end_time) / _slot_seconds)::INT
+            FROM role_events
+            JOIN generate_series(0, _days - 1) AS day
+              ON extract(dow FROM _window_start + make_interval(days => day)) = role_events.day_of_week
+            WHERE event_type = 'Permanent'
+              AND start_time IS NOT NULL
+              AND end_time > start_time
+        ),
+        counts AS (
+            SELECT slot, count(*)::INT AS busy
+            FROM spans, generate_series(greatest(first_slot, 0), least(last_slot, _total_slots) - 1) AS slot
+            GROUP BY slot
+        )
+        SELECT jsonb_build_object(
+            'max_people', (
+                SELECT count(*)
+                FROM profiles p
+                WHERE p.verified
+                  AND (_role IS NULL
+                       OR EXISTS (SELECT 1 FROM user_roles ur WHERE ur.user_id = p.id AND ur.roles @> ARRAY[_role::user_role]))
+            ),
+            'slots', coalesce(jsonb_agg(jsonb_build_array(slot, busy) ORDER BY slot), '[]'::jsonb)
+        )
+        FROM counts
+    );
+END;
+$$ LANGUAGE plpgsql STABLE;
@@ -0,0 +1,302 @@
+import asyncio
+import json
+import logging
+import os
+from datetime import date, timedelta
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set
+import numpy as np
+from redis.asyncio import Redis
+
+from db.occupancy_store import as_stored
+from db.versions import VersionStore, availability_version_key
+from utils.availability import MINUTES_PER_DAY, weekly_spans
+from utils.calendar import weeks_between
+
+logger = logging.getLogger(__name__)
+
+LIVE_UPDATES_ENABLED = os.getenv("LIVE_UPDATES_ENABLED", "true").lower() == "true"
+# Per worker: each open stream holds a connection and a queue.
+LIVE_MAX_CONNECTIONS = int(os.getenv("LIVE_MAX_CONNECTIONS", "200"))
+LIVE_QUEUE_SIZE = int(os.getenv("LIVE_QUEUE_SIZE", "32"))
+LIVE_HEARTBEAT_SECONDS = float(os.getenv("LIVE_HEARTBEAT_SECONDS", "15"))
+
+LIVE_CHANNEL = "availability:changes"
+
+def change_message(roles: Iterable[str], removed: Iterable[dict] = (), added: Iterable[dict] = (), people: int = 0, versions: Optional[Dict[str, int]] = None) -> Optional[dict]:
+    """
+    A write as it goes out on the channel: the roles it touches, the head count shift, the availability version the
+    write's invalidation gave each role, and every event's coverage as [week or null for Permanent, first minute,
+    last minute, occupancy delta] spans on the weekly wall-clock grid. Minutes rather than slots, so each subscriber
+    rounds them to its own slot size exactly as build_occupancy would.
+    """
+    roles = set(roles)
+    spans = []
+    for events, sign in ((removed, -1), (added, 1)):
+        for event in events:
+            for week, first, last in weekly_spans(as_stored(event), 1):
+                spans.append([week.isoformat() if week else None, first, last, sign])
+
+    if not roles or not (spans or people):
+        return None
+    versions = {role: version for role, version in (versions or {}).items() if role in roles}
+    return {"roles": sorted(roles), "people": people, "versions": versions, "spans": spans}
+
+async def publish_changes(redis: Redis, roles: Iterable[str], removed: Iterable[dict] = (), added: Iterable[dict] = (), people: int = 0, versions: Optional[Dict[str, int]] = None):
+    """
+    Tells every worker's live subscribers about a write. Takes the same arguments as OccupancyStore.apply plus the
+    versions the write's cache invalidation returned, so it is called after that invalidation: a dashboard that loads
+    the grid in between gets the new version with it and drops this change as already applied. Like the invalidation,
+    it never fails the request: a lost message only leaves dashboards stale until their next load.
+    """
+    if not LIVE_UPDATES_ENABLED:
+        return
+
+    message = change_message(roles, removed, added, people, versions)
+    if message is None:
+        return
+
+    try:
+        await redis.publish(LIVE_CHANNEL, json.dumps(message, separators=(",", ":")))
+    except Exception as e:
+        logger.warning(f"Publishing live availability update failed: {e}")
+
+class LiveGrid(NamedTuple):
+    """
+    The grid a subscriber is looking at, with the same meaning as the /admin/ parameters of the same names.
+    Subscribers of the same grid share the work and the encoded frame of every update.
+    """
+    role: str
+    slot_minutes: int
+    start_date: date
+    days: int
+    first_hour: int
+    last_hour: int
+
+def grid_changes(grid: LiveGrid, spans: List[list]) -> List[List[int]]:
+    """
+    Turns minute spans into [first, last, delta] runs over the grid's columnar `counts` array (delta in available
+    people, so the opposite sign of occupancy). Permanent spans repeat in every week of the range.
+    """
+    slots_per_day = MINUTES_PER_DAY // grid.slot_minutes
+    total = grid.days * slots_per_day
+    diff = np.zeros(total + 1, dtype=np.int64)
+
+    weeks = weeks_between(grid.start_date, grid.start_date + timedelta(days=grid.days - 1))
+    for week, first, last, delta in spans:
+        # Same rounding as build_occupancy: a slot counts when the event overlaps any part of it.
+        first, last = first // grid.slot_minutes, -(-last // grid.slot_minutes)
+        for origin in weeks if week is None else [date.fromisoformat(week)]:
+            offset = (origin - grid.start_date).days * slots_per_day
+            begin, end = max(first + offset, 0), min(last + offset, total)
+            if begin < end:
+                diff[begin] -= delta
+                diff[end] += delta
+
+    if not diff.any():
+        return []
+
+    first_slot = grid.first_hour * 60 // grid.slot_minutes
+    last_slot = grid.last_hour * 60 // grid.slot_minutes
+    values = np.cumsum(diff[:total]).reshape(grid.days, slots_per_day)[:, first_slot:last_slot].ravel()
+
+    starts = np.concatenate(([0], np.flatnonzero(np.diff(values)) + 1))
+    ends = np.append(starts[1:], len(values))
+    return [[int(start), int(end), int(values[start])] for start, end in zip(starts, ends) if values[start]]
+
+def event_frame(event: str, payload: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(payload, separators=(',', ':'))}\n\n"
+
+class Subscription:
+    """
+    One open stream: a bounded queue of encoded frames. A client that falls `LIVE_QUEUE_SIZE` frames behind is ended
+    rather than buffered without limit or allowed to hold up everyone else; it gets a `resync` event and reloads.
+    """
+    __slots__ = ("grid", "queue", "ended")
+
+    def __init__(self, grid: LiveGrid, queue_size: int):
+        self.grid = grid
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        # Why the stream was ended, sent as the `resync` reason: "behind" or "unavailable".
+        self.ended: Optional[str] = None
+
+    def push(self, frame: str) -> bool:
+        try:
+            self.queue.put_nowait(frame)
+            return True
+        except asyncio.QueueFull:
+            self.end("behind")
+            return False
+
+    def end(self, reason: str):
+        self.ended = reason
+        # Wakes a reader waiting on an empty queue; a full one has frames to wake it anyway.
+        try:
+            self.queue.put_nowait(None)
+        except asyncio.QueueFull:
+            pass
+
+class LiveStats:
+    def __init__(self):
+        self.connections = 0
+        self.peak_connections = 0
+        self.rejected = 0
+        self.messages = 0
+        self.delivered = 0
+        self.overflowed = 0
+        self.listener_failures = 0
+
+    def as_dict(self) -> dict:
+        return {
+            "connections": self.connections,
+            "peakConnections": self.peak_connections,
+            "rejected": self.rejected,
+            "messages": self.messages,
+            "delivered": self.delivered,
+            "overflowed": self.overflowed,
+            "listenerFailures": self.listener_failures
+        }
+
+class LiveHub:
+    """
+    Per-worker fan-out of the change channel. The worker holds one Redis subscription, opened with the first stream and
+    closed with the last, however many clients are connected; each message is turned into runs once per distinct grid
+    and handed to the subscribers' queues without waiting on any of them.
+    """
+    def __init__(self, max_connections: int = LIVE_MAX_CONNECTIONS, queue_size: int = LIVE_QUEUE_SIZE):
+        self.max_connections = max_connections
+        self.queue_size = queue_size
+        self.grids: Dict[LiveGrid, Set[Subscription]] = {}
+        self.listener: Optional[asyncio.Task] = None
+        self.ready = asyncio.Event()
+        self.stats = LiveStats()
+
+    def subscribe(self, redis: Redis, grid: LiveGrid) -> Optional[Subscription]:
+        """
+        Registers a stream, or returns None when the worker is at its connection cap.
+        """
+        if self.stats.connections >= self.max_connections:
+            self.stats.rejected += 1
+            return None
+
+        subscription = Subscription(grid, self.queue_size)
+        self.grids.setdefault(grid, set()).add(subscription)
+        self.stats.connections += 1
+        self.stats.peak_connections = max(self.stats.peak_connections, self.stats.connections)
+
+        if self.listener is None or self.listener.done():
+            self.ready.clear()
+            self.listener = asyncio.create_task(self.listen(redis))
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        subscribers = self.grids.get(subscription.grid)
+        if subscribers is None or subscription not in subscribers:
+            return
+
+        subscribers.discard(subscription)
+        if not subscribers:
+            del self.grids[subscription.grid]
+        self.stats.connections -= 1
+
+        if not self.grids and self.listener is not None:
+            self.listener.cancel()
+            self.listener = None
+
+    async def listen(self, redis: Redis):
+        pubsub = redis.pubsub(ignore_subscribe_messages=True)
+        try:
+            await pubsub.subscribe(LIVE_CHANNEL)
+            self.ready.set()
+            async for message in pubsub.listen():
+                self.dispatch(json.loads(message["data"]))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # Changes may have been missed, so every stream is told to reload; clients reconnect and start a new listener.
+            logger.warning(f"Live availability listener stopped: {e}")
+            self.stats.listener_failures += 1
+            for subscribers in self.grids.values():
+                for subscription in subscribers:
+                    subscription.end("unavailable")
+        finally:
+            self.ready.clear()
+            await pubsub.aclose()
+
+    def dispatch(self, change: dict):
+        self.stats.messages += 1
+        roles = set(change["roles"])
+        for grid, subscribers in list(self.grids.items()):
+            if grid.role not in roles:
+                continue
+
+            changes = grid_changes(grid, change["spans"])
+            if not (changes or change["people"]):
+                continue
+
+            frame = event_frame("availability", {
+                "role": grid.role,
+                # None when the write's invalidation failed; such a change can't be matched against a loaded grid.
+                "version": change["versions"].get(grid.role),
+                "maxPeopleDelta": change["people"],
+                "changes": changes
+            })
+            for subscription in list(subscribers):
+                if subscription.ended:
+                    continue
+                if subscription.push(frame):
+                    self.stats.delivered += 1
+                else:
+                    self.stats.overflowed += 1
+
+    async def stream(self, subscription: Subscription, redis: Redis, ready_timeout: float = 5):
+        """
+        The SSE body of one subscription: `ready` once the worker is subscribed to the channel (changes written after it
+        will arrive, so that is when to load the grid), then `availability` events, comment heartbeats while idle, and
+        `resync` if the stream had to be ended. Unsubscribes however the stream ends, including client disconnects.
+
+        `ready` and every `availability` event carry the role's availability version, as /admin/ does in
+        X-Availability-Version. A client drops events at or below the version of the grid it loaded, which already
+        include them, and can skip reloading on reconnect when `ready` has the version it holds.
+        """
+        try:
+            try:
+                await asyncio.wait_for(self.ready.wait(), ready_timeout)
+            except asyncio.TimeoutError:
+                yield event_frame("resync", {"reason": "unavailable"})
+                return
+
+            versions = await VersionStore(redis).get([availability_version_key(subscription.grid.role)])
+            yield event_frame("ready", {
+                "role": subscription.grid.role,
+                "version": versions[0] if versions is not None else None,
+                "slotMinutes": subscription.grid.slot_minutes,
+                "startDate": subscription.grid.start_date.isoformat(),
+                "days": subscription.grid.days,
+                "startHour": subscription.grid.first_hour,
+                "endHour": subscription.grid.last_hour
+            })
+
+            while True:
+                if subscription.ended:
+                    yield event_frame("resync", {"reason": subscription.ended})
+                    return
+                try:
+                    frame = await asyncio.wait_for(subscription.queue.get(), LIVE_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                if frame is not None:
+                    yield frame
+        finally:
+            self.unsubscribe(subscription)
+
+    async def close(self):
+        for subscribers in list(self.grids.values()):
+            for subscription in list(subscribers):
+                subscription.end("unavailable")
+                self.unsubscribe(subscription)
+        if self.listener is not None:
+            self.listener.cancel()
+            self.listener = None
+
+hub = LiveHub()
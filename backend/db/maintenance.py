@@ -0,0 +1,186 @@
+import logging
+import os
+import time
+from datetime import datetime
+from typing import List, Optional
+import pytz
+from redis.asyncio import Redis
+from redis.exceptions import LockError
+from supabase import AsyncClient
+
+from db.availability_cache import AvailabilityCache, ALL_ROLES, weeks_for_events
+from db.versions import VersionStore, schedule_version_key
+from db.occupancy_store import AVAILABILITY_BACKEND, OccupancyStore
+from db.live_updates import publish_changes
+from db.redis_client import get_redis_client
+from db.supabase_client import get_supabase
+from utils.concurrency import timed_call
+
+logger = logging.getLogger(__name__)
+
+PST = pytz.timezone("America/Vancouver")
+
+CLEANUP_INTERVAL_MINUTES = int(os.getenv("CLEANUP_INTERVAL_MINUTES", "60"))
+CLEANUP_BATCH_SIZE = int(os.getenv("CLEANUP_BATCH_SIZE", "500"))
+CLEANUP_MAX_BATCHES = int(os.getenv("CLEANUP_MAX_BATCHES", "100"))
+# When set, expired rows are moved to events_archive (db/archive_events.sql) instead of being dropped.
+CLEANUP_ARCHIVE = os.getenv("CLEANUP_ARCHIVE", "false").lower() == "true"
+CLEANUP_LOCK_TTL = int(os.getenv("CLEANUP_LOCK_TTL", "600"))
+
+LOCK_KEY = "maintenance:cleanup:lock"
+CLEANUP_JOB_ID = "delete_expired_events"
+EXPIRED_COLUMNS = "id, user_id, event_type, start_date, end_date"
+
+class CleanupStats:
+    def __init__(self):
+        self.runs = 0
+        self.skipped = 0
+        self.failures = 0
+        self.deleted = 0
+        self.last_started = None
+        self.last_duration = None
+        self.last_batches = []
+        self.backlog = None
+        self.lag_seconds = None
+
+    def as_dict(self) -> dict:
+        return {
+            "runs": self.runs,
+            "skipped": self.skipped,
+            "failures": self.failures,
+            "deleted": self.deleted,
+            "lastStarted": self.last_started,
+            "lastDurationSeconds": self.last_duration,
+            "lastBatchRows": self.last_batches,
+            "backlog": self.backlog,
+            "lagSeconds": self.lag_seconds
+        }
+
+stats = CleanupStats()
+
+def expiry_cutoff() -> str:
+    # end_date is a TIMESTAMP holding local wall-clock time, so compare against the local wall clock.
+    return datetime.now(PST).replace(tzinfo=None).isoformat()
+
+async def forget_events(redis: Redis, supabase: AsyncClient, rows: List[dict]):
+    """
+    Drops what removed rows contributed to the availability cache and, when enabled, the materialized store,
+    bumps the owners' schedule versions and tells live subscribers.
+    """
+    user_ids = list({row["user_id"] for row in rows})
+    user_roles = await timed_call("maintenance.user_roles", supabase.table("user_roles").select("user_id, roles").in_("user_id", user_ids).execute())
+
+    roles_by_user = {user_id: {ALL_ROLES} for user_id in user_ids}
+    for row in user_roles.data or []:
+        roles_by_user[row["user_id"]].update(row["roles"])
+
+    store = OccupancyStore(redis)
+    if AVAILABILITY_BACKEND == "materialized":
+        for user_id, roles in roles_by_user.items():
+            await store.apply(roles, removed=[row for row in rows if row["user_id"] == user_id])
+
+    versions = await AvailabilityCache(redis).invalidate_weeks(set().union(*roles_by_user.values()), weeks_for_events(rows))
+    await VersionStore(redis).bump(schedule_version_key(user_id) for user_id in user_ids)
+
+    for user_id, roles in roles_by_user.items():
+        await publish_changes(redis, roles, removed=[row for row in rows if row["user_id"] == user_id], versions=versions)
+
+async def delete_batch(supabase: AsyncClient, cutoff: str, batch_size: int, archive: bool) -> List[dict]:
+    """
+    Removes up to `batch_size` of the oldest expired Temporary events and returns the columns needed to invalidate them.
+    """
+    selected = await timed_call(
+        "maintenance.select_expired",
+        supabase.table("events").select(EXPIRED_COLUMNS).eq("event_type", "Temporary").lt("end_date", cutoff).order("end_date").limit(batch_size).execute()
+    )
+    rows = selected.data or []
+    if not rows:
+        return rows
+
+    ids = [row["id"] for row in rows]
+    if archive:
+        await timed_call("maintenance.archive", supabase.rpc("archive_events", {"_ids": ids}).execute())
+    else:
+        await timed_call("maintenance.delete", supabase.table("events").delete(returning="minimal").in_("id", ids).execute())
+
+    return rows
+
+async def measure_backlog(supabase: AsyncClient, cutoff: str):
+    remaining = await timed_call(
+        "maintenance.backlog",
+        supabase.table("events").select("end_date", count="exact").eq("event_type", "Temporary").lt("end_date", cutoff).order("end_date").limit(1).execute()
+    )
+    stats.backlog = remaining.count or 0
+    if remaining.data:
+        oldest = datetime.fromisoformat(remaining.data[0]["end_date"]).replace(tzinfo=None)
+        stats.lag_seconds = (datetime.fromisoformat(cutoff) - oldest).total_seconds()
+    else:
+        stats.lag_seconds = 0.0
+
+async def run_cleanup(
+    supabase: AsyncClient,
+    redis: Redis,
+    batch_size: int = CLEANUP_BATCH_SIZE,
+    max_batches: int = CLEANUP_MAX_BATCHES,
+    archive: bool = CLEANUP_ARCHIVE
+) -> Optional[int]:
+    """
+    Deletes expired Temporary events in batches of at most `batch_size`, holding a Redis lock so only one worker
+    runs at a time. Returns how many rows were removed, or None if another run held the lock.
+    """
+    lock = redis.lock(LOCK_KEY, timeout=CLEANUP_LOCK_TTL, blocking=False)
+    if not await lock.acquire():
+        stats.skipped += 1
+        logger.info("Cleanup already running elsewhere, skipping.")
+        return None
+
+    started = time.perf_counter()
+    stats.runs += 1
+    stats.last_started = datetime.now(PST).isoformat()
+    stats.last_batches = []
+    deleted = 0
+
+    try:
+        cutoff = expiry_cutoff()
+        for _ in range(max_batches):
+            rows = await delete_batch(supabase, cutoff, batch_size, archive)
+            if not rows:
+                break
+
+            await forget_events(redis, supabase, rows)
+            deleted += len(rows)
+            stats.deleted += len(rows)
+            stats.last_batches.append(len(rows))
+
+            if len(rows) < batch_size:
+                break
+
+        await measure_backlog(supabase, cutoff)
+        logger.info(f"Cleanup removed {deleted} expired events in {len(stats.last_batches)} batches, {stats.backlog} left.")
+        return deleted
+    except Exception:
+        stats.failures += 1
+        raise
+    finally:
+        stats.last_duration = time.perf_counter() - started
+        try:
+            await lock.release()
+        except LockError:
+            logger.warning("Cleanup lock expired before the run finished, raise CLEANUP_LOCK_TTL.")
+
+async def scheduled_cleanup():
+    # Referenced by name from the persisted job, so it fetches its own clients.
+    try:
+        await run_cleanup(await get_supabase(), get_redis_client())
+    except Exception as e:
+        logger.error(f"Cleanup failed: {e}")
+
+def add_maintenance_jobs(scheduler):
+    """
+    Adds the cleanup job unless the job store already has it, so its persisted next run time (and any misfire) survives restarts.
+    """
+    job = scheduler.get_job(CLEANUP_JOB_ID)
+    if job is None:
+        scheduler.add_job("db.maintenance:scheduled_cleanup", "interval", minutes=CLEANUP_INTERVAL_MINUTES, id=CLEANUP_JOB_ID, next_run_time=datetime.now(PST))
+    elif job.trigger.interval.total_seconds() != CLEANUP_INTERVAL_MINUTES * 60:
+        job.reschedule("interval", minutes=CLEANUP_INTERVAL_MINUTES)
@@ -0,0 +1,199 @@
+import argparse
+import asyncio
+import logging
+import os
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+import numpy as np
+from redis.asyncio import Redis
+
+from db.availability_cache import ALL_ROLES
+from utils.availability import DAYS_PER_WEEK, MINUTES_PER_DAY, SLOT_MINUTES_CHOICES, weekly_spans
+from utils.calendar import weeks_between
+
+logger = logging.getLogger(__name__)
+
+# "rpc" aggregates slot counts in Postgres (db/get_availability_counts.sql), "python" pulls event rows and builds the grid here,
+# "materialized" reads the per-role difference arrays below, which schedule and role writes keep up to date.
+AVAILABILITY_BACKEND = os.getenv("AVAILABILITY_BACKEND", "rpc")
+
+KEY_PREFIX = "occupancy"
+BUILT_KEY = f"{KEY_PREFIX}:built"
+PAGE_SIZE = 1000
+
+def _diff_key(role: str, slot_minutes: int, week: Optional[date]) -> str:
+    # Permanent events share one weekly array; Temporary events get one array per Sunday-start week.
+    return f"{KEY_PREFIX}:{role}:{slot_minutes}:{week.isoformat() if week else 'perm'}"
+
+def _max_people_key(role: str) -> str:
+    return f"{KEY_PREFIX}:{role}:max_people"
+
+def _week_slots(slot_minutes: int) -> int:
+    return DAYS_PER_WEEK * MINUTES_PER_DAY // slot_minutes
+
+def _decode(value: Optional[bytes], length: int) -> np.ndarray:
+    # Redis only grows a BITFIELD string as far as the highest offset written, so the tail may be missing.
+    diff = np.zeros(length, dtype=np.int64)
+    if value:
+        stored = np.frombuffer(value, dtype=">i4")[:length]
+        diff[:len(stored)] = stored
+    return diff
+
+def as_stored(event: dict) -> dict:
+    # replace_user_events casts dates with ::TIMESTAMP, which keeps the wall clock and drops any offset,
+    # so payloads about to be written are read the way the rows will come back.
+    stored = dict(event)
+    for field in ("start_date", "end_date"):
+        if stored.get(field):
+            stored[field] = datetime.fromisoformat(stored[field]).replace(tzinfo=None).isoformat()
+    return stored
+
+def event_deltas(events: Iterable[dict], slot_minutes: int, sign: int = 1) -> Dict[Optional[date], Dict[int, int]]:
+    """
+    Difference array updates for the given events, as {week or None for Permanent: {index: delta}}.
+    """
+    deltas = defaultdict(lambda: defaultdict(int))
+    for event in events:
+        for week, first, last in weekly_spans(as_stored(event), slot_minutes):
+            deltas[week][first] += sign
+            deltas[week][last] -= sign
+    return deltas
+
+class OccupancyStore:
+    """
+    Per-role occupancy kept as difference arrays in Redis, one big-endian int32 array per (role, slot size, week).
+    Writes add or subtract an event's coverage with BITFIELD INCRBY, so they are O(events) and safe across workers;
+    reads fetch the arrays for the requested weeks and prefix-sum them, with no event scan.
+    Anything that slips past the write hooks (manual edits, a failed write) is reconciled by `rebuild`.
+    """
+    def __init__(self, redis: Redis):
+        self.redis = redis
+
+    async def get(self, role: str, start_date: date, days: int, slot_minutes: int) -> Optional[Tuple[int, np.ndarray]]:
+        """
+        Returns (head count, days x slots per day grid) for the role, or None if the store has never been built.
+        """
+        weeks = weeks_between(start_date, start_date + timedelta(days=days - 1))
+        keys = [BUILT_KEY, _max_people_key(role), _diff_key(role, slot_minutes, None)]
+        keys += [_diff_key(role, slot_minutes, week) for week in weeks]
+        values = await self.redis.mget(keys)
+
+        if values[0] is None:
+            return None
+
+        week_slots = _week_slots(slot_minutes)
+        weekly = np.cumsum(_decode(values[2], week_slots + 1))[:week_slots]
+        grids = [np.cumsum(_decode(value, week_slots + 1))[:week_slots] + weekly for value in values[3:]]
+
+        occupancy = np.concatenate(grids).astype(np.int32).reshape(len(weeks) * DAYS_PER_WEEK, -1)
+        offset = (start_date - weeks[0]).days
+        return int(values[1] or 0), occupancy[offset:offset + days]
+
+    async def apply(self, roles: Iterable[str], removed: Iterable[dict] = (), added: Iterable[dict] = (), people: int = 0):
+        """
+        Subtracts `removed` and adds `added` to every given role at every slot size, and shifts the head counts by `people`.
+        The whole update runs in one MULTI so readers never see half of it.
+        """
+        roles = set(roles)
+        removed, added = list(removed), list(added)
+        if not roles or not (removed or added or people):
+            return
+
+        try:
+            pipe = self.redis.pipeline(transaction=True)
+            for slot_minutes in SLOT_MINUTES_CHOICES:
+                deltas = event_deltas(removed, slot_minutes, -1)
+                for week, changes in event_deltas(added, slot_minutes).items():
+                    for index, delta in changes.items():
+                        deltas[week][index] += delta
+
+                for week, changes in deltas.items():
+                    args = []
+                    for index, delta in changes.items():
+                        if delta:
+                            args += ["INCRBY", "i32", f"#{index}", delta]
+                    if not args:
+                        continue
+                    for role in roles:
+                        pipe.execute_command("BITFIELD", _diff_key(role, slot_minutes, week), *args)
+
+            if people:
+                for role in roles:
+                    pipe.incrby(_max_people_key(role), people)
+
+            await pipe.execute()
+        except Exception as e:
+            logger.error(f"Occupancy store update failed, run `python -m db.occupancy_store rebuild` to reconcile: {e}")
+
+    async def rebuild(self, profiles: List[dict], user_roles: List[dict], events: List[dict]):
+        """
+        Recomputes every array from full rows and swaps them in atomically.
+        """
+        roles_by_user = defaultdict(set)
+        for row in user_roles:
+            roles_by_user[row["user_id"]].update(row["roles"])
+
+        events_by_role = defaultdict(list)
+        for event in events:
+            for role in roles_by_user.get(event["user_id"], set()) | {ALL_ROLES}:
+                events_by_role[role].append(event)
+
+        values = {BUILT_KEY: 1}
+        for profile in profiles:
+            if not profile["verified"]:
+                continue
+            for role in roles_by_user.get(profile["id"], set()) | {ALL_ROLES}:
+                key = _max_people_key(role)
+                values[key] = values.get(key, 0) + 1
+
+        for role, role_events in events_by_role.items():
+            for slot_minutes in SLOT_MINUTES_CHOICES:
+                length = _week_slots(slot_minutes) + 1
+                for week, changes in event_deltas(role_events, slot_minutes).items():
+                    diff = np.zeros(length, dtype=">i4")
+                    np.add.at(diff, list(changes.keys()), list(changes.values()))
+                    values[_diff_key(role, slot_minutes, week)] = diff.tobytes()
+
+        stale = [key async for key in self.redis.scan_iter(match=f"{KEY_PREFIX}:*", count=1000)]
+
+        pipe = self.redis.pipeline(transaction=True)
+        if stale:
+            pipe.delete(*stale)
+        pipe.mset(values)
+        await pipe.execute()
+
+        return len(values)
+
+async def fetch_all(make_query: Callable) -> List[dict]:
+    # PostgREST caps each response, so page through with a fresh query each time (range() appends, it does not replace).
+    rows = []
+    while True:
+        page = await make_query().range(len(rows), len(rows) + PAGE_SIZE - 1).execute()
+        rows += page.data or []
+        if len(page.data or []) < PAGE_SIZE:
+            return rows
+
+async def rebuild_from_database():
+    from db.redis_client import close_redis, get_redis_client
+    from db.supabase_client import close_async_supabase, get_supabase
+
+    supabase = await get_supabase()
+    try:
+        profiles, user_roles, events = await asyncio.gather(
+            fetch_all(lambda: supabase.table("profiles").select("id, verified").order("id")),
+            fetch_all(lambda: supabase.table("user_roles").select("user_id, roles").order("id")),
+            fetch_all(lambda: supabase.table("events").select("user_id, event_type, start_date, end_date, start_time, end_time, day_of_week").order("id"))
+        )
+        written = await OccupancyStore(get_redis_client()).rebuild(profiles, user_roles, events)
+        logger.info(f"Rebuilt occupancy store from {len(events)} events: {written} keys.")
+    finally:
+        await asyncio.gather(close_async_supabase(), close_redis())
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Maintenance for the materialized availability store.")
+    parser.add_argument("command", choices=["rebuild"])
+    args = parser.parse_args()
+
+    asyncio.run(rebuild_from_database())
@@ -0,0 +1,60 @@
+ALTER TABLE profiles ADD COLUMN IF NOT EXISTS schedule_version BIGINT NOT NULL DEFAULT 0;
+
+CREATE INDEX IF NOT EXISTS events_user_calendar_idx ON events (user_id, calendar_id);
+
+-- Applies a schedule diff in one round trip: drops the events whose calendar_id is removed or rewritten, inserts the
+-- new versions, marks the profile verified and bumps its schedule_version.
+-- With _expected_version set, nothing changes unless it still matches (returned with "conflict": true otherwise).
+-- Returns the rows that were replaced, the profile's previous verified flag and roles, and the new version, so the
+-- caller can update caches without reading the profile first.
+CREATE OR REPLACE FUNCTION patch_user_events(_user_id UUID, _upserts JSONB, _removed TEXT[], _expected_version BIGINT DEFAULT NULL)
+RETURNS JSONB AS $$
+DECLARE
+    _profile RECORD;
+    _touched TEXT[];
+    _old JSONB;
+    _roles TEXT[];
+BEGIN
+    SELECT verified, schedule_version INTO _profile FROM profiles WHERE id = _user_id FOR UPDATE;
+
+    IF NOT FOUND THEN
+        RAISE EXCEPTION 'User profile not found.';
+    END IF;
+
+    IF _expected_version IS NOT NULL AND _expected_version <> _profile.schedule_version THEN
+        RETURN jsonb_build_object('conflict', TRUE, 'version', _profile.schedule_version);
+    END IF;
+
+    _touched := COALESCE(_removed, '{}') || ARRAY(SELECT e->>'calendar_id' FROM jsonb_array_elements(COALESCE(_upserts, '[]')) AS e);
+
+    WITH deleted AS (
+        DELETE FROM events WHERE user_id = _user_id AND calendar_id = ANY(_touched)
+        RETURNING calendar_id, event_type, start_date, end_date, start_time, end_time, day_of_week
+    )
+    SELECT COALESCE(jsonb_agg(to_jsonb(deleted)), '[]') INTO _old FROM deleted;
+
+    INSERT INTO events (user_id, calendar_id, start_date, end_date, start_time, end_time, day_of_week, event_type)
+    SELECT
+        _user_id,
+        e->>'calendar_id',
+        NULLIF(e->>'start_date', 'null')::TIMESTAMP,
+        NULLIF(e->>'end_date', 'null')::TIMESTAMP,
+        NULLIF(e->>'start_time', 'null')::TIME,
+        NULLIF(e->>'end_time', 'null')::TIME,
+        NULLIF(e->>'day_of_week', 'null')::INT,
+        e->>'event_type'
+    FROM jsonb_array_elements(COALESCE(_upserts, '[]')) AS e;
+
+    UPDATE profiles SET verified = TRUE, schedule_version = schedule_version + 1 WHERE id = _user_id;
+
+    SELECT COALESCE(array_agg(DISTINCT role::TEXT), '{}') INTO _roles FROM user_roles, unnest(roles) AS role WHERE user_id = _user_id;
+
+    RETURN jsonb_build_object(
+        'conflict', FALSE,
+        'version', _profile.schedule_version + 1,
+        'was_verified', _profile.verified,
+        'roles', to_jsonb(_roles),
+        'replaced', _old
+    );
+END;
+$$ LANGUAGE plpgsql;
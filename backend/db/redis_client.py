@@ -1,19 +1,38 @@
 import os
+from typing import Optional, Tuple
 from redis.asyncio import Redis
 
-# Read environment variables
-try:
-    REDIS_HOST = os.environ["REDIS_HOST"]
-    REDIS_PORT = os.environ["REDIS_PORT"]
-except KeyError as e:
-    raise RuntimeError(f"Missing required redis environment variable: {e.args[0]}")
+# Read environment variables on first use, so importing this module needs no configuration
+def redis_settings() -> Tuple[str, int]:
+    try:
+        return os.environ["REDIS_HOST"], int(os.environ["REDIS_PORT"])
+    except KeyError as e:
+        raise RuntimeError(f"Missing required redis environment variable: {e.args[0]}")
 
-# Create a global Redis client
-redis_client = Redis(
-    host=REDIS_HOST,
-    port=REDIS_PORT
-)
+# Global Redis client, created on first use. Creating it does not connect; the pool opens connections as needed.
+redis_client: Optional[Redis] = None
+
+def get_redis_client() -> Redis:
+    global redis_client
+    if redis_client is None:
+        host, port = redis_settings()
+        redis_client = Redis(
+            host=host,
+            port=port
+        )
+    return redis_client
+
+async def check_redis():
+    await get_redis_client().ping()
+
+async def close_redis():
+    global redis_client
+    if redis_client is None:
+        return
+
+    client, redis_client = redis_client, None
+    await client.aclose()
 
 # FastAPI dependency function
 async def get_redis() -> Redis:
-    return redis_client
\ No newline at end of file
+    return get_redis_client()
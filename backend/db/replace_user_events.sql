@@ -1,7 +1,17 @@
+-- Returns the rows it deleted, so callers update the occupancy counts with what was really removed rather than with
+-- what they read beforehand (which a concurrent call may already have replaced). The return type changed from VOID.
+DROP FUNCTION IF EXISTS replace_user_events(UUID, JSONB);
+
 CREATE OR REPLACE FUNCTION replace_user_events(_user_id UUID, _event_data JSONB)
-RETURNS VOID AS $$
+RETURNS JSONB AS $$
+DECLARE
+    _old JSONB;
 BEGIN
-    DELETE FROM events WHERE user_id = _user_id;
+    WITH deleted AS (
+        DELETE FROM events WHERE user_id = _user_id
+        RETURNING calendar_id, event_type, start_date, end_date, start_time, end_time, day_of_week
+    )
+    SELECT COALESCE(jsonb_agg(to_jsonb(deleted)), '[]') INTO _old FROM deleted;
     
     INSERT INTO events (user_id, calendar_id, start_date, end_date, start_time, end_time, day_of_week, event_type)
     SELECT
@@ -15,6 +25,10 @@ BEGIN
         e->>'event_type'
     FROM jsonb_array_elements(_event_data) AS e;
 
+    UPDATE profiles SET schedule_version = schedule_version + 1 WHERE id = _user_id;
+
+    RETURN _old;
+
 EXCEPTION
     WHEN OTHERS THEN
         RAISE;
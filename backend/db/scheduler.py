@@ -0,0 +1,138 @@
+import asyncio
+import logging
+import os
+import socket
+import uuid
+from typing import Callable, Optional
+import pytz
+from apscheduler.events import EVENT_JOB_ERROR, EVENT_JOB_EXECUTED, EVENT_JOB_MISSED, EVENT_JOB_SUBMITTED, JobEvent
+from apscheduler.jobstores.base import BaseJobStore
+from apscheduler.jobstores.redis import RedisJobStore
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from redis.asyncio import Redis
+from redis.exceptions import LockError
+from db.redis_client import redis_settings
+
+logger = logging.getLogger(__name__)
+
+PST = pytz.timezone("America/Vancouver")
+
+# "embedded" runs the scheduler inside every API process (only the elected leader fires jobs),
+# "worker" leaves it to `python worker.py`, "off" disables scheduled jobs entirely.
+SCHEDULER_MODE = os.getenv("SCHEDULER_MODE", "embedded")
+SCHEDULER_LEADER_TTL = int(os.getenv("SCHEDULER_LEADER_TTL", "30"))
+# Runs missed while no leader was alive are still fired (once) if they are at most this late.
+SCHEDULER_MISFIRE_GRACE = int(os.getenv("SCHEDULER_MISFIRE_GRACE", "3600"))
+
+LEADER_KEY = "scheduler:leader"
+JOBS_KEY = "scheduler:jobs"
+RUN_TIMES_KEY = "scheduler:run_times"
+
+def redis_jobstore() -> BaseJobStore:
+    # APScheduler's job stores are synchronous, so this opens its own (sync) connection to the same Redis.
+    host, port = redis_settings()
+    return RedisJobStore(jobs_key=JOBS_KEY, run_times_key=RUN_TIMES_KEY, host=host, port=port)
+
+class LeaderScheduler:
+    """
+    Runs an AsyncIOScheduler only while this process holds the leader lock in Redis, so jobs fire once no matter
+    how many workers or replicas are up. Jobs live in a shared job store, so a new leader picks up the schedule
+    (and fires any missed run) where the previous one stopped.
+    """
+    def __init__(
+        self,
+        redis: Redis,
+        configure: Callable[[AsyncIOScheduler], None],
+        jobstore_factory: Callable[[], BaseJobStore] = redis_jobstore,
+        ttl: int = SCHEDULER_LEADER_TTL,
+        name: Optional[str] = None
+    ):
+        self.redis = redis
+        self.configure = configure
+        self.jobstore_factory = jobstore_factory
+        self.ttl = ttl
+        self.name = name or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.lock = redis.lock(LEADER_KEY, timeout=ttl, blocking=False, thread_local=False)
+        self.scheduler: Optional[AsyncIOScheduler] = None
+        self._stopping = asyncio.Event()
+        # Runs submitted and not yet finished. Jobs coalesce, so each submission ends with exactly one of
+        # executed, error or missed.
+        self._running = 0
+        self._idle = asyncio.Event()
+        self._idle.set()
+
+    @property
+    def is_leader(self) -> bool:
+        return self.scheduler is not None
+
+    def _start_scheduler(self):
+        scheduler = AsyncIOScheduler(
+            jobstores={"default": self.jobstore_factory()},
+            job_defaults={"coalesce": True, "max_instances": 1, "misfire_grace_time": SCHEDULER_MISFIRE_GRACE},
+            timezone=PST
+        )
+        self._running = 0
+        self._idle.set()
+        scheduler.add_listener(self._track_run, EVENT_JOB_SUBMITTED | EVENT_JOB_EXECUTED | EVENT_JOB_ERROR | EVENT_JOB_MISSED)
+        # Jobs can only be looked up once the store is started, so start paused, add what is missing, then resume.
+        scheduler.start(paused=True)
+        self.configure(scheduler)
+        scheduler.resume()
+        self.scheduler = scheduler
+
+    def _track_run(self, event: JobEvent):
+        self._running += 1 if event.code == EVENT_JOB_SUBMITTED else -1
+        if self._running > 0:
+            self._idle.clear()
+        else:
+            self._idle.set()
+
+    def _stop_scheduler(self):
+        if self.scheduler is not None:
+            self.scheduler.shutdown(wait=False)
+            self.scheduler = None
+
+    async def _step(self):
+        if self.scheduler is None:
+            if await self.lock.acquire(blocking=False):
+                logger.info(f"{self.name} elected scheduler leader.")
+                self._start_scheduler()
+            return
+
+        try:
+            await self.lock.reacquire()
+        except LockError:
+            logger.warning(f"{self.name} lost scheduler leadership.")
+            self._stop_scheduler()
+
+    async def run(self):
+        while not self._stopping.is_set():
+            try:
+                await self._step()
+            except Exception as e:
+                # Without Redis there is no way to tell whether another process took over, so stand down.
+                logger.error(f"Scheduler leader election failed: {e}")
+                self._stop_scheduler()
+
+            try:
+                await asyncio.wait_for(self._stopping.wait(), self.ttl / 3)
+            except asyncio.TimeoutError:
+                pass
+
+    async def stop(self):
+        self._stopping.set()
+        was_leader = self.is_leader
+        if was_leader:
+            # Shutting down cancels runs in progress, so let them finish first. The lock was renewed at most ttl / 3
+            # ago, so it is still held while waiting.
+            self.scheduler.pause()
+            try:
+                await asyncio.wait_for(self._idle.wait(), self.ttl / 2)
+            except asyncio.TimeoutError:
+                logger.warning(f"{self.name} stopping with a job still running.")
+        self._stop_scheduler()
+        if was_leader:
+            try:
+                await self.lock.release()
+            except LockError:
+                pass
@@ -1,16 +1,59 @@
+import asyncio
 import os
-from supabase import create_client, Client
+from typing import Optional, Tuple
+from supabase import create_client, acreate_client, AsyncClient, AsyncClientOptions, Client
 
-# Read environment variables
-try:
-    SUPABASE_URL = os.environ["SUPABASE_URL"]
-    SUPABASE_KEY = os.environ["SUPABASE_KEY"]
-except KeyError as e:
-    raise RuntimeError(f"Missing required supabase environment variable: {e.args[0]}")
+# Clients are created on first use (or by the app's lifespan), so importing this module needs no credentials
+# and opens no connections.
+def supabase_settings() -> Tuple[str, str]:
+    try:
+        return os.environ["SUPABASE_URL"], os.environ["SUPABASE_KEY"]
+    except KeyError as e:
+        raise RuntimeError(f"Missing required supabase environment variable: {e.args[0]}")
 
-# Create a global Supabase client
-supabase_client = create_client(SUPABASE_URL, SUPABASE_KEY)
+# Sync client for code running outside the event loop (maintenance scripts)
+supabase_client: Optional[Client] = None
+
+# The async client is shared by every request. Its PostgREST and GoTrue sessions are pooled httpx clients speaking
+# HTTP/2, so requests multiplex over a few long-lived connections instead of opening new ones.
+async_supabase_client: Optional[AsyncClient] = None
+_async_client_lock = asyncio.Lock()
+
+async def create_async_supabase() -> AsyncClient:
+    url, key = supabase_settings()
+    return await acreate_client(
+        url,
+        key,
+        options=AsyncClientOptions(auto_refresh_token=False, persist_session=False)
+    )
+
+async def close_async_supabase():
+    global async_supabase_client
+    if async_supabase_client is None:
+        return
+
+    client, async_supabase_client = async_supabase_client, None
+    await client.postgrest.aclose()
+    await client.auth.close()
+
+async def check_supabase():
+    """
+    Creates the async client if needed and makes one cheap PostgREST round trip, opening its connection.
+    """
+    client = await get_supabase()
+    await client.table("profiles").select("id").limit(1).execute()
 
 # FastAPI dependency function
-def get_supabase() -> Client:
-    return supabase_client
\ No newline at end of file
+async def get_supabase() -> AsyncClient:
+    global async_supabase_client
+    if async_supabase_client is None:
+        async with _async_client_lock:
+            if async_supabase_client is None:
+                async_supabase_client = await create_async_supabase()
+    return async_supabase_client
+
+def get_sync_supabase() -> Client:
+    global supabase_client
+    if supabase_client is None:
+        supabase_client = create_client(*supabase_settings())
+    return supabase_client
@@ -0,0 +1,71 @@
+import logging
+import time
+from typing import Iterable, List, Optional
+from redis.asyncio import Redis
+from redis.asyncio.client import Pipeline
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "version"
+
+def schedule_version_key(user_id: str) -> str:
+    return f"{KEY_PREFIX}:schedule:{user_id}"
+
+def availability_version_key(role: str) -> str:
+    return f"{KEY_PREFIX}:availability:{role}"
+
+def bumped_versions(results: list, count: int) -> List[int]:
+    """
+    New values of the last `count` keys queued with `VersionStore.queue_bump`, from the pipeline's results.
+    """
+    # Each bump is a SET NX followed by the INCR whose reply is the new value.
+    return [int(value) for value in results[len(results) - 2 * count:][1::2]]
+
+class VersionStore:
+    """
+    Counters in Redis that every write bumps, so a read can tell whether its data changed (and answer a conditional
+    request) without going to the database. A missing counter is seeded from the clock rather than starting at 0,
+    so a flushed Redis never hands out a version an earlier ETag already used.
+    """
+    def __init__(self, redis: Redis):
+        self.redis = redis
+
+    async def get(self, keys: List[str]) -> Optional[List[int]]:
+        """
+        Current value of every key, or None when Redis can't be read (callers then skip conditional handling).
+        """
+        try:
+            values = await self.redis.mget(keys)
+            missing = [key for key, value in zip(keys, values) if value is None]
+            if missing:
+                pipe = self.redis.pipeline(transaction=False)
+                for key in missing:
+                    pipe.set(key, time.time_ns(), nx=True)
+                await pipe.execute()
+                values = await self.redis.mget(keys)
+            return [int(value) for value in values]
+        except Exception as e:
+            logger.warning(f"Version read failed: {e}")
+            return None
+
+    def queue_bump(self, pipe: Pipeline, keys: Iterable[str]):
+        """
+        Adds bumps of `keys` to a caller's pipeline, so they land together with the change they announce. Queue them
+        last: `bumped_versions` reads the new values off the end of the pipeline's results.
+        """
+        for key in dict.fromkeys(keys):
+            # Seeded like get() when missing, so INCR doesn't restart the counter from 1.
+            pipe.set(key, time.time_ns(), nx=True)
+            pipe.incr(key)
+
+    async def bump(self, keys: Iterable[str]):
+        keys = set(keys)
+        if not keys:
+            return
+
+        try:
+            pipe = self.redis.pipeline(transaction=False)
+            self.queue_bump(pipe, keys)
+            await pipe.execute()
+        except Exception as e:
+            logger.warning(f"Version bump failed: {e}")
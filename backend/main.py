@@ -1,12 +1,19 @@
 import os
+import asyncio
 from fastapi import FastAPI
 from contextlib import asynccontextmanager
-from apscheduler.schedulers.background import BackgroundScheduler
-from datetime import datetime
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 import logging
 from supabase import Client
-from db.supabase_client import get_supabase
+from db.supabase_client import check_supabase, close_async_supabase
+from db.redis_client import check_redis, close_redis, get_redis_client
+from db.maintenance import add_maintenance_jobs
+from db.live_updates import hub as live_hub
+from db.scheduler import LeaderScheduler, SCHEDULER_MODE
+from middleware.compression import GZipMiddleware
+from middleware.metrics import MetricsMiddleware, TimedJSONResponse
+from utils.metrics import registry
 import pytz
 
 from routes.v1.auth import router as auth_router
@@ -17,32 +24,47 @@ from routes.v1.roles import router as roles_router
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-scheduler = BackgroundScheduler()
-supabase = get_supabase()
 PST = pytz.timezone("America/Vancouver")
 
-def delete_expired_events():
-    logger.info(f"Running cleanup at {datetime.now()}")
-    try:
-        query = supabase.table("events").delete().lt("end_date", datetime.now(PST)).eq("event_type", "Temporary").execute()
-        logger.info(f"Deleted {len(query.data)} expired events.")
-    except Exception as e:
-        logger.error(f"Cleanup failed: {e}")
+STARTUP_CHECK_TIMEOUT = float(os.getenv("STARTUP_CHECK_TIMEOUT", "5"))
 
-scheduler.add_job(delete_expired_events, 'cron', day_of_week='sun', hour=0, minute=0, timezone='America/Vancouver')
+async def warm_up():
+    """
+    Creates the Supabase and Redis clients and opens their first connections in parallel, so the first requests
+    don't pay for it. A failed check is logged rather than fatal: the clients retry on the next request.
+    """
+    checks = {"supabase": check_supabase(), "redis": check_redis()}
+    results = await asyncio.gather(
+        *(asyncio.wait_for(check, STARTUP_CHECK_TIMEOUT) for check in checks.values()),
+        return_exceptions=True
+    )
+    for name, result in zip(checks, results):
+        if isinstance(result, BaseException):
+            logger.warning(f"Startup check for {name} failed: {result!r}")
+        else:
+            logger.info(f"Startup check for {name} passed.")
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    logger.info("Starting scheduler...")
-    scheduler.start()
-    logger.info("Scheduler started successfully!")
+    await warm_up()
+
+    leader = None
+    if SCHEDULER_MODE == "embedded":
+        logger.info("Starting scheduler...")
+        leader = LeaderScheduler(get_redis_client(), add_maintenance_jobs)
+        leader_task = asyncio.create_task(leader.run())
+        logger.info("Scheduler started successfully!")
     yield
-    logger.info("Shutting down scheduler...")
-    scheduler.shutdown()
-    logger.info("Scheduler shut down successfully!")
+    if leader:
+        logger.info("Shutting down scheduler...")
+        await leader.stop()
+        await leader_task
+        logger.info("Scheduler shut down successfully!")
+    await live_hub.close()
+    await asyncio.gather(close_async_supabase(), close_redis())
 
 logger.info("Starting app..")
-app = FastAPI(lifespan=lifespan)
+app = FastAPI(lifespan=lifespan, default_response_class=TimedJSONResponse)
 
 origin = os.getenv("FRONTEND_URL", "http://localhost:5173")
 
@@ -52,12 +74,22 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Slot-Count", "ETag", "X-Availability-Version"],
 )
 
+app.add_middleware(GZipMiddleware, minimum_size=1000)
+
+# Added last so it wraps everything else, including compression.
+app.add_middleware(MetricsMiddleware)
+
 @app.get("/")
 async def root():
     return {"message": "Welcome to the LCSC Scheduler!"}
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
 app.include_router(auth_router, prefix="/auth")
 app.include_router(schedule_router, prefix="/schedule")
 app.include_router(admin_router, prefix="/admin")
@@ -1,45 +1,193 @@
+import hashlib
+import json
+import logging
+import os
+import time
+from typing import List, Optional
+import httpx
 from fastapi import Depends, HTTPException, Request
-from supabase import Client
+from jose import JWTError, jwt
+from redis.asyncio import Redis
+from supabase import AsyncClient
 from db.supabase_client import get_supabase
+from db.redis_client import get_redis
+from models.auth import AuthenticatedUser
+from utils.cache import TTLCache
+from utils.concurrency import timed_call
+
+logger = logging.getLogger(__name__)
+
+# Tokens are verified locally when key material is available: the legacy shared secret (HS256) or the project's JWKS
+# for asymmetric keys. Anything else falls back to asking Supabase Auth. Each key source accepts only its own
+# algorithms, whatever the token's header claims.
+JWT_SECRET = os.getenv("SUPABASE_JWT_SECRET")
+JWKS_URL = os.getenv("SUPABASE_JWKS_URL") or f"{os.getenv('SUPABASE_URL', '').rstrip('/')}/auth/v1/.well-known/jwks.json"
+JWT_AUDIENCE = "authenticated"
+SECRET_ALGORITHMS = ["HS256"]
+JWKS_ALGORITHMS = ["RS256", "ES256"]
+
+TOKEN_CACHE_TTL = int(os.getenv("AUTH_TOKEN_CACHE_TTL", "300"))
+SHARED_ROLES_TTL = int(os.getenv("AUTH_SHARED_ROLES_TTL", "300"))
+PROFILE_CACHE_TTL = int(os.getenv("AUTH_PROFILE_CACHE_TTL", "60"))
+JWKS_TTL = 3600
+
+# Roles are only cached in Redis, never per worker: a revoked Admin role must stop working on every worker as soon as
+# assignRoles invalidates it, not once each worker's copy expires.
+token_cache = TTLCache(maxsize=10000, ttl=TOKEN_CACHE_TTL)
+jwks_cache = TTLCache(maxsize=1, ttl=JWKS_TTL)
 
 def get_token(request: Request) -> str:
     auth_header = request.headers.get("Authorization")
     if not auth_header:
         raise HTTPException(status_code=401, detail="Missing Authorization header")
-    
+
     scheme, _, token = auth_header.partition(" ")
     if scheme.lower() != "bearer" or not token:
         raise HTTPException(status_code=401, detail="Invalid authentication scheme")
-    
+
     return token
 
-def get_current_user(token: str = Depends(get_token), supabase: Client = Depends(get_supabase)):
+def _roles_key(user_id: str) -> str:
+    return f"auth:roles:{user_id}"
+
+def _profile_key(user_id: str) -> str:
+    return f"auth:profile:{user_id}"
+
+async def _get_jwks() -> Optional[dict]:
+    jwks = jwks_cache.get(JWKS_URL)
+    if jwks is None:
+        try:
+            async with httpx.AsyncClient(timeout=5) as client:
+                response = await client.get(JWKS_URL)
+                response.raise_for_status()
+                jwks = response.json()
+        except Exception as e:
+            logger.warning(f"Could not fetch JWKS: {e}")
+            jwks = {"keys": []}
+        jwks_cache.set(JWKS_URL, jwks, ttl=None if jwks.get("keys") else 60)
+    return jwks if jwks.get("keys") else None
+
+async def _decode_locally(token: str) -> Optional[dict]:
+    """
+    Returns the verified claims, or None when there is no key to verify this token with.
+    """
+    header = jwt.get_unverified_header(token)
+
+    # The header only picks the key source; the algorithms allowed are pinned to it.
+    if header.get("alg") in SECRET_ALGORITHMS:
+        key, algorithms = JWT_SECRET, SECRET_ALGORITHMS
+    else:
+        jwks = await _get_jwks()
+        key = jwks if jwks and any(k.get("kid") == header.get("kid") for k in jwks["keys"]) else None
+        algorithms = JWKS_ALGORITHMS
+
+    if not key:
+        return None
+
+    return jwt.decode(token, key, algorithms=algorithms, audience=JWT_AUDIENCE)
+
+async def verify_token(token: str, supabase: AsyncClient) -> AuthenticatedUser:
+    cache_key = hashlib.sha256(token.encode()).hexdigest()
+    user = token_cache.get(cache_key)
+    if user:
+        return user
+
     try:
-        result = supabase.auth.get_user(token)
-        
+        claims = await _decode_locally(token)
+    except JWTError as e:
+        raise HTTPException(status_code=401, detail=f"Invalid or expired token: {str(e)}")
+
+    if claims:
+        user = AuthenticatedUser(id=claims["sub"], email=claims.get("email"))
+        expires_at = claims.get("exp")
+    else:
+        result = await timed_call("auth.get_user", supabase.auth.get_user(token))
         if not result or not result.user:
             raise HTTPException(status_code=401, detail="Invalid or expired token")
 
-        return result.user
+        user = AuthenticatedUser(id=result.user.id, email=result.user.email)
+        expires_at = jwt.get_unverified_claims(token).get("exp")
+
+    token_cache.set(cache_key, user, ttl=expires_at - time.time() if expires_at else None)
+    return user
+
+async def get_user_roles(user_id: str, supabase: AsyncClient, redis: Optional[Redis] = None) -> List[str]:
+    roles = None
+    if redis is not None:
+        try:
+            shared = await redis.get(_roles_key(user_id))
+            if shared is not None:
+                roles = json.loads(shared)
+        except Exception as e:
+            logger.warning(f"Shared roles cache read failed: {e}")
+
+    if roles is None:
+        roles_query = await timed_call("auth.roles", supabase.table("user_roles").select("roles").eq("user_id", user_id).execute())
+        roles = roles_query.data[0].get("roles", []) if roles_query.data else []
+
+        if redis is not None:
+            try:
+                await redis.set(_roles_key(user_id), json.dumps(roles), ex=SHARED_ROLES_TTL)
+            except Exception as e:
+                logger.warning(f"Shared roles cache write failed: {e}")
+
+    return roles
+
+async def invalidate_user_roles(user_id: str, redis: Optional[Redis] = None):
+    if redis is not None:
+        try:
+            await redis.delete(_roles_key(user_id))
+        except Exception as e:
+            logger.warning(f"Shared roles cache invalidation failed: {e}")
+
+async def get_profile(user_id: str, supabase: AsyncClient, redis: Optional[Redis] = None) -> Optional[dict]:
+    """
+    The profile joined with its user_roles, as returned by login and verify. Kept in Redis for PROFILE_CACHE_TTL
+    seconds; role and verification changes drop it with invalidate_user_profile.
+    """
+    if redis is not None:
+        try:
+            shared = await redis.get(_profile_key(user_id))
+            if shared is not None:
+                return json.loads(shared)
+        except Exception as e:
+            logger.warning(f"Profile cache read failed: {e}")
+
+    profile_query = await timed_call("auth.profile", supabase.table("profiles").select("*, user_roles(*)").eq("id", user_id).single().execute())
+    profile = profile_query.data
+
+    if redis is not None and profile is not None:
+        try:
+            await redis.set(_profile_key(user_id), json.dumps(profile), ex=PROFILE_CACHE_TTL)
+        except Exception as e:
+            logger.warning(f"Profile cache write failed: {e}")
+
+    return profile
+
+async def invalidate_user_profile(user_id: str, redis: Optional[Redis] = None):
+    if redis is not None:
+        try:
+            await redis.delete(_profile_key(user_id))
+        except Exception as e:
+            logger.warning(f"Profile cache invalidation failed: {e}")
+
+async def get_current_user(token: str = Depends(get_token), supabase: AsyncClient = Depends(get_supabase)) -> AuthenticatedUser:
+    try:
+        return await verify_token(token, supabase)
 
     except Exception as e:
         raise HTTPException(status_code=401, detail=f"Error getting user: {str(e)}")
 
-def check_admin(token: str = Depends(get_token), supabase: Client = Depends(get_supabase)):
+async def check_admin(token: str = Depends(get_token), supabase: AsyncClient = Depends(get_supabase), redis: Redis = Depends(get_redis)) -> AuthenticatedUser:
     try:
-        result = supabase.auth.get_user(token)
-        
-        if not result or not result.user:
-            raise HTTPException(status_code=401, detail="Invalid or expired token")
-        
-        user_id = result.user.id
+        user = await verify_token(token, supabase)
 
-        roles_query = (supabase.table("user_roles").select("roles").eq("user_id", user_id).execute())
+        roles = await get_user_roles(user.id, supabase, redis)
 
-        if not roles_query.data or "Admin" not in roles_query.data[0].get("roles", []):
+        if "Admin" not in roles:
             raise HTTPException(status_code=403, detail="Access denied.")
 
-        return result.user
+        return user.model_copy(update={"roles": roles})
 
     except Exception as e:
-        raise HTTPException(status_code=401, detail=f"Error checking admin: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=401, detail=f"Error checking admin: {str(e)}")
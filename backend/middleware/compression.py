@@ -0,0 +1,15 @@
+from starlette.datastructures import Headers
+from starlette.middleware.gzip import GZipMiddleware as StarletteGZipMiddleware
+from starlette.types import Receive, Scope, Send
+
+class GZipMiddleware(StarletteGZipMiddleware):
+    """
+    Starlette's GZipMiddleware, minus event streams. It never flushes the compressor between chunks, so small events
+    would sit in it until a block's worth had built up instead of reaching the client. Requests that accept
+    text/event-stream (every EventSource does) are passed straight through.
+    """
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http" and "text/event-stream" in Headers(scope=scope).get("accept", ""):
+            await self.app(scope, receive, send)
+            return
+        await super().__call__(scope, receive, send)
@@ -0,0 +1,81 @@
+import os
+import time
+import uuid
+from fastapi.responses import JSONResponse
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from utils.cache import TTLCache
+from utils.metrics import RequestTimings, current_timings, registry, timed_phase
+from utils.profiling import SamplingProfiler
+
+# Sampling a request is opt-in twice over: the server must allow it and the request must ask with the header.
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "false").lower() == "true"
+PROFILE_HEADER = "x-profile"
+PROFILE_INTERVAL = float(os.getenv("PROFILE_INTERVAL", "0.005"))
+
+profiles = TTLCache(maxsize=50, ttl=3600)
+
+class TimedJSONResponse(JSONResponse):
+    """
+    JSONResponse that counts encoding towards the request's "serialize" phase.
+    """
+    def render(self, content) -> bytes:
+        with timed_phase("serialize"):
+            return super().render(content)
+
+def server_timing(timings: RequestTimings, total: float) -> str:
+    entries = [f"{phase};dur={seconds * 1000:.1f}" for phase, seconds in timings.phases.items()]
+    entries += [f'{name};desc="supabase";dur={seconds * 1000:.1f}' for name, seconds in timings.calls]
+    entries.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(entries)
+
+class MetricsMiddleware:
+    """
+    Times every request, reports the breakdown in a Server-Timing header and feeds the /metrics histograms.
+    With profiling enabled, a request sent with `X-Profile: 1` is sampled and gets an X-Profile-Id header;
+    the folded stacks are then served at /admin/profiles/{id}.
+    """
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings = RequestTimings()
+        token = current_timings.set(timings)
+        started = time.perf_counter()
+        status = 500
+
+        profiler, profile_id = None, None
+        if PROFILING_ENABLED and Headers(scope=scope).get(PROFILE_HEADER) == "1":
+            profiler, profile_id = SamplingProfiler(PROFILE_INTERVAL), uuid.uuid4().hex
+            profiler.start()
+
+        async def send_with_timing(message: Message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers = MutableHeaders(scope=message)
+                headers.append("Server-Timing", server_timing(timings, time.perf_counter() - started))
+                if profile_id:
+                    headers.append("X-Profile-Id", profile_id)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            elapsed = time.perf_counter() - started
+            route = scope.get("route")
+            path = route.path if route is not None else "unmatched"
+
+            registry.request_duration.observe(elapsed, scope["method"], path, str(status))
+            for phase, seconds in timings.phases.items():
+                registry.request_phase.observe(seconds, path, phase)
+
+            if profiler:
+                profiler.stop()
+                profiles.set(profile_id, profiler.folded())
+
+            current_timings.reset(token)
@@ -0,0 +1,73 @@
+import logging
+import os
+import time
+import uuid
+from fastapi import Depends, HTTPException, Request
+from redis.asyncio import Redis
+from db.redis_client import get_redis
+from utils.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
+RATE_LIMIT_WINDOW = float(os.getenv("RATE_LIMIT_WINDOW", "60"))
+# Behind a proxy every request comes from the proxy's address, so take the client from X-Forwarded-For instead.
+RATE_LIMIT_TRUST_PROXY = os.getenv("RATE_LIMIT_TRUST_PROXY", "false").lower() == "true"
+# How many proxies in front of the app append to X-Forwarded-For. Only their entries, counted from the right, can be
+# trusted: everything to their left was sent by the client.
+RATE_LIMIT_PROXY_HOPS = int(os.getenv("RATE_LIMIT_PROXY_HOPS", "1"))
+
+KEY_PREFIX = "ratelimit"
+
+# Sliding window log: one sorted-set member per request scored by its time. Trimming, counting and recording run
+# as one script, so concurrent workers can't both take the last slot.
+SLIDING_WINDOW = """
+local key, now, window, limit, member = KEYS[1], tonumber(ARGV[1]), tonumber(ARGV[2]), tonumber(ARGV[3]), ARGV[4]
+redis.call('ZREMRANGEBYSCORE', key, '-inf', now - window)
+local count = redis.call('ZCARD', key)
+if count >= limit then
+    local oldest = redis.call('ZRANGE', key, 0, 0, 'WITHSCORES')
+    return {0, tostring(tonumber(oldest[2]) + window - now)}
+end
+redis.call('ZADD', key, now, member)
+redis.call('PEXPIRE', key, math.ceil(window * 1000))
+return {1, tostring(limit - count - 1)}
+"""
+
+def client_address(request: Request) -> str:
+    if RATE_LIMIT_TRUST_PROXY:
+        # The address the outermost trusted proxy saw, which the client can't forge; a spoofed entry sits further left.
+        entries = [entry.strip() for entry in request.headers.get("x-forwarded-for", "").split(",") if entry.strip()]
+        if len(entries) >= RATE_LIMIT_PROXY_HOPS > 0:
+            return entries[-RATE_LIMIT_PROXY_HOPS]
+    return request.client.host if request.client else "unknown"
+
+class RateLimiter:
+    """
+    FastAPI dependency allowing `limit` requests per client address per sliding `window` seconds, counted in Redis
+    so the limit holds across workers. Over the limit it raises 429 with Retry-After. If Redis is unavailable the
+    request is let through rather than locking everyone out.
+    """
+    def __init__(self, name: str, limit: int, window: float = RATE_LIMIT_WINDOW):
+        self.name = name
+        self.limit = limit
+        self.window = window
+
+    async def __call__(self, request: Request, redis: Redis = Depends(get_redis)):
+        if not RATE_LIMIT_ENABLED or self.limit <= 0:
+            return
+
+        key = f"{KEY_PREFIX}:{self.name}:{client_address(request)}"
+        try:
+            allowed, value = await redis.eval(SLIDING_WINDOW, 1, key, time.time(), self.window, self.limit, uuid.uuid4().hex)
+        except Exception as e:
+            logger.warning(f"Rate limiter unavailable, allowing request: {e}")
+            return
+
+        if int(allowed):
+            registry.rate_limit.inc(self.name, "allowed")
+            return
+
+        registry.rate_limit.inc(self.name, "limited")
+        retry_after = max(1, int(float(value) + 0.999))
+        raise HTTPException(status_code=429, detail="Too many requests, try again later.", headers={"Retry-After": str(retry_after)})
@@ -1,4 +1,5 @@
 from pydantic import BaseModel, EmailStr 
+from typing import List, Optional
 
 class UserSignup(BaseModel):
     name: str
@@ -7,4 +8,9 @@ class UserSignup(BaseModel):
 
 class UserLogin(BaseModel):
     email: EmailStr
-    password: str
\ No newline at end of file
+    password: str
+
+class AuthenticatedUser(BaseModel):
+    id: str
+    email: Optional[str] = None
+    roles: Optional[List[str]] = None
\ No newline at end of file
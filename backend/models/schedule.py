@@ -17,6 +17,11 @@ class Event(BaseModel):
     color: str
     type: str
 
+class EventChanges(BaseModel):
+    added: List[Event] = []
+    changed: List[Event] = []
+    removed: List[str] = []
+
 class Availability(BaseModel):
     startDate: datetime
     endDate: datetime
@@ -1,108 +1,624 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
-from supabase import Client
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from fastapi.concurrency import run_in_threadpool
+from supabase import AsyncClient
+from redis.asyncio import Redis
 from db.supabase_client import get_supabase
+from db.redis_client import get_redis
+from db.availability_cache import AvailabilityCache, ALL_ROLES, stats as cache_stats, weeks_between
+from db.occupancy_store import AVAILABILITY_BACKEND, OccupancyStore
+from db.maintenance import stats as cleanup_stats
+from db.versions import VersionStore, availability_version_key
+from db.export import EXPORT_GZIP_LEVEL, EXPORT_TABLES, export_chunks
+from db.live_updates import LiveGrid, hub as live_hub
 from middleware.auth import check_admin
-from typing import List
+from typing import Dict, List, Literal, Tuple
 from models.schedule import Availability
-from datetime import datetime, timedelta
-import pytz
+from datetime import date, datetime, time, timedelta
+import asyncio
+import json
+import msgpack
+import numpy as np
 from typing import Optional
+from utils.availability import DAYS_PER_WEEK, build_grouped_occupancy, build_occupancy, iter_daily_counts, occupancy_from_counts, to_availability_slots, to_columnar, to_local_naive, validate_grid
+from utils.membership import SlotMembership, build_membership
+from utils.windows import rank_windows
+from utils.concurrency import fan_out, timed_call, stats as call_stats
+from utils.metrics import timed_phase
+from utils.conditional import CACHE_CONTROL, check_not_modified, make_etag
+from utils.export import gzip_chunks
+from utils.calendar import current_week, existing_slots, slot_bounds, today
+from middleware.metrics import profiles
 
 router = APIRouter()
 
-PST = pytz.timezone("America/Vancouver")
+HORIZON_DAYS = 28
+DAY_START_HOUR = 7
+DAY_END_HOUR = 20
+
+VALID_ROLES = ["Developer", "Volunteer", "President", "Events","Media"] # TODO
+
+# "list" is the original list of Availability objects; the others carry the same counts as one array per role.
+ResponseFormat = Literal["list", "columnar", "msgpack", "ndjson"]
+
+ExportTable = Literal["profiles", "user_roles", "events", "availability"]
+ExportFormat = Literal["ndjson", "csv"]
+
+def parse_mix(mix: List[str]) -> Dict[str, int]:
+    """
+    Parses "Role:count" entries (count defaults to 1) into how many of each role are needed.
+    """
+    needs = {}
+    for entry in mix:
+        role, _, count = entry.partition(":")
+        if role not in VALID_ROLES and role != ALL_ROLES:
+            raise HTTPException(status_code=400, detail=f"Invalid role: {role}")
+        if count and (not count.isdigit() or int(count) < 1):
+            raise HTTPException(status_code=400, detail=f"Invalid count for {role}: {count}")
+        needs[role] = needs.get(role, 0) + (int(count) if count else 1)
+    return needs
+
+def resolve_range(start_date: Optional[date], end_date: Optional[date]) -> Tuple[date, date, int]:
+    if start_date is None:
+        start_date = current_week()
+
+    if end_date is None:
+        end_date = start_date + timedelta(days=HORIZON_DAYS - 1)
+
+    return start_date, end_date, (end_date - start_date).days + 1
+
+def overlapping_events_filter(window_start: datetime, window_end: datetime) -> str:
+    """
+    PostgREST `or` filter for events that can cover part of [window_start, window_end): every Permanent event, and
+    Temporary events overlapping the window.
+    """
+    return f"start_date.is.null, and(start_date.lt.'{window_end.isoformat()}', end_date.gt.'{window_start.isoformat()}')"
+
+def split_weeks(occupancy: np.ndarray, weeks: List[date]) -> Dict[date, np.ndarray]:
+    """
+    Cuts a grid that starts on weeks[0] into per-week grids for the given weeks.
+    """
+    grids = {}
+    for week in weeks:
+        offset = (week - weeks[0]).days
+        grids[week] = occupancy[offset:offset + DAYS_PER_WEEK]
+    return grids
+
+def join_weeks(grids: Dict[date, np.ndarray], weeks: List[date], start_date: date, days: int) -> np.ndarray:
+    offset = (start_date - weeks[0]).days
+    return np.concatenate([grids[week] for week in weeks])[offset:offset + days]
+
+def render_grids(format: ResponseFormat, grids: Dict[str, Tuple[int, np.ndarray]], window_start: datetime, slot_minutes: int, start_hour: int, end_hour: int, headers: Dict[str, str], single: bool = False) -> Response:
+    """
+    Serializes grids in one of the compact formats, skipping per-slot model validation.
+    """
+    if format == "ndjson":
+        def lines():
+            for role, (max_people, occupancy) in grids.items():
+                for record in iter_daily_counts(occupancy, window_start, max_people, role, slot_minutes, start_hour, end_hour):
+                    yield json.dumps(record, separators=(",", ":")) + "\n"
+
+        return StreamingResponse(lines(), media_type="application/x-ndjson", headers=headers)
+
+    payload = {role: to_columnar(occupancy, window_start, max_people, role, slot_minutes, start_hour, end_hour) for role, (max_people, occupancy) in grids.items()}
+    if single:
+        payload = next(iter(payload.values()))
+
+    if format == "msgpack":
+        return Response(msgpack.packb(payload), media_type="application/msgpack", headers=headers)
+
+    return JSONResponse(payload, headers=headers)
+
+async def fetch_occupancy(supabase: AsyncClient, redis: Redis, role: Optional[str], start_date: date, days: int, slot_minutes: int):
+    if AVAILABILITY_BACKEND == "materialized":
+        materialized = await OccupancyStore(redis).get(role or ALL_ROLES, start_date, days, slot_minutes)
+        if materialized is not None:
+            return materialized
+    if AVAILABILITY_BACKEND in ("rpc", "materialized"):
+        return await fetch_occupancy_rpc(supabase, role, start_date, days, slot_minutes)
+    return await fetch_occupancy_rows(supabase, role, start_date, days, slot_minutes)
+
+async def fetch_occupancy_rpc(supabase: AsyncClient, role: Optional[str], start_date: date, days: int, slot_minutes: int):
+    params = {
+        "_role": role,
+        "_window_start": datetime.combine(start_date, time.min).isoformat(),
+        "_days": days,
+        "_slot_minutes": slot_minutes
+    }
+    result = await timed_call("admin.availability_rpc", supabase.rpc("get_availability_counts", params).execute())
+
+    if result.data is None:
+        raise HTTPException(status_code=500, detail="Database error")
+
+    return result.data["max_people"], occupancy_from_counts(result.data["slots"], days, slot_minutes)
+
+async def fetch_occupancy_rows(supabase: AsyncClient, role: Optional[str], start_date: date, days: int, slot_minutes: int):
+    window_start = datetime.combine(start_date, time.min)
+    events_filter = overlapping_events_filter(window_start, window_start + timedelta(days=days))
+
+    if role:
+        profiles_query = supabase.table("profiles").select("*, user_roles!inner(*)").eq("verified", True).filter("user_roles.roles", "cs", f'{{"{role}"}}')
+        events_query = supabase.table("events").select("*, profiles!inner(*, user_roles!inner(*))").filter("profiles.user_roles.roles", "cs", f'{{"{role}"}}').or_(events_filter) # TODO
+    else:
+        profiles_query = supabase.table("profiles").select("name").eq("verified", True)
+        events_query = supabase.table("events").select("*, profiles(*, user_roles(*))").or_(events_filter) # TODO
+
+    results = await fan_out({"admin.profiles": profiles_query.execute(), "admin.events": events_query.execute()})
+    member_rows, events = results["admin.profiles"].data, results["admin.events"].data
+
+    max_people = len(member_rows) if member_rows else 0
+    with timed_phase("compute"):
+        occupancy = await run_in_threadpool(build_occupancy, events, window_start, days, slot_minutes)
+
+    return max_people, occupancy
+
+async def fetch_role_occupancies(supabase: AsyncClient, redis: Redis, roles: List[str], start_date: date, days: int, slot_minutes: int) -> Dict[str, Tuple[int, np.ndarray]]:
+    """
+    Computes the grid of every requested role (ALL_ROLES meaning everyone) from a single fetch of events and roles.
+    """
+    if AVAILABILITY_BACKEND == "materialized":
+        store = OccupancyStore(redis)
+        materialized = await asyncio.gather(*(store.get(role, start_date, days, slot_minutes) for role in roles))
+        if all(result is not None for result in materialized):
+            return dict(zip(roles, materialized))
+
+    window_start = datetime.combine(start_date, time.min)
+    events_filter = overlapping_events_filter(window_start, window_start + timedelta(days=days))
+
+    results = await fan_out({
+        "admin.profiles": supabase.table("profiles").select("id").eq("verified", True).execute(),
+        "admin.user_roles": supabase.table("user_roles").select("user_id, roles").execute(),
+        "admin.events": supabase.table("events").select("user_id, event_type, start_date, end_date, start_time, end_time, day_of_week").or_(events_filter).execute()
+    })
+
+    roles_by_user = {}
+    for row in results["admin.user_roles"].data or []:
+        roles_by_user.setdefault(row["user_id"], set()).update(row["roles"])
+
+    role_index = {role: index for index, role in enumerate(roles)}
+    groups_by_user = {}
+
+    def groups_for(user_id: str) -> List[int]:
+        if user_id not in groups_by_user:
+            groups = [role_index[role] for role in roles_by_user.get(user_id, ()) if role in role_index]
+            if ALL_ROLES in role_index:
+                groups.append(role_index[ALL_ROLES])
+            groups_by_user[user_id] = groups
+        return groups_by_user[user_id]
+
+    events = results["admin.events"].data or []
+    event_groups = [groups_for(event["user_id"]) for event in events]
+    with timed_phase("compute"):
+        grids = await run_in_threadpool(build_grouped_occupancy, events, event_groups, len(roles), window_start, days, slot_minutes)
+
+    verified = [profile["id"] for profile in results["admin.profiles"].data or []]
+    occupancies = {}
+    for role, index in role_index.items():
+        max_people = len(verified) if role == ALL_ROLES else sum(1 for user_id in verified if role in roles_by_user.get(user_id, ()))
+        occupancies[role] = (max_people, grids[index])
+
+    return occupancies
+
+async def fetch_membership(supabase: AsyncClient, role: Optional[str], start_date: date, days: int, slot_minutes: int) -> Tuple[Dict[str, dict], SlotMembership]:
+    """
+    Builds who-is-free bitsets for the verified members (of `role`, when given) over the range.
+    Returns their profiles keyed by id alongside.
+    """
+    window_start = datetime.combine(start_date, time.min)
+    events_filter = overlapping_events_filter(window_start, window_start + timedelta(days=days))
+
+    calls = {
+        "admin.profiles": supabase.table("profiles").select("id, name, email").eq("verified", True).execute(),
+        "admin.events": supabase.table("events").select("user_id, event_type, start_date, end_date, start_time, end_time, day_of_week").or_(events_filter).execute()
+    }
+    if role:
+        calls["admin.user_roles"] = supabase.table("user_roles").select("user_id").filter("roles", "cs", f'{{"{role}"}}').execute()
+
+    results = await fan_out(calls)
+
+    members = {profile["id"]: profile for profile in results["admin.profiles"].data or []}
+    if role:
+        holders = {row["user_id"] for row in results["admin.user_roles"].data or []}
+        members = {user_id: profile for user_id, profile in members.items() if user_id in holders}
+
+    with timed_phase("compute"):
+        membership = await run_in_threadpool(build_membership, results["admin.events"].data or [], list(members), window_start, days, slot_minutes)
+
+    return members, membership
+
+async def load_role_occupancies(supabase: AsyncClient, redis: Redis, roles: List[str], start_date: date, end_date: date, slot_minutes: int) -> Dict[str, Tuple[int, np.ndarray]]:
+    """
+    Grids of every role over [start_date, end_date], served from the per-week cache where possible.
+    """
+    cache = AvailabilityCache(redis)
+    weeks = weeks_between(start_date, end_date)
+    cached = await asyncio.gather(*(cache.get(role, weeks, slot_minutes) for role in roles))
+    occupancies = dict(zip(roles, cached))
+
+    # Every role with a cache gap is recomputed together, over the span covering all of their missing weeks.
+    generations = {role: generation for role, (generation, _, _) in occupancies.items()}
+    occupancies = {role: (max_people, grids) for role, (_, max_people, grids) in occupancies.items()}
+    missing = {role: [week for week in weeks if week not in grids] for role, (_, grids) in occupancies.items()}
+    missing = {role: role_weeks for role, role_weeks in missing.items() if role_weeks}
+
+    if missing:
+        span_start = min(role_weeks[0] for role_weeks in missing.values())
+        span_end = max(role_weeks[-1] for role_weeks in missing.values())
+        span_weeks = weeks_between(span_start, span_end)
+        computed = await fetch_role_occupancies(supabase, redis, list(missing), span_start, len(span_weeks) * DAYS_PER_WEEK, slot_minutes)
+
+        for role, (max_people, occupancy) in computed.items():
+            role_grids = {week: grid for week, grid in split_weeks(occupancy, span_weeks).items() if week in missing[role]}
+            occupancies[role][1].update(role_grids)
+            occupancies[role] = (max_people, occupancies[role][1])
+            await cache.set(role, generations[role], max_people, role_grids, slot_minutes)
+
+    days = (end_date - start_date).days + 1
+    return {role: (max_people, join_weeks(grids, weeks, start_date, days)) for role, (max_people, grids) in occupancies.items()}
 
 @router.get("/")
-def get_availabilities(role: Optional[str] = Query(None, description="Role to filter by"), supabase: Client = Depends(get_supabase), admin_user = Depends(check_admin) ) -> List[Availability]:
+async def get_availabilities(
+    response: Response,
+    role: Optional[str] = Query(None, description="Role to filter by"),
+    slot_minutes: int = Query(60, description="Slot size in minutes"),
+    start_hour: int = Query(DAY_START_HOUR, description="Hour each day's window starts at"),
+    end_hour: int = Query(DAY_END_HOUR, description="Hour each day's window ends at"),
+    start_date: Optional[date] = Query(None, description="First day of the range, defaults to the start of this week"),
+    end_date: Optional[date] = Query(None, description="Last day of the range (inclusive), defaults to four weeks after start_date"),
+    format: ResponseFormat = Query("list", description="Response format"),
+    if_none_match: Optional[str] = Header(None),
+    supabase: AsyncClient = Depends(get_supabase),
+    redis: Redis = Depends(get_redis),
+    admin_user = Depends(check_admin)
+) -> List[Availability]:
     try:
-        VALID_ROLES = ["Developer", "Volunteer", "President", "Events","Media"] # TODO
-
         if role and role not in VALID_ROLES:
             raise HTTPException(status_code=400, detail="Invalid role.")
 
-        today = datetime.now(PST)
-
-        beginning_of_week = today - timedelta(days=today.weekday() + 1)
-        beginning_of_week = beginning_of_week.replace(hour=0, minute=0, second=0, microsecond=0)
-
-        end_of_week = beginning_of_week + timedelta(days=7)
-        end_of_week = end_of_week.replace(hour=23, minute=59, second=59, microsecond=999999)
-
-        end_of_month = beginning_of_week + timedelta(days=28)
-        end_of_month = end_of_month.replace(hour=23, minute=59, second=59, microsecond=999999)
-
-        prev_sunday = beginning_of_week.isoformat()
-        next_saturday = end_of_week.isoformat()
-        last_saturday = end_of_month.isoformat()
-
-        if role:
-            profiles_query = supabase.table("profiles").select("*, user_roles!inner(*)").eq("verified", True).filter("user_roles.roles", "cs", f'{{"{role}"}}').execute()
-            events_query = supabase.table("events").select("*, profiles!inner(*, user_roles!inner(*))").filter("profiles.user_roles.roles", "cs", f'{{"{role}"}}').or_(f"start_date.is.null, and(start_date.gte.'{prev_sunday}', start_date.lte.'{last_saturday}')").execute() # TODO
-        else:
-            profiles_query = supabase.table("profiles").select("name").eq("verified", True).execute()
-            events_query = supabase.table("events").select("*, profiles(*, user_roles(*))").or_(f"start_date.is.null, and(start_date.gte.'{prev_sunday}', start_date.lte.'{last_saturday}')").execute() # TODO
-
-        print(profiles_query) # TODO
-        max_people = len(profiles_query.data) if profiles_query.data else 0
-        events = events_query.data
-        
-        slot_event_perm_counts = {}
-        slot_event_temp_counts = {}
-
-        slot_unavailable_profiles = {}
-
-        for event in events:
-            if event.get("event_type") == "Permanent" and event["start_time"] and event["end_time"] and event["day_of_week"] is not None:
-                event_day = beginning_of_week + timedelta(days=event["day_of_week"])
-
-                event_start_time = datetime.strptime(event["start_time"], "%H:%M:%S").time()
-                event_end_time = datetime.strptime(event["end_time"], "%H:%M:%S").time()
-
-                event_start = PST.localize(datetime.combine(event_day.date(), event_start_time))
-                event_end = PST.localize(datetime.combine(event_day.date(), event_end_time))
-
-                slot_time = event_start
-                while slot_time < event_end:
-                    slot_key = slot_time
-                    slot_event_perm_counts[slot_key] = slot_event_perm_counts.get(slot_key, 0) + 1
-                    slot_time += timedelta(hours=1)                
-
-            elif event["event_type"] == "Temporary" and event["start_date"] and event["end_date"]:
-                event_start = PST.localize(datetime.fromisoformat(event["start_date"]))
-                event_end = PST.localize(datetime.fromisoformat(event["end_date"]))
-
-                slot_time = event_start
-                while slot_time < event_end:
-                    slot_key = slot_time
-                    slot_event_temp_counts[slot_key] = slot_event_temp_counts.get(slot_key, 0) + 1
-                    slot_time += timedelta(hours=1)
-
-            else:
-                continue
-
-        availability_slots = []
-        for day in range(28):
-            current_week_day = beginning_of_week + timedelta(days=(day%7))
-            current_day = beginning_of_week + timedelta(days=day)
-            for hour in range(7, 20):
-                slot_start = current_day.replace(hour=hour, minute=0, second=0, microsecond=0)
-                slot_week_start = current_week_day.replace(hour=hour, minute=0, second=0, microsecond=0)
-
-                slot_end = current_day.replace(hour=hour+1, minute=0, second=0, microsecond=0)
-                
-                events_overlapping = slot_event_temp_counts.get(slot_start, 0) + slot_event_perm_counts.get(slot_week_start, 0)
-                
-                available_count = max_people - events_overlapping
-
-                availability_slots.append({
-                    "startDate": slot_start,
-                    "endDate": slot_end,
-                    "numberOfPeople": available_count,
-                    "maxPeopleAvailable": max_people,
-                    "role": role if role else "All"
-                })
+        start_date, end_date, days = resolve_range(start_date, end_date)
+
+        slot_count = validate_grid(days, slot_minutes, start_hour, end_hour)
+
+        headers = {"X-Slot-Count": str(slot_count)}
+        versions = await VersionStore(redis).get([availability_version_key(role or ALL_ROLES)])
+        if versions is not None:
+            etag = make_etag("admin", role, versions, start_date, end_date, slot_minutes, start_hour, end_hour, format)
+            not_modified = check_not_modified("/admin/", if_none_match, etag)
+            if not_modified:
+                return not_modified
+            # Read before the grid, so /admin/live events above it are the changes the grid doesn't have yet.
+            headers.update({"ETag": etag, "Cache-Control": CACHE_CONTROL, "X-Availability-Version": str(versions[0])})
+
+        # Grids are cached per whole week, so compute the weeks covering the range and slice the requested days out.
+        cache = AvailabilityCache(redis)
+        weeks = weeks_between(start_date, end_date)
+        generation, max_people, grids = await cache.get(role or ALL_ROLES, weeks, slot_minutes)
+
+        missing = [week for week in weeks if week not in grids]
+        if missing:
+            span_days = (missing[-1] - missing[0]).days + DAYS_PER_WEEK
+            max_people, occupancy = await fetch_occupancy(supabase, redis, role, missing[0], span_days, slot_minutes)
+
+            computed = split_weeks(occupancy, missing)
+            grids.update(computed)
+            await cache.set(role or ALL_ROLES, generation, max_people, computed, slot_minutes)
+
+        occupancy = join_weeks(grids, weeks, start_date, days)
+
+        window_start = datetime.combine(start_date, time.min)
+
+        if format != "list":
+            grids = {role or ALL_ROLES: (max_people, occupancy)}
+            with timed_phase("serialize"):
+                return render_grids(format, grids, window_start, slot_minutes, start_hour, end_hour, headers, single=True)
+
+        with timed_phase("serialize"):
+            availability_slots = to_availability_slots(occupancy, window_start, max_people, role, slot_minutes, start_hour, end_hour)
+
+        response.headers.update(headers)
 
         return availability_slots
 
     except Exception as e:
-        raise HTTPException(status_code=400, detail=f"Error getting availabilities: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=400, detail=f"Error getting availabilities: {str(e)}")
+
+@router.get("/roles")
+async def get_role_availabilities(
+    response: Response,
+    roles: Optional[List[str]] = Query(None, description="Roles to compute, \"All\" for everyone; every role when omitted"),
+    slot_minutes: int = Query(60, description="Slot size in minutes"),
+    start_hour: int = Query(DAY_START_HOUR, description="Hour each day's window starts at"),
+    end_hour: int = Query(DAY_END_HOUR, description="Hour each day's window ends at"),
+    start_date: Optional[date] = Query(None, description="First day of the range, defaults to the start of this week"),
+    end_date: Optional[date] = Query(None, description="Last day of the range (inclusive), defaults to four weeks after start_date"),
+    format: ResponseFormat = Query("list", description="Response format"),
+    if_none_match: Optional[str] = Header(None),
+    supabase: AsyncClient = Depends(get_supabase),
+    redis: Redis = Depends(get_redis),
+    admin_user = Depends(check_admin)
+) -> Dict[str, List[Availability]]:
+    try:
+        roles = list(dict.fromkeys(roles)) if roles else VALID_ROLES + [ALL_ROLES]
+
+        if any(role not in VALID_ROLES and role != ALL_ROLES for role in roles):
+            raise HTTPException(status_code=400, detail="Invalid role.")
+
+        start_date, end_date, days = resolve_range(start_date, end_date)
+
+        slot_count = validate_grid(days * len(roles), slot_minutes, start_hour, end_hour)
+
+        headers = {"X-Slot-Count": str(slot_count)}
+        versions = await VersionStore(redis).get([availability_version_key(role) for role in roles])
+        if versions is not None:
+            etag = make_etag("admin.roles", roles, versions, start_date, end_date, slot_minutes, start_hour, end_hour, format)
+            not_modified = check_not_modified("/admin/roles", if_none_match, etag)
+            if not_modified:
+                return not_modified
+            headers.update({"ETag": etag, "Cache-Control": CACHE_CONTROL})
+
+        joined = await load_role_occupancies(supabase, redis, roles, start_date, end_date, slot_minutes)
+
+        window_start = datetime.combine(start_date, time.min)
+
+        if format != "list":
+            with timed_phase("serialize"):
+                return render_grids(format, joined, window_start, slot_minutes, start_hour, end_hour, headers)
+
+        availability = {}
+        with timed_phase("serialize"):
+            for role, (max_people, occupancy) in joined.items():
+                availability[role] = to_availability_slots(occupancy, window_start, max_people, role, slot_minutes, start_hour, end_hour)
+
+        response.headers.update(headers)
+
+        return availability
+
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Error getting availabilities: {str(e)}")
+
+@router.get("/free")
+async def get_free_members(
+    at: datetime = Query(..., description="A moment inside the slot, local time unless it carries an offset"),
+    role: Optional[str] = Query(None, description="Role to filter by"),
+    slot_minutes: int = Query(60, description="Slot size in minutes"),
+    supabase: AsyncClient = Depends(get_supabase),
+    admin_user = Depends(check_admin)
+):
+    try:
+        if role and role not in VALID_ROLES:
+            raise HTTPException(status_code=400, detail="Invalid role.")
+
+        validate_grid(1, slot_minutes, 0, 24)
+
+        at = to_local_naive(at)
+        day_start = datetime.combine(at.date(), time.min)
+        slot = (at - day_start) // timedelta(minutes=slot_minutes)
+
+        members, membership = await fetch_membership(supabase, role, at.date(), 1, slot_minutes)
+
+        slot_start, slot_end = slot_bounds(at.date(), slot, slot_minutes)
+        return {
+            "startDate": slot_start,
+            "endDate": slot_end,
+            "role": role if role else "All",
+            "maxPeopleAvailable": len(members),
+            "people": [members[user_id] for user_id in membership.free_at(slot)]
+        }
+
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Error getting free members: {str(e)}")
+
+@router.get("/best-times")
+async def get_best_times(
+    user_ids: List[str] = Query(..., description="Members who should attend"),
+    role: Optional[str] = Query(None, description="Role to filter by"),
+    slot_minutes: int = Query(60, description="Slot size in minutes"),
+    start_hour: int = Query(DAY_START_HOUR, description="Hour each day's window starts at"),
+    end_hour: int = Query(DAY_END_HOUR, description="Hour each day's window ends at"),
+    start_date: Optional[date] = Query(None, description="First day of the range, defaults to the start of this week"),
+    end_date: Optional[date] = Query(None, description="Last day of the range (inclusive), defaults to four weeks after start_date"),
+    limit: int = Query(10, ge=1, le=100, description="Number of slots to return"),
+    supabase: AsyncClient = Depends(get_supabase),
+    admin_user = Depends(check_admin)
+):
+    try:
+        if role and role not in VALID_ROLES:
+            raise HTTPException(status_code=400, detail="Invalid role.")
+
+        start_date, end_date, days = resolve_range(start_date, end_date)
+
+        validate_grid(days, slot_minutes, start_hour, end_hour)
+
+        members, membership = await fetch_membership(supabase, role, start_date, days, slot_minutes)
+
+        required = list(dict.fromkeys(user_ids))
+        unknown = [user_id for user_id in required if user_id not in members]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Not verified members{f' with role {role}' if role else ''}: {', '.join(unknown)}")
+
+        with timed_phase("compute"):
+            ranked = membership.best_slots(required, limit, start_hour, end_hour, existing_slots(start_date, days, slot_minutes).ravel())
+
+        best = []
+        for slot, required_free, total_free in ranked:
+            slot_start, slot_end = slot_bounds(start_date, slot, slot_minutes)
+            free = set(membership.free_at(slot))
+            best.append({
+                "startDate": slot_start,
+                "endDate": slot_end,
+                "requiredAvailable": required_free,
+                "requiredCount": len(required),
+                "missing": [user_id for user_id in required if user_id not in free],
+                "numberOfPeople": total_free,
+                "maxPeopleAvailable": len(members)
+            })
+
+        return best
+
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Error finding best times: {str(e)}")
+
+@router.get("/windows")
+async def get_best_windows(
+    duration_minutes: int = Query(..., description="Length of the meeting or shift"),
+    mix: List[str] = Query(..., description="Roles needed as Role:count, e.g. mix=Developer:2&mix=Media:1"),
+    slot_minutes: int = Query(60, description="Slot size in minutes"),
+    start_hour: int = Query(DAY_START_HOUR, description="Hour each day's window starts at"),
+    end_hour: int = Query(DAY_END_HOUR, description="Hour each day's window ends at"),
+    start_date: Optional[date] = Query(None, description="First day of the range, defaults to the start of this week"),
+    end_date: Optional[date] = Query(None, description="Last day of the range (inclusive), defaults to four weeks after start_date"),
+    limit: int = Query(10, ge=1, le=100, description="Number of windows to return"),
+    supabase: AsyncClient = Depends(get_supabase),
+    redis: Redis = Depends(get_redis),
+    admin_user = Depends(check_admin)
+):
+    try:
+        needs = parse_mix(mix)
+
+        start_date, end_date, days = resolve_range(start_date, end_date)
+
+        validate_grid(days, slot_minutes, start_hour, end_hour)
+
+        if duration_minutes < 1 or duration_minutes % slot_minutes:
+            raise HTTPException(status_code=400, detail="Duration must be a positive multiple of the slot size.")
+
+        occupancies = await load_role_occupancies(supabase, redis, list(needs), start_date, end_date, slot_minutes)
+
+        first_slot = start_hour * 60 // slot_minutes
+        last_slot = end_hour * 60 // slot_minutes
+
+        with timed_phase("compute"):
+            # A window running through an hour the clock skips is shorter than it looks, so nobody counts as free there.
+            exists = existing_slots(start_date, days, slot_minutes)[:, first_slot:last_slot]
+            available = {role: np.where(exists, max_people - occupancy[:, first_slot:last_slot], 0) for role, (max_people, occupancy) in occupancies.items()}
+            ranked = rank_windows(available, needs, duration_minutes // slot_minutes, limit)
+
+        windows = []
+        for day, start, coverage, free in ranked:
+            window_begin, window_end = slot_bounds(start_date + timedelta(days=day), first_slot + start, slot_minutes, duration_minutes)
+            windows.append({
+                "startDate": window_begin,
+                "endDate": window_end,
+                "coverage": coverage,
+                "roles": {role: {"needed": needs[role], "available": free[role], "maxPeopleAvailable": occupancies[role][0]} for role in needs}
+            })
+
+        return windows
+
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Error finding windows: {str(e)}")
+
+@router.get("/export")
+async def export_data(
+    tables: Optional[List[ExportTable]] = Query(None, description="Tables to export, in order; profiles, user_roles and events when omitted. \"availability\" adds the grids of `roles` over the date range"),
+    format: ExportFormat = Query("ndjson", description="Export format; CSV holds one table"),
+    compress: bool = Query(False, alias="gzip", description="Gzip the export"),
+    roles: Optional[List[str]] = Query(None, description="Roles whose grids to include, \"All\" for everyone; every role when omitted"),
+    slot_minutes: int = Query(60, description="Slot size in minutes"),
+    start_hour: int = Query(DAY_START_HOUR, description="Hour each day's window starts at"),
+    end_hour: int = Query(DAY_END_HOUR, description="Hour each day's window ends at"),
+    start_date: Optional[date] = Query(None, description="First day of the range, defaults to the start of this week"),
+    end_date: Optional[date] = Query(None, description="Last day of the range (inclusive), defaults to four weeks after start_date"),
+    supabase: AsyncClient = Depends(get_supabase),
+    redis: Redis = Depends(get_redis),
+    admin_user = Depends(check_admin)
+):
+    try:
+        tables = list(dict.fromkeys(tables)) if tables else list(EXPORT_TABLES)
+
+        if format == "csv" and len(tables) > 1:
+            raise HTTPException(status_code=400, detail="CSV exports one table at a time.")
+
+        grids = None
+        window_start = None
+        if "availability" in tables:
+            roles = list(dict.fromkeys(roles)) if roles else VALID_ROLES + [ALL_ROLES]
+
+            if any(role not in VALID_ROLES and role != ALL_ROLES for role in roles):
+                raise HTTPException(status_code=400, detail="Invalid role.")
+
+            start_date, end_date, days = resolve_range(start_date, end_date)
+
+            validate_grid(days * len(roles), slot_minutes, start_hour, end_hour)
+
+            # Grids are ready before the first byte goes out, so their errors still come back as a 400.
+            grids = await load_role_occupancies(supabase, redis, roles, start_date, end_date, slot_minutes)
+            window_start = datetime.combine(start_date, time.min)
+
+        chunks = export_chunks(supabase, tables, format, grids, window_start, slot_minutes, start_hour, end_hour)
+
+        extension = "csv" if format == "csv" else "ndjson"
+        headers = {"Content-Disposition": f'attachment; filename="export-{today().isoformat()}.{extension}"'}
+
+        # Compressed here rather than by GZipMiddleware, which skips responses that already carry a Content-Encoding:
+        # the level is ours to pick, and a client that asked for gzip gets it whatever its Accept-Encoding says.
+        if compress:
+            chunks = gzip_chunks(chunks, EXPORT_GZIP_LEVEL)
+            headers["Content-Encoding"] = "gzip"
+
+        return StreamingResponse(chunks, media_type="text/csv" if format == "csv" else "application/x-ndjson", headers=headers)
+
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Error exporting data: {str(e)}")
+
+@router.get("/live")
+async def stream_availability(
+    role: Optional[str] = Query(None, description="Role to follow"),
+    slot_minutes: int = Query(60, description="Slot size in minutes"),
+    start_hour: int = Query(DAY_START_HOUR, description="Hour each day's window starts at"),
+    end_hour: int = Query(DAY_END_HOUR, description="Hour each day's window ends at"),
+    start_date: Optional[date] = Query(None, description="First day of the range, defaults to the start of this week"),
+    end_date: Optional[date] = Query(None, description="Last day of the range (inclusive), defaults to four weeks after start_date"),
+    redis: Redis = Depends(get_redis),
+    admin_user = Depends(check_admin)
+):
+    """
+    Server-sent events with the changes to the grid /admin/?format=columnar returns for the same parameters, as runs
+    over its `counts` array. Load that grid after the `ready` event, apply each `availability` event whose `version` is
+    above the grid's X-Availability-Version to it, and reload it on `resync`.
+    """
+    try:
+        if role and role not in VALID_ROLES:
+            raise HTTPException(status_code=400, detail="Invalid role.")
+
+        start_date, end_date, days = resolve_range(start_date, end_date)
+
+        validate_grid(days, slot_minutes, start_hour, end_hour)
+
+        subscription = live_hub.subscribe(redis, LiveGrid(role or ALL_ROLES, slot_minutes, start_date, days, start_hour, end_hour))
+        if subscription is None:
+            return JSONResponse(status_code=503, content={"detail": "Too many live connections."}, headers={"Retry-After": "30"})
+
+        # X-Accel-Buffering stops nginx-style proxies from holding events back.
+        headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+        return StreamingResponse(live_hub.stream(subscription, redis), media_type="text/event-stream", headers=headers)
+
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Error opening live updates: {str(e)}")
+
+@router.get("/live/stats")
+async def get_live_stats(admin_user = Depends(check_admin)):
+    return live_hub.stats.as_dict()
+
+
+@router.get("/cache")
+async def get_cache_stats(admin_user = Depends(check_admin)):
+    return cache_stats.as_dict()
+
+
+@router.get("/timings")
+async def get_call_timings(admin_user = Depends(check_admin)):
+    return call_stats.as_dict()
+
+
+@router.get("/maintenance")
+async def get_maintenance_stats(admin_user = Depends(check_admin)):
+    return cleanup_stats.as_dict()
+
+
+@router.get("/profiles/{profile_id}")
+async def get_profile(profile_id: str, admin_user = Depends(check_admin)):
+    folded = profiles.get(profile_id)
+    if folded is None:
+        raise HTTPException(status_code=404, detail="Profile not found.")
+    return PlainTextResponse(folded)
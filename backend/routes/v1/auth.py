@@ -1,14 +1,24 @@
 from fastapi import APIRouter, Depends, HTTPException, Response, Request
-from supabase import Client
+from supabase import AsyncClient
+from redis.asyncio import Redis
 from db.supabase_client import get_supabase
-from middleware.auth import get_current_user
+from db.redis_client import get_redis
+from middleware.auth import get_current_user, get_profile, verify_token
+from middleware.rate_limit import RateLimiter
 from models.auth import UserSignup, UserLogin
 from utils.utils import is_strong_password
+from utils.concurrency import timed_call
+import os
 
 router = APIRouter()
 
-@router.post("/signup")
-def signup_user(user: UserSignup, supabase: Client = Depends(get_supabase)):
+# Requests per client address per RATE_LIMIT_WINDOW seconds; 0 disables the limit for that endpoint.
+signup_limit = RateLimiter("signup", int(os.getenv("SIGNUP_RATE_LIMIT", "5")))
+login_limit = RateLimiter("login", int(os.getenv("LOGIN_RATE_LIMIT", "10")))
+verify_limit = RateLimiter("verify", int(os.getenv("VERIFY_RATE_LIMIT", "120")))
+
+@router.post("/signup", dependencies=[Depends(signup_limit)])
+async def signup_user(user: UserSignup, supabase: AsyncClient = Depends(get_supabase)):
     """
     Signup route that creates a user in Supabase Auth.
     """
@@ -16,11 +26,11 @@ def signup_user(user: UserSignup, supabase: Client = Depends(get_supabase)):
         if not is_strong_password(user.password):
             raise HTTPException(status_code=400, detail="Weak Password.")
         
-        existing_profile = (supabase.table("profiles").select("*").eq("email", user.email).execute())
+        existing_profile = await timed_call("auth.existing_profile", supabase.table("profiles").select("*").eq("email", user.email).execute())
         if existing_profile.data and len(existing_profile.data) > 0:
             raise HTTPException(status_code=400, detail="Email already in use.")
 
-        signup_response = supabase.auth.sign_up({"email": user.email, "password": user.password})
+        signup_response = await timed_call("auth.sign_up", supabase.auth.sign_up({"email": user.email, "password": user.password}))
 
         if not signup_response.user or not signup_response.user.id:
             raise HTTPException(status_code=401, detail="Signup failed.")
@@ -31,16 +41,16 @@ def signup_user(user: UserSignup, supabase: Client = Depends(get_supabase)):
             "email": user.email
         }
         
-        profile_response = supabase.table("profiles").insert(profile_data).execute()
+        profile_response = await timed_call("auth.insert_profile", supabase.table("profiles").insert(profile_data).execute())
 
         return {"signup_data": signup_response, "profile_data": profile_response}
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Error during sign up: {str(e)}")
     
-@router.post("/login")
-def login(user: UserLogin, response: Response, supabase: Client = Depends(get_supabase) ):
+@router.post("/login", dependencies=[Depends(login_limit)])
+async def login(user: UserLogin, response: Response, supabase: AsyncClient = Depends(get_supabase), redis: Redis = Depends(get_redis)):
     try:
-        login_response = supabase.auth.sign_in_with_password({"email": user.email, "password": user.password})
+        login_response = await timed_call("auth.sign_in", supabase.auth.sign_in_with_password({"email": user.email, "password": user.password}))
 
         if not login_response.session:
             raise HTTPException(
@@ -50,8 +60,7 @@ def login(user: UserLogin, response: Response, supabase: Client = Depends(get_su
         
         user_id = login_response.user.id
 
-        profile_query = (supabase.table("profiles").select("*, user_roles(*)").eq("id", user_id).single().execute())
-        profile_data = profile_query.data
+        profile_data = await get_profile(user_id, supabase, redis)
       
         response.set_cookie(
                 key="access_token",
@@ -68,7 +77,6 @@ def login(user: UserLogin, response: Response, supabase: Client = Depends(get_su
         }
         
     except Exception as e:
-        print(f"Error during login: {str(e)}")
         raise HTTPException(status_code=400, detail=f"Error during login: {str(e)}")
     
 
@@ -86,12 +94,12 @@ async def logout(response: Response):
     return {"message": "Logged out successfully"}
 
 
-@router.get("/verify")
+@router.get("/verify", dependencies=[Depends(verify_limit)])
 async def verify(
     response: Response,
     request: Request,
-    supabase: Client = Depends(get_supabase)
-   
+    supabase: AsyncClient = Depends(get_supabase),
+    redis: Redis = Depends(get_redis)
 ):
     try:
         
@@ -100,14 +108,10 @@ async def verify(
         if not token:
             raise HTTPException(status_code=401, detail="No authentication token found")
         
-        user = supabase.auth.get_user(token)
-        if not user or not user.user:
-            raise HTTPException(status_code=401, detail="Invalid or expired token")
-        
-        user_id = user.user.id
-
-        profile_query = (supabase.table("profiles").select("*, user_roles(*)").eq("id", user_id).single().execute())
-        profile_data = profile_query.data
+        # Verified locally (or from the token cache) where possible, and the profile usually comes from Redis,
+        # so a page load normally makes no Supabase call at all.
+        user = await verify_token(token, supabase)
+        profile_data = await get_profile(user.id, supabase, redis)
         
         response.set_cookie(
             key="access_token",
@@ -1,10 +1,16 @@
 from fastapi import APIRouter, Depends, HTTPException, Request
-from supabase import Client
+from supabase import AsyncClient
+from redis.asyncio import Redis
 from db.supabase_client import get_supabase
-from middleware.auth import get_current_user
+from db.redis_client import get_redis
+from db.availability_cache import AvailabilityCache
+from db.occupancy_store import AVAILABILITY_BACKEND, OccupancyStore
+from db.live_updates import LIVE_UPDATES_ENABLED, publish_changes
+from middleware.auth import get_current_user, invalidate_user_profile, invalidate_user_roles
 from typing import List, Literal, Optional
 from pydantic import BaseModel
 from models.schedule import User
+from utils.concurrency import timed_call
 import os
 
 RoleType = Literal["Developer","Volunteer","President","Admin","Events","Media"]
@@ -14,10 +20,13 @@ class Roles(BaseModel):
     password: Optional[str] = None
     roles: List[RoleType]
 
-try:
-    ADMIN_PWD = os.environ["ADMIN_PASSWORD"]
-except KeyError as e:
-    raise RuntimeError(f"Missing required supabase environment variable: {e.args[0]}")
+# Read when a role change is requested, not at import, so the app can start (and be imported by tooling)
+# without it; a missing password then fails only the request that needs it.
+def admin_password() -> str:
+    try:
+        return os.environ["ADMIN_PASSWORD"]
+    except KeyError as e:
+        raise RuntimeError(f"Missing required environment variable: {e.args[0]}")
 
 
 
@@ -26,7 +35,8 @@ router = APIRouter()
 @router.post('/')
 async def assignRoles(
     roles_updated: Roles,
-    supabase: Client = Depends(get_supabase),
+    supabase: AsyncClient = Depends(get_supabase),
+    redis: Redis = Depends(get_redis),
     current_user: dict = Depends(get_current_user),
     )->User:
     
@@ -41,35 +51,56 @@ async def assignRoles(
             )
             
         for role in roles_updated.roles:
-            if role == "Admin" and roles_updated.password != ADMIN_PWD:
+            if role == "Admin" and roles_updated.password != admin_password():
                 raise HTTPException(status_code=400,detail="Admin password wasn't provided or was incorrect")
                 
-        supabase.table('user_roles').delete().eq('email', userMail).execute()
+        previous = await timed_call('roles.delete', supabase.table('user_roles').delete().eq('email', userMail).execute())
         
-        response = supabase.table('user_roles').insert({
+        response = await timed_call('roles.insert', supabase.table('user_roles').insert({
             'email': userMail,
             'user_id': current_user.id,
             'roles': roles_updated.roles
-        }).execute()   
+        }).execute())
         
         if not response.data:
             raise HTTPException(status_code=400, detail="Failed to update roles")
         
         user_data = response.data[0]
         
+        old_roles = set()
+        for row in previous.data or []:
+            old_roles.update(row['roles'])
+        new_roles = set(user_data['roles'])
+        
+        user_events, verified = [], 0
+        if (AVAILABILITY_BACKEND == "materialized" or LIVE_UPDATES_ENABLED) and old_roles != new_roles:
+            profile = await timed_call('roles.profile', supabase.table('profiles').select('verified, events(event_type, start_date, end_date, start_time, end_time, day_of_week)').eq('id', current_user.id).single().execute())
+            user_events = profile.data.get('events') or []
+            verified = 1 if profile.data['verified'] else 0
+            if AVAILABILITY_BACKEND == "materialized":
+                store = OccupancyStore(redis)
+                await store.apply(old_roles - new_roles, removed=user_events, people=-verified)
+                await store.apply(new_roles - old_roles, added=user_events, people=verified)
+        
+        versions = await AvailabilityCache(redis).invalidate_roles(old_roles | new_roles)
+        await publish_changes(redis, old_roles - new_roles, removed=user_events, people=-verified, versions=versions)
+        await publish_changes(redis, new_roles - old_roles, added=user_events, people=verified, versions=versions)
+        await invalidate_user_roles(current_user.id, redis)
+        await invalidate_user_profile(current_user.id, redis)
+        
         return User(email=userMail,roles=user_data['roles'])
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
     
 @router.get('/')
 async def getRoles(
-    supabase: Client = Depends(get_supabase),
+    supabase: AsyncClient = Depends(get_supabase),
     current_user: dict = Depends(get_current_user)
 ) -> User:
     try:
         userMail = current_user.email
         
-        response = supabase.table('user_roles').select('*').eq('email', userMail).execute()
+        response = await timed_call('roles.get', supabase.table('user_roles').select('*').eq('email', userMail).execute())
         
         if not response.data:
           
@@ -1,27 +1,99 @@
-from fastapi import APIRouter, Depends, HTTPException
-from supabase import Client
+from fastapi import APIRouter, Depends, Header, HTTPException, Response
+from fastapi.responses import JSONResponse
+from supabase import AsyncClient
+from redis.asyncio import Redis
 from db.supabase_client import get_supabase
-from middleware.auth import get_current_user
-from typing import List
-from models.schedule import Event
-from datetime import datetime, timedelta
-import pytz
+from db.redis_client import get_redis
+from db.availability_cache import AvailabilityCache, ALL_ROLES
+from db.occupancy_store import AVAILABILITY_BACKEND, OccupancyStore
+from db.live_updates import publish_changes
+from db.versions import VersionStore, schedule_version_key
+from middleware.auth import get_current_user, invalidate_user_profile
+from typing import List, Optional
+from models.schedule import Event, EventChanges
+from utils.concurrency import timed_call
+from utils.conditional import CACHE_CONTROL, check_not_modified, etag_digest
+from utils.calendar import current_week, localize
+from datetime import datetime, time
 
 router = APIRouter()
 
-PST = pytz.timezone("America/Vancouver")
+def to_event_row(event: Event, user_id: str) -> dict:
+    if (event.type == "Temporary" and event.start and event.end):
+        return {
+            "user_id": user_id,
+            "calendar_id": event.id,
+            "start_date": event.start.isoformat(),
+            "end_date": event.end.isoformat(),
+            "event_type": event.type
+        }
+    elif (event.type == "Permanent" and event.startTime and event.endTime and event.daysOfWeek and len(event.daysOfWeek) > 0):
+        return {
+            "user_id": user_id,
+            "calendar_id": event.id,
+            "start_time": event.startTime,
+            "end_time": event.endTime,
+            "day_of_week": event.daysOfWeek[0],
+            "event_type": event.type
+        }
+    raise HTTPException(status_code=400, detail="Invalid event data.")
+
+def schedule_etag(version: int, digest: Optional[str] = None) -> str:
+    """
+    PATCH issues the profile's schedule_version. GET adds, after a dot, a digest of everything its response depends
+    on, and is weak like the other GET ETags. Either works as If-Match, which only reads the version.
+    """
+    return f'W/"{version}.{digest}"' if digest else f'"{version}"'
+
+def held_etag(if_none_match: Optional[str], digest: str) -> Optional[str]:
+    """
+    The GET ETag the client sent for `digest`, whatever version it carries. Every write that moves schedule_version
+    also bumps the counter the digest is built from, so the digest alone decides a 304 without reading the profile.
+    """
+    for tag in (if_none_match or "").split(","):
+        version, _, tag_digest = tag.strip().removeprefix("W/").strip('"').partition(".")
+        if version.isdigit() and tag_digest == digest:
+            return tag.strip()
+    return None
+
+def parse_etag(value: Optional[str]) -> Optional[int]:
+    if value is None or value.strip() == "*":
+        return None
+    version = value.strip().removeprefix("W/").strip('"').partition(".")[0]
+    if not version.isdigit():
+        raise HTTPException(status_code=400, detail="If-Match must be an ETag returned by GET or PATCH /schedule/.")
+    return int(version)
 
 @router.get("/")
-def get_schedule(supabase: Client = Depends(get_supabase), current_user: dict = Depends(get_current_user)) -> List[Event]:
+async def get_schedule(
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
+    supabase: AsyncClient = Depends(get_supabase),
+    redis: Redis = Depends(get_redis),
+    current_user: dict = Depends(get_current_user)
+) -> List[Event]:
     try:
         user_id = current_user.id
 
-        today = datetime.now(PST)
-        beginning_of_week = today - timedelta(days=today.weekday() + 1)
-        beginning_of_week = beginning_of_week.replace(hour=0, minute=0, second=0, microsecond=0)
-        prev_sunday = beginning_of_week.isoformat()
-
-        query = supabase.table("events").select("*").filter("user_id", "eq", user_id).or_(f"start_date.is.null, start_date.gte.{prev_sunday})").execute()
+        prev_sunday = localize(datetime.combine(current_week(), time.min)).isoformat()
+
+        # The schedule only changes through writes that bump the user's version, or when the week rolls over.
+        versions = await VersionStore(redis).get([schedule_version_key(user_id)])
+        digest = None
+        if versions is not None:
+            digest = etag_digest("schedule", user_id, versions[0], prev_sunday)
+            held = held_etag(if_none_match, digest)
+            # A held tag with the current digest is current, so it is compared with itself; no tag counts as a miss.
+            not_modified = check_not_modified("/schedule/", held, held or "")
+            if not_modified:
+                return not_modified
+            response.headers["Cache-Control"] = CACHE_CONTROL
+
+        # The version is read before the events, never alongside them: a write landing in between then leaves the ETag
+        # older than the events, so a PATCH made from this copy gets 412 instead of overwriting that write.
+        profile = await timed_call("schedule.version", supabase.table("profiles").select("schedule_version").eq("id", user_id).single().execute())
+        query = await timed_call("schedule.events", supabase.table("events").select("*").filter("user_id", "eq", user_id).or_(f"start_date.is.null, start_date.gte.{prev_sunday})").execute())
+        response.headers["ETag"] = schedule_etag(profile.data["schedule_version"], digest)
 
         events = []
 
@@ -51,48 +123,91 @@ def get_schedule(supabase: Client = Depends(get_supabase), current_user: dict =
         raise HTTPException(status_code=400, detail=f"Error getting schedule: {str(e)}")
     
 @router.post("/")
-def set_schedule(events: List[Event], supabase: Client = Depends(get_supabase), current_user: dict = Depends(get_current_user)):
+async def set_schedule(events: List[Event], supabase: AsyncClient = Depends(get_supabase), redis: Redis = Depends(get_redis), current_user: dict = Depends(get_current_user)):
     try:
         user_id = current_user.id
 
-        user_profile = supabase.table("profiles").select("verified").eq("id", user_id).single().execute()
+        user_profile = await timed_call("schedule.profile", supabase.table("profiles").select("verified, user_roles(roles)").eq("id", user_id).single().execute())
 
         if user_profile.data is None:
             raise HTTPException(status_code=404, detail="User profile not found.")
 
         is_verified = user_profile.data["verified"]
 
-        event_data = []
-
-        for event in events:
-            if (event.type == "Temporary" and event.start and event.end):
-                event_data.append({
-                    "user_id": user_id,
-                    "calendar_id": event.id,
-                    "start_date": event.start.isoformat(),
-                    "end_date": event.end.isoformat(),
-                    "event_type": event.type
-                })
-            elif (event.type == "Permanent" and event.startTime and event.endTime and event.daysOfWeek and len(event.daysOfWeek) > 0):
-                event_data.append({
-                    "user_id": user_id,
-                    "calendar_id": event.id,
-                    "start_time": event.startTime,
-                    "end_time": event.endTime,
-                    "day_of_week": event.daysOfWeek[0],
-                    "event_type": event.type
-                })
-            else:
-                raise HTTPException(status_code=400, detail="Invalid event data.")
-
-        response = supabase.rpc("replace_user_events", {"_user_id": user_id, "_event_data": event_data}).execute()
+        event_data = [to_event_row(event, user_id) for event in events]
+
+        response = await timed_call("schedule.replace_events", supabase.rpc("replace_user_events", {"_user_id": user_id, "_event_data": event_data}).execute())
 
         if (response.data is None):
             raise HTTPException(status_code=500, detail="Database error")
         
         if not is_verified:
-            supabase.table("profiles").update({"verified": True}).eq("id", user_id).execute()
+            await timed_call("schedule.verify_profile", supabase.table("profiles").update({"verified": True}).eq("id", user_id).execute())
+
+        roles = {ALL_ROLES}
+        for user_roles in user_profile.data.get("user_roles") or []:
+            roles.update(user_roles["roles"])
+
+        # What the RPC deleted, not what was read above: a concurrent POST may have replaced those rows already.
+        old_events = response.data
+        if AVAILABILITY_BACKEND == "materialized":
+            await OccupancyStore(redis).apply(roles, removed=old_events, added=event_data, people=0 if is_verified else 1)
+
+        versions = await AvailabilityCache(redis).invalidate_events(roles, old_events + event_data, profile_changed=not is_verified)
+        await publish_changes(redis, roles, removed=old_events, added=event_data, people=0 if is_verified else 1, versions=versions)
+        await VersionStore(redis).bump([schedule_version_key(user_id)])
+        await invalidate_user_profile(user_id, redis)
 
         return {"message": "Schedule updated."}
     except Exception as e:
-        raise HTTPException(status_code=400, detail=f"Error setting schedule: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=400, detail=f"Error setting schedule: {str(e)}")
+
+@router.patch("/")
+async def patch_schedule(
+    changes: EventChanges,
+    response: Response,
+    if_match: Optional[str] = Header(None),
+    supabase: AsyncClient = Depends(get_supabase),
+    redis: Redis = Depends(get_redis),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Applies only what changed, keyed by calendar_id: `added` and `changed` events are written, `removed` ids deleted.
+    Everything, including verifying the profile, happens in one RPC. With If-Match, the patch is rejected with 412
+    if the schedule changed since that ETag was issued.
+    """
+    try:
+        user_id = current_user.id
+
+        upserts = [to_event_row(event, user_id) for event in changes.added + changes.changed]
+        calendar_ids = [row["calendar_id"] for row in upserts] + changes.removed
+        if len(set(calendar_ids)) != len(calendar_ids):
+            raise HTTPException(status_code=400, detail="Each calendar_id may appear only once per patch.")
+
+        params = {"_user_id": user_id, "_upserts": upserts, "_removed": changes.removed, "_expected_version": parse_etag(if_match)}
+        result = await timed_call("schedule.patch_events", supabase.rpc("patch_user_events", params).execute())
+
+        if result.data is None:
+            raise HTTPException(status_code=500, detail="Database error")
+
+        etag = schedule_etag(result.data["version"])
+
+        if result.data["conflict"]:
+            return JSONResponse(status_code=412, content={"detail": "Schedule changed since it was loaded.", "version": result.data["version"]}, headers={"ETag": etag})
+
+        is_verified = result.data["was_verified"]
+        roles = {ALL_ROLES, *result.data["roles"]}
+        replaced = result.data["replaced"]
+
+        if AVAILABILITY_BACKEND == "materialized":
+            await OccupancyStore(redis).apply(roles, removed=replaced, added=upserts, people=0 if is_verified else 1)
+
+        versions = await AvailabilityCache(redis).invalidate_events(roles, replaced + upserts, profile_changed=not is_verified)
+        await publish_changes(redis, roles, removed=replaced, added=upserts, people=0 if is_verified else 1, versions=versions)
+        await VersionStore(redis).bump([schedule_version_key(user_id)])
+        await invalidate_user_profile(user_id, redis)
+
+        response.headers["ETag"] = etag
+        return {"message": "Schedule updated.", "version": result.data["version"]}
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Error setting schedule: {str(e)}")
@@ -0,0 +1,295 @@
+from datetime import date, datetime, time, timedelta
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+import numpy as np
+from utils.calendar import DAYS_PER_WEEK, MINUTES_PER_DAY, PST, slot_layout
+
+SLOT_MINUTES_CHOICES = (5, 10, 15, 20, 30, 60)
+MAX_GRID_SLOTS = 20000
+
+def to_local_naive(value: datetime) -> datetime:
+    if value.tzinfo is not None:
+        value = value.astimezone(PST).replace(tzinfo=None)
+    return value
+
+def parse_time(value: str) -> time:
+    return time.fromisoformat(value)
+
+def _minute_of_day(value: time, round_up: bool = False) -> int:
+    minute = value.hour * 60 + value.minute
+    if round_up and (value.second or value.microsecond):
+        minute += 1
+    return minute
+
+def _slot_span(start_minute: int, end_minute: int, slot_minutes: int):
+    # A slot is occupied when the event overlaps any part of it.
+    return start_minute // slot_minutes, -(-end_minute // slot_minutes)
+
+# Temporary events are stored as minutes since this Sunday midnight, so spans for any origin are plain subtraction.
+EPOCH = datetime(2000, 1, 2)
+MAX_RECORDS = 200000
+
+class EventRecord:
+    """
+    An event row parsed once into integer minute bounds, [start, end) with the end rounded up to a whole minute:
+    minutes since Sunday midnight of a generic week for Permanent events, since EPOCH (local wall clock) for
+    Temporary ones.
+    """
+    __slots__ = ("permanent", "start", "end")
+
+    def __init__(self, permanent: bool, start: int, end: int):
+        self.permanent = permanent
+        self.start = start
+        self.end = end
+
+def _parse_event(event: dict) -> Optional[EventRecord]:
+    event_type = event.get("event_type")
+
+    if event_type == "Permanent" and event.get("start_time") and event.get("end_time") and event.get("day_of_week") is not None:
+        start_minute = _minute_of_day(parse_time(event["start_time"]))
+        end_minute = _minute_of_day(parse_time(event["end_time"]), round_up=True)
+        if end_minute <= start_minute:
+            return None
+
+        day_offset = int(event["day_of_week"]) * MINUTES_PER_DAY
+        return EventRecord(True, day_offset + start_minute, day_offset + end_minute)
+
+    if event_type == "Temporary" and event.get("start_date") and event.get("end_date"):
+        start = to_local_naive(datetime.fromisoformat(event["start_date"]))
+        end = to_local_naive(datetime.fromisoformat(event["end_date"]))
+
+        start_minute = (start - EPOCH) // timedelta(minutes=1)
+        end_minute = -((EPOCH - end) // timedelta(minutes=1))
+        if end_minute <= start_minute:
+            return None
+
+        return EventRecord(False, start_minute, end_minute)
+
+    return None
+
+# Parsed records keyed by the columns they depend on, so an unchanged row is parsed once per process rather than
+# once per request. Keying by content instead of calendar_id means an edited event can never hit a stale entry.
+_records: Dict[tuple, Optional[EventRecord]] = {}
+
+def event_record(event: dict) -> Optional[EventRecord]:
+    """
+    Parsed form of an event row, or None when the row doesn't describe a valid event.
+    """
+    key = (event.get("event_type"), event.get("day_of_week"), event.get("start_time"), event.get("end_time"), event.get("start_date"), event.get("end_date"))
+    try:
+        return _records[key]
+    except KeyError:
+        pass
+
+    record = _parse_event(event)
+    if len(_records) >= MAX_RECORDS:
+        _records.clear()
+    _records[key] = record
+    return record
+
+def weekly_spans(event: dict, slot_minutes: int) -> List[Tuple[Optional[date], int, int]]:
+    """
+    Splits an event's coverage into (week, first slot, last slot) spans indexed from that week's Sunday midnight,
+    with the same rounding as build_occupancy. Permanent events come back once with week None.
+    """
+    record = event_record(event)
+    if record is None:
+        return []
+
+    if record.permanent:
+        first, last = _slot_span(record.start, record.end, slot_minutes)
+        return [(None, first, last)]
+
+    week_minutes = DAYS_PER_WEEK * MINUTES_PER_DAY
+    week_index = record.start // week_minutes
+    week = EPOCH.date() + timedelta(days=week_index * DAYS_PER_WEEK)
+    origin = week_index * week_minutes
+
+    first, last = _slot_span(record.start - origin, record.end - origin, slot_minutes)
+    week_slots = week_minutes // slot_minutes
+
+    spans = []
+    while first < last:
+        spans.append((week, first, min(last, week_slots)))
+        week += timedelta(days=DAYS_PER_WEEK)
+        first, last = max(first - week_slots, 0), last - week_slots
+    return spans
+
+def validate_grid(days: int, slot_minutes: int, first_hour: int, last_hour: int) -> int:
+    """
+    Checks the requested grid shape and returns how many slots it will produce.
+    """
+    if slot_minutes not in SLOT_MINUTES_CHOICES:
+        raise ValueError(f"Slot size must be one of {', '.join(map(str, SLOT_MINUTES_CHOICES))} minutes.")
+    if days < 1:
+        raise ValueError("Date range must cover at least one day.")
+    if not 0 <= first_hour < last_hour <= 24:
+        raise ValueError("Day window must start before it ends and stay within 0-24.")
+
+    slot_count = days * (last_hour - first_hour) * 60 // slot_minutes
+    if slot_count > MAX_GRID_SLOTS:
+        raise ValueError(f"Requested grid has {slot_count} slots, the limit is {MAX_GRID_SLOTS}.")
+
+    return slot_count
+
+def build_occupancy(events: Iterable[dict], origin: datetime, days: int, slot_minutes: int = 60) -> np.ndarray:
+    """
+    Maps raw event rows onto a (days x slots per day) grid of overlapping event counts.
+    `origin` is the local midnight the grid starts at; only its wall-clock fields are used.
+    """
+    events = list(events)
+    return build_grouped_occupancy(events, [(0,)] * len(events), 1, origin, days, slot_minutes)[0]
+
+def build_grouped_occupancy(events: List[dict], event_groups: List[Sequence[int]], group_count: int, origin: datetime, days: int, slot_minutes: int = 60) -> np.ndarray:
+    """
+    Builds one occupancy grid per group in a single pass over the events, shaped (groups x days x slots per day).
+    `event_groups[i]` lists the groups events[i] counts towards, e.g. every role its owner holds.
+    """
+    spans = collect_spans(events, event_groups, origin, slot_minutes)
+    return grid_from_spans(spans, range(group_count), origin, days, slot_minutes)
+
+def collect_spans(events: List[dict], event_groups: List[Sequence[int]], origin: datetime, slot_minutes: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Turns events into (group, first slot, last slot) rows: Temporary spans indexed from `origin`, Permanent ones
+    from Sunday midnight of a generic week. Returned as two int64 arrays of shape (n x 3), temporary then permanent.
+    """
+    if MINUTES_PER_DAY % slot_minutes:
+        raise ValueError("Slot size must evenly divide a day.")
+
+    records, counts, flat_groups = [], [], []
+    for event, groups in zip(events, event_groups):
+        if not groups:
+            continue
+        record = event_record(event)
+        if record is None:
+            continue
+        records.append(record)
+        counts.append(len(groups))
+        flat_groups.extend(groups)
+
+    # One row per (event, group), built with array operations rather than per-event arithmetic.
+    size = len(records)
+    counts = np.asarray(counts, dtype=np.int64)
+    starts = np.repeat(np.fromiter([record.start for record in records], np.int64, size), counts)
+    ends = np.repeat(np.fromiter([record.end for record in records], np.int64, size), counts)
+    permanent = np.repeat(np.fromiter([record.permanent for record in records], bool, size), counts)
+    groups = np.asarray(flat_groups, dtype=np.int64)
+
+    origin_minute = (origin.replace(tzinfo=None) - EPOCH) // timedelta(minutes=1)
+    offsets = np.where(permanent, 0, origin_minute)
+
+    # Same rounding as _slot_span: a slot is occupied when the event overlaps any part of it.
+    rows = np.stack([groups, (starts - offsets) // slot_minutes, -((offsets - ends) // slot_minutes)], axis=1).reshape(-1, 3)
+    return rows[~permanent], rows[permanent]
+
+def grid_from_spans(spans: Tuple[np.ndarray, np.ndarray], groups: range, origin: datetime, days: int, slot_minutes: int) -> np.ndarray:
+    """
+    Occupancy grids for the contiguous range `groups` of the groups in `spans`, shaped (groups x days x slots per day).
+    """
+    origin = origin.replace(tzinfo=None)
+    slots_per_day = MINUTES_PER_DAY // slot_minutes
+    total_slots = days * slots_per_day
+    week_slots = DAYS_PER_WEEK * slots_per_day
+    group_count = len(groups)
+
+    def select(rows: np.ndarray) -> np.ndarray:
+        rows = rows[(rows[:, 0] >= groups.start) & (rows[:, 0] < groups.stop)]
+        rows[:, 0] -= groups.start
+        return rows
+
+    temp, perm = select(spans[0]), select(spans[1])
+
+    occupancy = _accumulate(temp[:, 0], temp[:, 1], temp[:, 2], group_count, total_slots)
+
+    if len(perm):
+        # Permanent events are keyed by day of week with Sunday as 0, so rotate the week to start on the origin's day.
+        weekly = _accumulate(perm[:, 0], perm[:, 1], perm[:, 2], group_count, week_slots)
+        origin_day = (origin.weekday() + 1) % DAYS_PER_WEEK
+        weekly = np.roll(weekly, -origin_day * slots_per_day, axis=1)
+        occupancy += np.tile(weekly, (1, -(-total_slots // week_slots)))[:, :total_slots]
+
+    return occupancy.reshape(group_count, days, slots_per_day)
+
+def occupancy_from_counts(counts: Iterable, days: int, slot_minutes: int = 60) -> np.ndarray:
+    """
+    Builds the same grid as build_occupancy from sparse [slot index, count] pairs computed by the database.
+    """
+    slots_per_day = MINUTES_PER_DAY // slot_minutes
+    occupancy = np.zeros(days * slots_per_day, dtype=np.int32)
+
+    pairs = np.asarray(list(counts), dtype=np.int64).reshape(-1, 2)
+    if len(pairs):
+        occupancy[pairs[:, 0]] = pairs[:, 1]
+
+    return occupancy.reshape(days, slots_per_day)
+
+def _accumulate(groups: np.ndarray, starts: np.ndarray, ends: np.ndarray, group_count: int, length: int) -> np.ndarray:
+    if not len(starts):
+        return np.zeros((group_count, length), dtype=np.int32)
+
+    # Each group gets its own difference array of length + 1 laid end to end.
+    offsets = np.asarray(groups, dtype=np.int64) * (length + 1)
+    first = offsets + np.clip(np.asarray(starts, dtype=np.int64), 0, length)
+    last = offsets + np.clip(np.asarray(ends, dtype=np.int64), 0, length)
+
+    size = group_count * (length + 1)
+    diff = (np.bincount(first, minlength=size) - np.bincount(last, minlength=size)).reshape(group_count, length + 1)
+    return np.cumsum(diff[:, :-1], axis=1).astype(np.int32)
+
+def to_availability_slots(occupancy: np.ndarray, origin: datetime, max_people: int, role: Optional[str], slot_minutes: int = 60, first_hour: int = 7, last_hour: int = 20) -> List[dict]:
+    """
+    Turns an occupancy grid into the flat list of slots returned by the admin endpoint, one per slot of real time:
+    the grid is wall-clock, so across a clock change the skipped hour's slots are left out and the repeated hour's
+    slots come out twice, each with its own UTC offset.
+    """
+    layout = slot_layout(origin.date(), occupancy.shape[0], slot_minutes, first_hour, last_hour)
+    counts = (max_people - occupancy.ravel()[layout.grid_index]).tolist()
+    role_name = role if role else "All"
+
+    return [
+        {"startDate": start, "endDate": end, "numberOfPeople": count, "maxPeopleAvailable": max_people, "role": role_name}
+        for start, end, count in zip(layout.start_dates, layout.end_dates, counts)
+    ]
+
+def to_columnar(occupancy: np.ndarray, origin: datetime, max_people: int, role: Optional[str], slot_minutes: int = 60, first_hour: int = 7, last_hour: int = 20) -> dict:
+    """
+    Compact form of the same slots: one header plus a flat, row-major (days x slots per day) array of available counts.
+    Slot `i` of day `d` starts `first_hour` hours plus `i * slotMinutes` minutes after local midnight `d` days past `startDate`,
+    on the wall clock: a day with a clock change still has every slot, including ones it skips or repeats.
+    """
+    origin = origin.replace(tzinfo=None)
+    first_slot = first_hour * 60 // slot_minutes
+    last_slot = last_hour * 60 // slot_minutes
+    window = max_people - occupancy[:, first_slot:last_slot]
+
+    return {
+        "role": role if role else "All",
+        "startDate": origin.date().isoformat(),
+        "timezone": PST.zone,
+        "startHour": first_hour,
+        "endHour": last_hour,
+        "slotMinutes": slot_minutes,
+        "days": window.shape[0],
+        "slotsPerDay": window.shape[1],
+        "maxPeopleAvailable": max_people,
+        "counts": window.ravel().tolist()
+    }
+
+def iter_daily_counts(occupancy: np.ndarray, origin: datetime, max_people: int, role: Optional[str], slot_minutes: int = 60, first_hour: int = 7, last_hour: int = 20) -> Iterator[dict]:
+    """
+    Yields the columnar header without counts, then one record per day.
+    """
+    header = to_columnar(occupancy[:0], origin, max_people, role, slot_minutes, first_hour, last_hour)
+    del header["counts"]
+    header["days"] = occupancy.shape[0]
+    yield header
+
+    origin = origin.replace(tzinfo=None)
+    first_slot = first_hour * 60 // slot_minutes
+    last_slot = last_hour * 60 // slot_minutes
+
+    for day in range(occupancy.shape[0]):
+        yield {
+            "role": header["role"],
+            "date": (origin + timedelta(days=day)).date().isoformat(),
+            "counts": (max_people - occupancy[day, first_slot:last_slot]).tolist()
+        }
@@ -0,0 +1,157 @@
+from datetime import date, datetime, time, timedelta, timezone
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+import pytz
+from pytz.exceptions import AmbiguousTimeError, NonExistentTimeError
+
+PST = pytz.timezone("America/Vancouver")
+UNIX_EPOCH = date(1970, 1, 1)
+
+MINUTES_PER_DAY = 24 * 60
+DAYS_PER_WEEK = 7
+
+def week_start(day: date) -> date:
+    """
+    The Sunday starting the week `day` falls in (a Sunday is its own week start).
+    """
+    return day - timedelta(days=(day.weekday() + 1) % DAYS_PER_WEEK)
+
+def weeks_between(start: date, end: date) -> List[date]:
+    weeks = []
+    current = week_start(start)
+    while current <= end:
+        weeks.append(current)
+        current += timedelta(days=DAYS_PER_WEEK)
+    return weeks
+
+def today() -> date:
+    return datetime.now(PST).date()
+
+def current_week() -> date:
+    return week_start(today())
+
+def localize(value: datetime) -> datetime:
+    """
+    Local wall-clock time as an aware datetime. A time skipped by a spring-forward transition moves forward by the
+    gap; a time repeated by a fall-back one takes its first occurrence.
+    """
+    try:
+        return PST.localize(value, is_dst=None)
+    except NonExistentTimeError:
+        return PST.normalize(PST.localize(value, is_dst=False))
+    except AmbiguousTimeError:
+        return PST.localize(value, is_dst=True)
+
+# Fixed-offset zones for the offsets slots start at, shared by every datetime built from the tables below.
+_offsets: Dict[int, timezone] = {}
+
+def _fixed_offset(minutes: int) -> timezone:
+    zone = _offsets.get(minutes)
+    if zone is None:
+        zone = _offsets[minutes] = timezone(timedelta(minutes=minutes))
+    return zone
+
+def _aware(epoch: int, offset_minutes: int) -> datetime:
+    return datetime.fromtimestamp(epoch, _fixed_offset(offset_minutes))
+
+class WeekSlots:
+    """
+    The real-time layout of one local week's wall-clock slots. Every slot that exists on the clock gets its index in
+    the week's (days x slots per day) grid, its UTC start as epoch seconds and the UTC offset in force when it starts
+    and ends. Slots skipped by a spring-forward transition are left out and slots repeated by a fall-back one appear
+    once per occurrence, so the week holds exactly as many slots as it has real time (167 or 169 hours across a
+    transition).
+    """
+    __slots__ = ("week", "slot_minutes", "index", "starts", "start_offsets", "end_offsets")
+
+    def __init__(self, week: date, slot_minutes: int, index: np.ndarray, starts: np.ndarray, start_offsets: np.ndarray, end_offsets: np.ndarray):
+        self.week = week
+        self.slot_minutes = slot_minutes
+        self.index = index
+        self.starts = starts
+        self.start_offsets = start_offsets
+        self.end_offsets = end_offsets
+
+@lru_cache(maxsize=256)
+def week_slots(week: date, slot_minutes: int) -> WeekSlots:
+    """
+    Built once per week and slot size by stepping through the week in real time and reading the local clock.
+    """
+    if MINUTES_PER_DAY % slot_minutes:
+        raise ValueError("Slot size must evenly divide a day.")
+
+    begin = int(localize(datetime.combine(week, time.min)).timestamp())
+    end = int(localize(datetime.combine(week + timedelta(days=DAYS_PER_WEEK), time.min)).timestamp())
+    # The week's local midnight read as if it were UTC, so epoch + offset - wall_origin is minutes on the local clock.
+    wall_origin = (week - UNIX_EPOCH).days * MINUTES_PER_DAY * 60
+    step = slot_minutes * 60
+
+    starts = np.arange(begin, end, step, dtype=np.int64)
+    offsets = np.fromiter((datetime.fromtimestamp(epoch, PST).utcoffset() // timedelta(minutes=1) for epoch in range(begin, end + step, step)), np.int32, len(starts) + 1)
+
+    index = ((starts + offsets[:-1].astype(np.int64) * 60 - wall_origin) // step).astype(np.int32)
+    return WeekSlots(week, slot_minutes, index, starts, offsets[:-1], offsets[1:])
+
+class SlotLayout:
+    """
+    The slots of a date range that fall inside each day's [first_hour, last_hour) window, in real-time order:
+    `grid_index` points into the range's flattened (days x slots per day) grid, and `start_dates`/`end_dates` are the
+    matching aware datetimes, built once per layout instead of once per slot per response.
+    """
+    __slots__ = ("grid_index", "start_dates", "end_dates")
+
+    def __init__(self, grid_index: np.ndarray, start_dates: Tuple[datetime, ...], end_dates: Tuple[datetime, ...]):
+        self.grid_index = grid_index
+        self.start_dates = start_dates
+        self.end_dates = end_dates
+
+@lru_cache(maxsize=16)
+def slot_layout(start: date, days: int, slot_minutes: int, first_hour: int = 0, last_hour: int = 24) -> SlotLayout:
+    slots_per_day = MINUTES_PER_DAY // slot_minutes
+    first_slot = first_hour * 60 // slot_minutes
+    last_slot = last_hour * 60 // slot_minutes
+    total_slots = days * slots_per_day
+
+    grid_index, starts, start_offsets, end_offsets = [], [], [], []
+    for week in weeks_between(start, start + timedelta(days=days - 1)):
+        slots = week_slots(week, slot_minutes)
+        # Wall-clock grid index relative to `start` rather than to the week's Sunday.
+        index = slots.index + (week - start).days * slots_per_day
+        keep = (index >= 0) & (index < total_slots)
+        slot_of_day = index % slots_per_day
+        keep &= (slot_of_day >= first_slot) & (slot_of_day < last_slot)
+
+        grid_index.append(index[keep])
+        starts.append(slots.starts[keep])
+        start_offsets.append(slots.start_offsets[keep])
+        end_offsets.append(slots.end_offsets[keep])
+
+    grid_index = np.concatenate(grid_index)
+    starts = np.concatenate(starts).tolist()
+    step = slot_minutes * 60
+
+    return SlotLayout(
+        grid_index,
+        tuple(_aware(epoch, offset) for epoch, offset in zip(starts, np.concatenate(start_offsets).tolist())),
+        tuple(_aware(epoch + step, offset) for epoch, offset in zip(starts, np.concatenate(end_offsets).tolist()))
+    )
+
+def existing_slots(start: date, days: int, slot_minutes: int) -> np.ndarray:
+    """
+    Which cells of the range's (days x slots per day) wall-clock grid exist on the local clock: all of them except
+    those skipped by a spring-forward transition.
+    """
+    slots_per_day = MINUTES_PER_DAY // slot_minutes
+    exists = np.zeros(days * slots_per_day, dtype=bool)
+    for week in weeks_between(start, start + timedelta(days=days - 1)):
+        index = week_slots(week, slot_minutes).index + (week - start).days * slots_per_day
+        exists[index[(index >= 0) & (index < len(exists))]] = True
+    return exists.reshape(days, slots_per_day)
+
+def slot_bounds(start: date, slot: int, slot_minutes: int, length_minutes: Optional[int] = None) -> Tuple[datetime, datetime]:
+    """
+    Aware start and end of a run of wall-clock grid cells beginning at `slot` of the grid starting on `start`.
+    """
+    wall_start = datetime.combine(start, time.min) + timedelta(minutes=slot * slot_minutes)
+    return localize(wall_start), localize(wall_start + timedelta(minutes=length_minutes or slot_minutes))
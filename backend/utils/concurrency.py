@@ -0,0 +1,61 @@
+import asyncio
+import logging
+import os
+import time
+from typing import Any, Awaitable, Dict, Optional
+from utils.metrics import record_call, timed_phase
+
+logger = logging.getLogger(__name__)
+
+CALL_TIMEOUT = float(os.getenv("SUPABASE_CALL_TIMEOUT", "10"))
+
+class CallStats:
+    def __init__(self):
+        self.calls = {}
+
+    def record(self, name: str, seconds: float, failed: bool = False):
+        stats = self.calls.setdefault(name, {"count": 0, "failures": 0, "totalSeconds": 0.0, "maxSeconds": 0.0})
+        stats["count"] += 1
+        stats["failures"] += int(failed)
+        stats["totalSeconds"] += seconds
+        stats["maxSeconds"] = max(stats["maxSeconds"], seconds)
+
+    def as_dict(self) -> dict:
+        return {name: {**stats, "meanSeconds": stats["totalSeconds"] / stats["count"]} for name, stats in self.calls.items()}
+
+stats = CallStats()
+
+async def timed_call(name: str, awaitable: Awaitable, timeout: Optional[float] = None, count_phase: bool = True) -> Any:
+    """
+    Awaits a single upstream call with a timeout and records how long it took under `name`.
+    Unless `count_phase` is off, the time also counts towards the current request's "db" phase.
+    """
+    timeout = CALL_TIMEOUT if timeout is None else timeout
+    started = time.perf_counter()
+    failed = True
+    try:
+        result = await asyncio.wait_for(awaitable, timeout)
+        failed = False
+        return result
+    except asyncio.TimeoutError:
+        raise TimeoutError(f"{name} timed out after {timeout:g}s")
+    finally:
+        elapsed = time.perf_counter() - started
+        stats.record(name, elapsed, failed)
+        record_call(name, elapsed, count_phase)
+        logger.debug(f"{name} took {elapsed * 1000:.1f} ms")
+
+async def fan_out(calls: Dict[str, Awaitable], timeout: Optional[float] = None) -> Dict[str, Any]:
+    """
+    Runs independent calls concurrently and returns their results by name.
+    The first failure or timeout cancels the calls still running and is re-raised as is.
+    """
+    try:
+        # The calls overlap, so the request's "db" phase gets the wall time of the whole batch rather than their sum.
+        with timed_phase("db"):
+            async with asyncio.TaskGroup() as group:
+                tasks = {name: group.create_task(timed_call(name, call, timeout, count_phase=False)) for name, call in calls.items()}
+    except ExceptionGroup as e:
+        raise e.exceptions[0]
+
+    return {name: task.result() for name, task in tasks.items()}
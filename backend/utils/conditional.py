@@ -0,0 +1,36 @@
+import hashlib
+from typing import Optional
+from fastapi import Response
+from utils.metrics import registry
+
+# Browsers may keep the body but must revalidate it with If-None-Match before every use.
+CACHE_CONTROL = "private, no-cache"
+
+def etag_digest(*parts) -> str:
+    return hashlib.blake2b(repr(parts).encode(), digest_size=12).hexdigest()
+
+def make_etag(*parts) -> str:
+    """
+    Weak ETag over everything a response depends on (versions and query parameters). Weak, because the same
+    representation may be sent gzip-encoded or not.
+    """
+    return f'W/"{etag_digest(*parts)}"'
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in if_none_match.split(","))
+
+def check_not_modified(route: str, if_none_match: Optional[str], etag: str) -> Optional[Response]:
+    """
+    Returns the 304 to send when the client already holds `etag`, else None. Counts hits and misses per route.
+    """
+    if etag_matches(if_none_match, etag):
+        registry.conditional.inc(route, "hit")
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": CACHE_CONTROL})
+
+    registry.conditional.inc(route, "miss")
+    return None
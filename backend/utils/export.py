@@ -0,0 +1,65 @@
+import csv
+import io
+import json
+import zlib
+from datetime import datetime
+from typing import AsyncIterator, Iterable, Iterator, List, Optional
+import numpy as np
+from fastapi.concurrency import run_in_threadpool
+from utils.availability import iter_daily_counts
+
+# json.dumps builds a new encoder per call when given options; one shared encoder saves that on every row.
+_encoder = json.JSONEncoder(separators=(",", ":"), default=str)
+
+def csv_value(value):
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, list):
+        return ";".join(str(item) for item in value)
+    if isinstance(value, dict):
+        return _encoder.encode(value)
+    return value
+
+def csv_lines(rows: Iterable[list]) -> str:
+    """
+    Renders a batch of rows as CSV in one string, so a page goes out as one chunk rather than a write per row.
+    """
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows([csv_value(value) for value in row] for row in rows)
+    return buffer.getvalue()
+
+def ndjson_lines(records: Iterable[dict]) -> str:
+    return "".join(_encoder.encode(record) + "\n" for record in records)
+
+def slot_labels(slot_minutes: int, first_hour: int, last_hour: int) -> List[str]:
+    first_slot = first_hour * 60 // slot_minutes
+    last_slot = last_hour * 60 // slot_minutes
+    return [f"{slot * slot_minutes // 60:02d}:{slot * slot_minutes % 60:02d}" for slot in range(first_slot, last_slot)]
+
+def grid_records(max_people: int, occupancy: np.ndarray, origin: datetime, role: Optional[str], slot_minutes: int, first_hour: int, last_hour: int, format: str) -> Iterator[str]:
+    """
+    One role's grid as export chunks: in NDJSON the same header-then-days records as /admin/?format=ndjson, in CSV one
+    row per day with a column per slot.
+    """
+    records = iter_daily_counts(occupancy, origin, max_people, role, slot_minutes, first_hour, last_hour)
+    header = next(records)
+    if format == "ndjson":
+        yield ndjson_lines([header])
+        yield ndjson_lines(records)
+        return
+
+    yield csv_lines([record["role"], record["date"], max_people, *record["counts"]] for record in records)
+
+async def gzip_chunks(chunks: AsyncIterator[str], level: int) -> AsyncIterator[bytes]:
+    """
+    Compresses a stream of text chunks into one gzip member as they go by. zlib releases the GIL, so each page is
+    compressed on the threadpool rather than holding up the event loop.
+    """
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    async for chunk in chunks:
+        data = await run_in_threadpool(compressor.compress, chunk.encode())
+        if data:
+            yield data
+    yield compressor.flush()
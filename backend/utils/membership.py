@@ -0,0 +1,77 @@
+from datetime import datetime
+from typing import Iterable, List, Optional, Tuple
+import numpy as np
+from utils.availability import MINUTES_PER_DAY, collect_spans, grid_from_spans
+
+# Members are turned into bits this many at a time, bounding the intermediate count grids to
+# MEMBER_CHUNK x slots int32s however large the club is.
+MEMBER_CHUNK = 512
+
+POPCOUNT = np.array([bin(value).count("1") for value in range(256)], dtype=np.uint8)
+
+class SlotMembership:
+    """
+    Who is free in every slot of a grid, as one bitset per slot: bit m of row s is set when members[m] has no event
+    overlapping slot s. Rows are packed little-endian into bytes, so member m lives in byte m // 8, bit m % 8.
+    """
+    def __init__(self, members: List[str], bits: np.ndarray, days: int, slot_minutes: int):
+        self.members = members
+        self.index = {member: position for position, member in enumerate(members)}
+        self.bits = bits
+        self.days = days
+        self.slot_minutes = slot_minutes
+        self.slots_per_day = MINUTES_PER_DAY // slot_minutes
+
+    def mask(self, member_ids: Iterable[str]) -> np.ndarray:
+        flags = np.zeros(self.bits.shape[1] * 8, dtype=bool)
+        flags[[self.index[member_id] for member_id in member_ids]] = True
+        return np.packbits(flags, bitorder="little")
+
+    def free_at(self, slot: int) -> List[str]:
+        flags = np.unpackbits(self.bits[slot], count=len(self.members), bitorder="little")
+        return [self.members[position] for position in flags.nonzero()[0]]
+
+    def free_counts(self) -> np.ndarray:
+        """
+        Number of free members per slot, shaped (days x slots per day).
+        """
+        return POPCOUNT[self.bits].sum(axis=1, dtype=np.int32).reshape(self.days, self.slots_per_day)
+
+    def best_slots(self, required: Iterable[str], limit: int = 10, first_hour: int = 0, last_hour: int = 24, exists: Optional[np.ndarray] = None) -> List[Tuple[int, int, int]]:
+        """
+        Ranks the slots inside each day's [first_hour, last_hour) window by how many of `required` are free, then by
+        how many members are free overall, earliest first on ties. Returns (slot, required free, total free) tuples.
+        Slots false in `exists` (ones a clock change skips) are never returned.
+        """
+        mask = self.mask(required)
+        required_free = POPCOUNT[self.bits & mask].sum(axis=1, dtype=np.int32)
+        total_free = POPCOUNT[self.bits].sum(axis=1, dtype=np.int32)
+
+        minute_of_day = np.arange(len(self.bits)) % self.slots_per_day * self.slot_minutes
+        candidates = (minute_of_day >= first_hour * 60) & (minute_of_day < last_hour * 60)
+        if exists is not None:
+            candidates &= exists
+        in_window = np.flatnonzero(candidates)
+
+        order = np.lexsort((in_window, -total_free[in_window], -required_free[in_window]))[:limit]
+        return [(int(slot), int(required_free[slot]), int(total_free[slot])) for slot in in_window[order]]
+
+def build_membership(events: List[dict], members: List[str], origin: datetime, days: int, slot_minutes: int = 60) -> SlotMembership:
+    """
+    Builds the per-slot free bitsets of `members` from their raw event rows; events of anyone else are ignored.
+    """
+    index = {member: position for position, member in enumerate(members)}
+    event_groups = [[index[event["user_id"]]] if event.get("user_id") in index else [] for event in events]
+    spans = collect_spans(events, event_groups, origin, slot_minutes)
+
+    total_slots = days * (MINUTES_PER_DAY // slot_minutes)
+    bits = np.zeros((total_slots, -(-len(members) // 8)), dtype=np.uint8)
+
+    for start in range(0, len(members), MEMBER_CHUNK):
+        chunk = range(start, min(start + MEMBER_CHUNK, len(members)))
+        busy = grid_from_spans(spans, chunk, origin, days, slot_minutes).reshape(len(chunk), total_slots)
+        # Chunks start on a multiple of 8 members, so each one fills whole bytes.
+        packed = np.packbits(busy == 0, axis=0, bitorder="little")
+        bits[:, start // 8:start // 8 + len(packed)] = packed.T
+
+    return SlotMembership(members, bits, days, slot_minutes)
@@ -0,0 +1,118 @@
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from threading import Lock
+from typing import Dict, Iterator, List, Optional, Tuple
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+class Histogram:
+    """
+    Prometheus-style histogram: cumulative bucket counts plus sum and count, one series per label set.
+    """
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...], buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = buckets
+        self._series: Dict[Tuple[str, ...], List] = {}
+        self._lock = Lock()
+
+    def observe(self, value: float, *label_values: str):
+        with self._lock:
+            series = self._series.setdefault(label_values, [[0] * (len(self.buckets) + 1), 0.0, 0])
+            series[0][bisect_left(self.buckets, value)] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} histogram"
+        with self._lock:
+            series = {labels: (list(counts), total, count) for labels, (counts, total, count) in self._series.items()}
+
+        for label_values, (counts, total, count) in series.items():
+            labels = ",".join(f'{name}="{value}"' for name, value in zip(self.labels, label_values))
+            prefix = f"{labels}," if labels else ""
+            cumulative = 0
+            for bound, bucket in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket
+                yield f'{self.name}_bucket{{{prefix}le="{"+Inf" if bound == float("inf") else bound}"}} {cumulative}'
+            yield f"{self.name}_sum{{{labels}}} {total}"
+            yield f"{self.name}_count{{{labels}}} {count}"
+
+class Counter:
+    """
+    Prometheus-style counter, one series per label set.
+    """
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...]):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self._series: Dict[Tuple[str, ...], int] = {}
+        self._lock = Lock()
+
+    def inc(self, *label_values: str, amount: int = 1):
+        with self._lock:
+            self._series[label_values] = self._series.get(label_values, 0) + amount
+
+    def render(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} counter"
+        with self._lock:
+            series = dict(self._series)
+
+        for label_values, value in series.items():
+            labels = ",".join(f'{name}="{value}"' for name, value in zip(self.labels, label_values))
+            yield f"{self.name}{{{labels}}} {value}"
+
+class MetricsRegistry:
+    def __init__(self):
+        self.request_duration = Histogram("http_request_duration_seconds", "Total request latency.", ("method", "route", "status"))
+        self.request_phase = Histogram("http_request_phase_seconds", "Time per request spent in database calls, computation and serialization.", ("route", "phase"))
+        self.call_duration = Histogram("supabase_call_duration_seconds", "Latency of individual Supabase/PostgREST calls.", ("call",))
+        self.rate_limit = Counter("rate_limited_requests_total", "Requests checked by a rate limiter, by whether they were allowed or limited.", ("limiter", "result"))
+        self.conditional = Counter("http_conditional_requests_total", "Reads carrying an ETag, by whether they were answered with 304 (hit) or a full body (miss).", ("route", "result"))
+
+    def render(self) -> str:
+        lines = []
+        for metric in (self.request_duration, self.request_phase, self.call_duration, self.conditional, self.rate_limit):
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+registry = MetricsRegistry()
+
+class RequestTimings:
+    """
+    Time spent in each phase of one request, plus every individual upstream call.
+    """
+    def __init__(self):
+        self.phases: Dict[str, float] = {}
+        self.calls: List[Tuple[str, float]] = []
+
+    def add(self, phase: str, seconds: float):
+        self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+
+current_timings: ContextVar[Optional[RequestTimings]] = ContextVar("current_timings", default=None)
+
+def record_call(name: str, seconds: float, count_phase: bool = True):
+    registry.call_duration.observe(seconds, name)
+    timings = current_timings.get()
+    if timings is not None:
+        if count_phase:
+            timings.add("db", seconds)
+        timings.calls.append((name, seconds))
+
+@contextmanager
+def timed_phase(phase: str):
+    """
+    Adds the time spent in the block to the current request's `phase`, e.g. "compute" or "serialize".
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings = current_timings.get()
+        if timings is not None:
+            timings.add(phase, time.perf_counter() - started)
@@ -0,0 +1,47 @@
+from typing import Dict, List, Tuple
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+def window_minimums(available: np.ndarray, window_slots: int) -> np.ndarray:
+    """
+    Minimum of every run of `window_slots` consecutive slots within each day of a (days x slots) grid,
+    shaped (days x starts). Runs never cross midnight.
+    """
+    if window_slots > available.shape[1]:
+        raise ValueError("The window is longer than the hours searched each day.")
+    return sliding_window_view(available, window_slots, axis=1).min(axis=2)
+
+def rank_windows(available: Dict[str, np.ndarray], needs: Dict[str, int], window_slots: int, limit: int = 10) -> List[Tuple[int, int, float, Dict[str, int]]]:
+    """
+    Finds the best `limit` non-overlapping windows of `window_slots` slots for a role mix.
+
+    `available` holds each role's (days x slots) grid of free members and `needs` how many of each role the window
+    requires. A window's coverage is the share of those seats it can fill for its whole length, using each role's
+    minimum over the window; ties go to the window with the most spare people, then the earliest.
+    Returns (day, first slot, coverage, minimum free per role) tuples, best first.
+
+    Roles are counted independently, so someone holding two of the requested roles may count towards both.
+    """
+    minimums = {role: window_minimums(available[role], window_slots) for role in needs}
+    total_needed = sum(needs.values())
+
+    filled = sum(np.minimum(minimums[role], need) for role, need in needs.items())
+    spare = sum(minimums[role] - need for role, need in needs.items())
+    coverage = filled / total_needed
+
+    days, starts = coverage.shape
+    order = np.lexsort((np.arange(days * starts), -spare.ravel(), -coverage.ravel()))
+
+    # Greedily keep the best windows that don't overlap one already kept, so the top K aren't one window shifted by a slot.
+    taken = np.zeros((days, starts + window_slots), dtype=bool)
+    windows = []
+    for flat in order:
+        if len(windows) == limit:
+            break
+        day, start = divmod(int(flat), starts)
+        if taken[day, start:start + window_slots].any():
+            continue
+        taken[day, start:start + window_slots] = True
+        windows.append((day, start, float(coverage[day, start]), {role: int(minimums[role][day, start]) for role in needs}))
+
+    return windows
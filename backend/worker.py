@@ -0,0 +1,32 @@
+import asyncio
+import logging
+import signal
+from db.supabase_client import close_async_supabase
+from db.redis_client import close_redis, get_redis_client
+from db.maintenance import add_maintenance_jobs
+from db.scheduler import LeaderScheduler
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Runs scheduled jobs outside the API processes: `python worker.py`, with SCHEDULER_MODE=worker set for the API.
+# Several workers can run at once for failover; only the elected leader fires jobs.
+async def main():
+    leader = LeaderScheduler(get_redis_client(), add_maintenance_jobs)
+
+    stopping = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stopping.set)
+
+    logger.info(f"Scheduler worker {leader.name} starting...")
+    leader_task = asyncio.create_task(leader.run())
+    await stopping.wait()
+
+    logger.info("Shutting down scheduler worker...")
+    await leader.stop()
+    await leader_task
+    await asyncio.gather(close_async_supabase(), close_redis())
+
+if __name__ == "__main__":
+    asyncio.run(main())